@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Benchmark of per-clock memory footprint and start/stop cost
+
+Only the public StopWatch API is used so the script can be run against older releases for comparison:
+
+    python benchmarks/clockrecord.py [clockcount]
+"""
+import gc
+import json
+import sys
+import timeit
+import tracemalloc
+
+from pyStopWatch.StopWatch import StopWatch
+
+
+def clockmemory(_count):
+    """
+    Measure the memory held per clock after adding and using _count clocks
+    :param _count: number of clocks to create
+    :return: bytes per clock
+    :rtype: float
+    """
+    _names = ['clock{0}'.format(_idx) for _idx in range(_count)]
+    _sw = StopWatch()
+    gc.collect()
+    tracemalloc.start()
+    _before = tracemalloc.get_traced_memory()[0]
+    for _name in _names:
+        _sw.addclock(_name, _name)
+    _after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (_after - _before) / float(_count)
+
+
+def startstopcost(_number=200000, _recordlapdetail=False):
+    """
+    Measure the cost of a start/stop pair on a named clock
+    :param _number: start/stop pairs per repetition
+    :param _recordlapdetail: record lap detail while timing
+    :return: nanoseconds per start/stop pair (best of 5)
+    :rtype: float
+    """
+    _sw = StopWatch(_recordlapdetail=_recordlapdetail)
+    _sw.addclock('bench', 'Bench')
+    _timer = timeit.Timer('start("bench"); stop("bench")', globals={'start': _sw.start, 'stop': _sw.stop})
+    return min(_timer.repeat(5, _number)) / _number * 1e9
+
+
+def main(_argv=None):
+    _argv = sys.argv[1:] if _argv is None else _argv
+    _count = int(_argv[0]) if _argv else 10000
+    print(json.dumps({
+        'clocks': _count,
+        'bytes_per_clock': round(clockmemory(_count), 1),
+        'startstop_ns': round(startstopcost(), 1),
+        'startstop_lapdetail_ns': round(startstopcost(_number=50000, _recordlapdetail=True), 1),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Benchmark of ConcurrentStopWatch start/stop overhead against the single threaded StopWatch
+
+    python benchmarks/concurrent.py [threads] [laps per thread]
+"""
+import json
+import sys
+import threading
+import time
+
+from pyStopWatch.StopWatch import StopWatch
+from pyStopWatch.ConcurrentStopWatch import ConcurrentStopWatch
+
+
+def startstop(_sw, _laps):
+    _start, _stop = _sw.start, _sw.stop
+    for _lap in range(_laps):
+        _start('bench')
+        _stop('bench')
+
+
+def threaded(_threads, _laps):
+    """
+    Time start/stop pairs on one clock from many threads at once
+    :return: (nanoseconds per pair, laps recorded)
+    """
+    _sw = ConcurrentStopWatch()
+    _sw.addclock('bench', 'Bench')
+    _workers = [threading.Thread(target=startstop, args=(_sw, _laps)) for _thread in range(_threads)]
+    _begin = time.perf_counter_ns()
+    for _worker in _workers:
+        _worker.start()
+    for _worker in _workers:
+        _worker.join()
+    _elapsed = time.perf_counter_ns() - _begin
+    return _elapsed / float(_threads * _laps), _sw.clocklapcount('bench')
+
+
+def single(_cls, _laps):
+    _sw = _cls()
+    _sw.addclock('bench', 'Bench')
+    _begin = time.perf_counter_ns()
+    startstop(_sw, _laps)
+    return (time.perf_counter_ns() - _begin) / float(_laps)
+
+
+def main(_argv=None):
+    _argv = sys.argv[1:] if _argv is None else _argv
+    _threads = int(_argv[0]) if _argv else 8
+    _laps = int(_argv[1]) if len(_argv) > 1 else 100000
+    _pairns, _recorded = threaded(_threads, _laps)
+    print(json.dumps({
+        'threads': _threads,
+        'laps_per_thread': _laps,
+        'stopwatch_startstop_ns': round(single(StopWatch, _laps), 1),
+        'concurrent_startstop_ns': round(single(ConcurrentStopWatch, _laps), 1),
+        'concurrent_threaded_startstop_ns': round(_pairns, 1),
+        'laps_recorded': _recorded,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+# coding=utf-8
+"""
+asyncio support for StopWatch.  Coroutines are timed for as long as they run rather than for how long it takes to
+create them, and clocks are tracked per task through contextvars so overlapping tasks can time the same clock.
+
+Time spent running on the event loop is separated from time spent suspended by measuring each step a coroutine
+takes.  Coroutines wrapped by timeit are always measured this way; for async with blocks the tasks must be created
+on an event loop set up with instrument().
+"""
+
+import asyncio
+import contextvars
+import functools
+import types
+
+from .StopWatchException import StopWatchException
+
+# (task, ((stopwatch id, clock name), ...)) of the clocks the current task has in flight
+_INFLIGHT = contextvars.ContextVar('pyStopWatch_inflight', default=(None, ()))
+# TaskTimes of the current task when its event loop is instrumented
+_TASKTIMES = contextvars.ContextVar('pyStopWatch_tasktimes', default=None)
+
+
+class TaskTimes(object):
+    """
+    Running time of a coroutine, accumulated one step at a time
+    """
+    __slots__ = ('now', 'running', 'stepbegin', 'created')
+
+    def __init__(self, _now):
+        self.now = _now
+        self.running = 0
+        self.stepbegin = None
+        self.created = _now()
+
+    def runningns(self):
+        """
+        Nanoseconds spent running so far, including the step in progress
+        :rtype: int
+        """
+        if self.stepbegin is None:
+            return self.running
+        return self.running + self.now() - self.stepbegin
+
+
+@types.coroutine
+def drive(_coro, _times):
+    """
+    Await a coroutine, adding the time each of its steps takes to _times.running
+    :param _coro: coroutine to run
+    :param _times: accumulator for running time
+    :type _times: TaskTimes
+    :return: the coroutine's result
+    """
+    _now = _times.now
+    _value = _exc = None
+    while True:
+        _times.stepbegin = _now()
+        try:
+            if _exc is None:
+                _yielded = _coro.send(_value)
+            else:
+                _yielded = _coro.throw(_exc)
+        except StopIteration as _stop:
+            return _stop.value
+        finally:
+            _times.running += _now() - _times.stepbegin
+            _times.stepbegin = None
+        try:
+            _value, _exc = (yield _yielded), None
+        except BaseException as _thrown:
+            _value, _exc = None, _thrown
+
+
+def instrument(_loop=None, _clocksource='perf_counter'):
+    """
+    Install a task factory on an event loop so every task created afterwards measures its running time.  Needed
+    for StopWatch.atime to split clock time into running and suspended
+    :param _loop: event loop, defaults to the running loop
+    :param _clocksource: clock source name or callable returning integer nanoseconds
+    """
+    from .StopWatch import getclocksource
+    _loop = _loop or asyncio.get_running_loop()
+    _now = getclocksource(_clocksource)
+    _previous = _loop.get_task_factory()
+
+    async def _measured(_coro):
+        _times = TaskTimes(_now)
+        _TASKTIMES.set(_times)
+        return await drive(_coro, _times)
+
+    def _factory(_eventloop, _coro, **kwargs):
+        if _previous is not None:
+            return _previous(_eventloop, _measured(_coro), **kwargs)
+        return asyncio.Task(_measured(_coro), loop=_eventloop, **kwargs)
+
+    _loop.set_task_factory(_factory)
+
+
+def tasktimes():
+    """
+    Running and suspended seconds of the current task so far, or None when its loop is not instrumented
+    :rtype: dict | None
+    """
+    _times = _TASKTIMES.get()
+    if _times is None:
+        return None
+    _running = _times.runningns()
+    return {
+        'running': _running / 1e9,
+        'suspended': (_times.now() - _times.created - _running) / 1e9
+    }
+
+
+class AsyncClockContext(object):
+    """
+    async with block timing one lap of a clock for the current task
+    """
+    __slots__ = ('_sw', '_clockname', '_key', '_token', '_times', '_begin', '_running')
+
+    def __init__(self, _sw, _clockname):
+        self._sw = _sw
+        self._clockname = _clockname
+        self._key = (id(_sw), _clockname)
+
+    async def __aenter__(self):
+        _task = asyncio.current_task()
+        _owner, _inflight = _INFLIGHT.get()
+        if _owner is not _task:
+            _inflight = ()
+        if self._key in _inflight:
+            raise StopWatchException('StopWatch is already started')
+        self._token = _INFLIGHT.set((_task, _inflight + (self._key,)))
+        _sampler = self._sw._clocks[self._clockname].sampler
+        if _sampler is not None and _sampler.skip():
+            # lap not sampled; nothing is recorded on exit
+            self._begin = None
+            return self
+        self._times = _TASKTIMES.get()
+        self._running = self._times.runningns() if self._times is not None else None
+        self._begin = self._sw._now()
+        return self
+
+    async def __aexit__(self, _exctype, _exc, _tb):
+        _end = self._sw._now()
+        _INFLIGHT.reset(self._token)
+        if self._begin is None:
+            return False
+        _clock = self._sw._writeclock(self._clockname)
+        self._sw._recordlap(_clock, self._begin, _end)
+        if self._times is not None:
+            _running = self._times.runningns() - self._running
+            _clock.addtasktime(_running, _end - self._begin - _running)
+        return False
+
+
+def _untimed():
+    return 0
+
+
+def timecoroutine(_func, _getstopwatch, _record, _sampler=None):
+    """
+    Wrap a coroutine function so each call is timed while it runs, split into running and suspended time
+    :param _func: coroutine function
+    :param _getstopwatch: callable returning the StopWatch to time a call with
+    :param _record: callable taking the StopWatch, lap begin and end timestamps and (running, suspended) nanoseconds
+    :param _sampler: Sampler deciding which calls are timed; untimed calls are awaited directly
+    """
+
+    @functools.wraps(_func)
+    async def wrapper(*args, **kwargs):
+        if _sampler is not None and _sampler.skip():
+            return await _func(*args, **kwargs)
+        _sw = _getstopwatch()
+        _times = TaskTimes(_sw._now)
+        _begin = _sw._now()
+        try:
+            return await drive(_func(*args, **kwargs), _times)
+        finally:
+            _end = _sw._now()
+            _record(_sw, _begin, _end, (_times.running, _end - _begin - _times.running))
+
+    return wrapper
+
+
+def timeasyncgen(_func, _getstopwatch, _record, _sampler=None):
+    """
+    Wrap an async generator function so each call is timed across all of its steps.  Time the consumer spends
+    between items is excluded
+    :param _func: async generator function
+    :param _getstopwatch: callable returning the StopWatch to time a call with
+    :param _record: callable taking the StopWatch and the begin and end timestamps of the lap
+    :param _sampler: Sampler deciding which calls are timed; untimed calls read no clock and record nothing
+    """
+
+    @functools.wraps(_func)
+    async def wrapper(*args, **kwargs):
+        _skipped = _sampler is not None and _sampler.skip()
+        _sw = None if _skipped else _getstopwatch()
+        _now = _untimed if _skipped else _sw._now
+        _agen = _func(*args, **kwargs)
+        _begin = _now()
+        _elapsed = 0
+        _value = _exc = None
+        try:
+            while True:
+                _step = _now()
+                try:
+                    if _exc is None:
+                        _item = await _agen.asend(_value)
+                    else:
+                        _item = await _agen.athrow(_exc)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _elapsed += _now() - _step
+                try:
+                    _value, _exc = (yield _item), None
+                except GeneratorExit:
+                    await _agen.aclose()
+                    raise
+                except BaseException as _thrown:
+                    _value, _exc = None, _thrown
+        finally:
+            if not _skipped:
+                _record(_sw, _begin, _begin + _elapsed)
+
+    return wrapper
@@ -0,0 +1,169 @@
+# coding=utf-8
+"""
+Nested clocks.  with sw.clock('parse') blocks opened inside each other time into clocks named by their path
+('parse/tokenize/regex'), so a block entered again from the same place accumulates into the same clock.  The call
+tree is rebuilt from the clock names when it is read; exclusive (self) time of a node is its inclusive time less the
+inclusive time of its children.
+"""
+
+import contextvars
+
+from .StopWatchException import StopWatchException
+
+# separates the parts of a nested clock name
+SEP = '/'
+
+# innermost ClockContext open in the current thread or task
+_OPEN = contextvars.ContextVar('pyStopWatch_openclock', default=None)
+
+
+class ClockContext(object):
+    """
+    with block timing one lap of a clock nested under the clock blocks of the same stopwatch it is opened in
+    """
+    __slots__ = ('_sw', '_name', 'path', '_parent', '_token', '_begin')
+
+    def __init__(self, _sw, _name):
+        self._sw = _sw
+        self._name = _name
+
+    def __enter__(self):
+        _parent = _OPEN.get()
+        _open = _parent
+        while _open is not None and _open._sw is not self._sw:
+            _open = _open._parent
+        self.path = self._name if _open is None else _open.path + SEP + self._name
+        if self.path not in self._sw._clocks:
+            self._sw._addtreeclock(self.path, self._name, _open is None)
+        elif _open is None:
+            self._sw._treeroots.add(self.path)
+        self._parent = _parent
+        self._token = _OPEN.set(self)
+        # a lap the clock's sampler skips is not timed, though the block still nests the blocks opened inside it
+        _sampler = self._sw._clocks[self.path].sampler
+        self._begin = None if _sampler is not None and _sampler.skip() else self._sw._now()
+        return self
+
+    def __exit__(self, _exctype, _exc, _tb):
+        _end = self._sw._now()
+        _OPEN.reset(self._token)
+        if self._begin is None:
+            return False
+        try:
+            _clock = self._sw._writeclock(self.path)
+        except KeyError:
+            # clock was removed while the block ran
+            return False
+        self._sw._recordlap(_clock, self._begin, _end)
+        return False
+
+
+class CallNode(object):
+    """
+    Node of a call tree; times are in nanoseconds
+    """
+    __slots__ = ('name', 'path', 'title', 'inclusive', 'laps', 'children')
+
+    def __init__(self, _path, _title, _inclusive, _laps):
+        self.name = _path.rsplit(SEP, 1)[-1]
+        self.path = _path
+        self.title = _title
+        self.inclusive = _inclusive
+        self.laps = _laps
+        self.children = []
+
+    @property
+    def exclusive(self):
+        """
+        Time not spent in any child
+        :rtype: int
+        """
+        return max(0, self.inclusive - sum(_child.inclusive for _child in self.children))
+
+    def todict(self, _nspersec):
+        """
+        Nested dict of the tree below this node, times in seconds
+        :rtype: dict
+        """
+        return {
+            'title': self.title,
+            'inclusive': self.inclusive / _nspersec,
+            'exclusive': self.exclusive / _nspersec,
+            'laps': self.laps,
+            'children': dict((_child.name, _child.todict(_nspersec)) for _child in self.children)
+        }
+
+
+def buildtree(_clocks, _totals, _roots):
+    """
+    Call trees of a stopwatch's nested clocks
+    :param _clocks: (clock name, Clock) pairs
+    :param _totals: inclusive nanoseconds of each clock in _clocks
+    :param _roots: names of top level clocks opened with StopWatch.clock
+    :return: root nodes, heaviest first
+    :rtype: list of CallNode
+    """
+    _nodes = {}
+    _roots = set(_roots)
+    for (_clockname, _clock), _total in zip(_clocks, _totals):
+        if SEP in _clockname:
+            _roots.add(_clockname.split(SEP, 1)[0])
+            _nodes[_clockname] = CallNode(_clockname, _clock.title, _total, _clock.currentlap)
+    for (_clockname, _clock), _total in zip(_clocks, _totals):
+        if _clockname in _roots:
+            _nodes[_clockname] = CallNode(_clockname, _clock.title, _total, _clock.currentlap)
+    _top = []
+    for _path in sorted(_nodes):
+        _node = _nodes[_path]
+        _parent = _nodes.get(_path.rsplit(SEP, 1)[0]) if SEP in _path else None
+        if _parent is not None:
+            _parent.children.append(_node)
+        elif SEP not in _path:
+            _top.append(_node)
+    for _node in _nodes.values():
+        _node.children.sort(key=lambda _child: -_child.inclusive)
+    _top.sort(key=lambda _node: -_node.inclusive)
+    return _top
+
+
+def findnode(_roots, _path):
+    """
+    Node of a call tree by path
+    :rtype: CallNode
+    """
+    for _node in _roots:
+        if _node.path == _path:
+            return _node
+        if _path.startswith(_node.path + SEP):
+            return findnode(_node.children, _path)
+    raise StopWatchException('Clock, {0}, is not part of a call tree'.format(_path))
+
+
+def hotpath(_node):
+    """
+    Follow the heaviest child from a node for as long as it takes more time than its parent spends in itself
+    :param _node: node to start from
+    :type _node: CallNode
+    :return: nodes from _node down to the dominant sub-phase
+    :rtype: list of CallNode
+    """
+    _path = [_node]
+    while _node.children and _node.children[0].inclusive > _node.exclusive:
+        _node = _node.children[0]
+        _path.append(_node)
+    return _path
+
+
+def rendertree(_roots, _nspersec, _indent='  '):
+    """
+    Lines of an indented call tree
+    :rtype: list of str
+    """
+    _lines = []
+    _stack = [(_node, 0) for _node in reversed(_roots)]
+    while _stack:
+        _node, _depth = _stack.pop()
+        _lines.append('{0}{1}: {2:f} seconds inclusive, {3:f} seconds self in {4} lap(s)'.format(
+            _indent * _depth, _node.title, _node.inclusive / _nspersec, _node.exclusive / _nspersec, _node.laps))
+        _stack.extend((_child, _depth + 1) for _child in reversed(_node.children))
+    return _lines
@@ -0,0 +1,202 @@
+# coding=utf-8
+"""
+Thread safe StopWatch.  Each thread times into its own private set of clocks, so start/stop never contend and the
+same clock can have a lap in flight in several threads at once.  Queries and summaries merge the per thread clocks
+when they are read.
+"""
+
+import threading
+
+from .StopWatch import StopWatch, Clock, ClockHandle
+from .Histogram import Histogram
+
+
+class ThreadClockHandle(ClockHandle):
+    """
+    Handle on a ConcurrentStopWatch clock.  Each call acts on the calling thread's copy of the clock, looked up per
+    call as the name based methods do, so one handle can be shared by all threads
+    """
+    __slots__ = ()
+
+    def start(self, overridestart=None):
+        self._start(self._resolve(), overridestart)
+
+    def stop(self, overrideend=None):
+        self._stop(self._resolve(), overrideend)
+
+    def pause(self, overrideend=None):
+        self._pause(self._resolve(), overrideend, self.name)
+
+    def unpause(self, overridestart=None):
+        self._unpause(self._resolve(), overridestart)
+
+
+class ConcurrentStopWatch(StopWatch):
+    """
+    StopWatch whose clocks can be timed from many threads at once
+    start/stop/pause/unpause act on the calling thread's copy of a clock.  clocktotalsecs, clocklapcount, the state
+    queries and the summaries report the clock across all threads; a clock shows as started while any thread has it
+    started.  Clocks are added, removed and reset for every thread.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._shards = []
+        super(ConcurrentStopWatch, self).__init__(*args, **kwargs)
+
+    def __shard(self):
+        """
+        The calling thread's clocks, registered on first use so they outlive the thread
+        :rtype: dict
+        """
+        try:
+            return self._local.clocks
+        except AttributeError:
+            _shard = self._local.clocks = {}
+            with self._lock:
+                self._shards.append(_shard)
+            return _shard
+
+    def _writeclock(self, _clockname):
+        """
+        The calling thread's clock record for a clock name, created on first use
+        :param _clockname: clock name
+        :type _clockname: str
+        :rtype: Clock
+        """
+        _shard = self.__shard()
+        try:
+            return _shard[_clockname]
+        except KeyError:
+            _defn = self._clocks[_clockname]
+            _histogram = Histogram(_defn.histogram.precision) if _defn.histogram is not None else None
+            _clock = _shard[_clockname] = Clock(_defn.title, _defn.display, _histogram, None, _clockname,
+                                                tuple(_meter.new() for _meter in _defn.meters))
+            # the sampler is shared so every thread's calls count towards the same sampling schedule; attached after
+            # construction so the new record's reset leaves the other threads' statistics alone
+            _clock.sampler = _defn.sampler
+            return _clock
+
+    def __threadclocks(self, _clockname):
+        with self._lock:
+            _shards = list(self._shards)
+        return [_shard[_clockname] for _shard in _shards if _clockname in _shard]
+
+    def _readclock(self, _clockname=None, _lapdetail=False):
+        """
+        All threads' records of a clock merged into one.  Lap detail is only merged (and sorted) when _lapdetail is
+        set, so scalar and state queries cost one fold of the totals per thread
+        """
+        _clockname = _clockname or self._defaultname
+        _defn = self._clocks[_clockname]
+        _merged = Clock(_defn.title, _defn.display, _name=_clockname)
+        _merged.sampler = _defn.sampler
+        if _defn.histogram is not None:
+            _merged.histogram = Histogram(_defn.histogram.precision)
+        _merged.meters = tuple(_meter.new() for _meter in _defn.meters)
+        _laps = []
+        for _clock in self.__threadclocks(_clockname):
+            _merged.merge(_clock)
+            if _lapdetail and _clock.lapdetail is not None:
+                _store = _clock.lapdetail
+                _laps.extend((_offset, _total, tuple(_store.lapextra(_lapnumber).values()))
+                             for _lapnumber, _total, _offset in _store)
+        if self._recordlapdetail and _laps:
+            _merged.lapdetail = self._newlapstore(_merged)
+            for _offset, _total, _extra in sorted(_laps):
+                _merged.lapdetail.append(_total, _offset, _extra)
+        return _merged
+
+    def _readclocks(self, _lapdetail=False):
+        return [(_clockname, self._readclock(_clockname, _lapdetail)) for _clockname in list(self._clocks)]
+
+    def _totalns(self, _clockname, _now=None):
+        """
+        Total nanoseconds for a clock across all threads, including laps in progress up to _now
+        """
+        _time = 0
+        for _clock in self.__threadclocks(_clockname or self._defaultname):
+            _time += _clock.total
+            _begin = _clock.begin
+            if _begin is not None and _clock.end is None and not _clock.paused:
+                if _now is None:
+                    _now = self._now()
+                _time += _now - _begin
+        return _time
+
+    def addclock(self, _clockname, _clocktitle, _display=True, _histogram=None, _sample=None, _overheadbudget=None,
+                 _tags=None, _cputime=None, _memory=None):
+        with self._lock:
+            super(ConcurrentStopWatch, self).addclock(_clockname, _clocktitle, _display, _histogram, _sample,
+                                                      _overheadbudget, _tags, _cputime, _memory)
+            for _shard in self._shards:
+                _shard.pop(_clockname, None)
+
+    def _addtreeclock(self, _path, _title, _toplevel):
+        with self._lock:
+            if _path not in self._clocks:
+                super(ConcurrentStopWatch, self)._addtreeclock(_path, _title, _toplevel)
+
+    def removeclock(self, _clockname):
+        with self._lock:
+            super(ConcurrentStopWatch, self).removeclock(_clockname)
+            for _shard in self._shards:
+                _shard.pop(_clockname, None)
+
+    def reset(self, _clockname=None):
+        _clockname = _clockname or self._defaultname
+        self._clocks[_clockname].reset()
+        for _clock in self.__threadclocks(_clockname):
+            _clock.reset()
+
+    def resetall(self):
+        for _clockname in list(self._clocks):
+            self.reset(_clockname)
+
+    def handle(self, _clockname=None):
+        return ThreadClockHandle(self, _clockname or self._defaultname)
+
+    def start(self, _clockname=None, overridestart=None):
+        self._startclock(self._writeclock(_clockname or self._defaultname), overridestart)
+
+    def stop(self, _clockname=None, overrideend=None):
+        self._stopclock(self._writeclock(_clockname or self._defaultname), overrideend)
+
+    def pause(self, _clockname=None, overrideend=None):
+        _clockname = _clockname or self._defaultname
+        self._pauseclock(self._writeclock(_clockname), overrideend, _clockname)
+
+    def unpause(self, _clockname=None, overridestart=None):
+        self._unpauseclock(self._writeclock(_clockname or self._defaultname), overridestart)
+
+    # clocks change state per thread, so the state queries merge the threads' clocks instead of using the indexes
+
+    def startedclocks(self):
+        return [_clockname for _clockname, _clock in self._readclocks() if _clock.isstarted()]
+
+    def stoppedclocks(self):
+        return [_clockname for _clockname, _clock in self._readclocks() if _clock.isstopped()]
+
+    def pausedclocks(self):
+        return [_clockname for _clockname, _clock in self._readclocks() if _clock.paused]
+
+    def usedclocks(self):
+        return [_clockname for _clockname, _clock in self._readclocks() if _clock.everused()]
+
+    def startall(self):
+        """
+        Start all clocks in the calling thread at same time
+        """
+        _start = self._now()
+        for _clockname in list(self._clocks):
+            self._startclock(self._writeclock(_clockname), _start)
+
+    def stopall(self):
+        """
+        Stop all clocks started in the calling thread at same time
+        """
+        _stop = self._now()
+        for _clock in list(self.__shard().values()):
+            if _clock.isstarted() or _clock.skipped:
+                self._stopclock(_clock, _stop)
@@ -0,0 +1,139 @@
+# coding=utf-8
+"""
+CPU and garbage collection time of a clock.  A CpuMeter accumulates, next to a clock's wall time, the process CPU
+time, the CPU time of the thread timing the clock and the time spent in garbage collection pauses while the clock
+runs.  GC pauses are measured by one gc.callbacks hook shared by every meter, which keeps a running total that meters
+read at the start and end of each running segment.
+"""
+
+import gc
+import time
+
+from .StopWatchException import StopWatchException
+
+# clock sources of the GC hook and the meters; thread CPU time is missing on some platforms
+_gcclock = time.perf_counter_ns
+_processtime = time.process_time_ns
+_threadtime = getattr(time, 'thread_time_ns', None)
+
+# [nanoseconds spent in completed collections, start of the collection in progress]
+_gcstate = [0, None]
+
+
+def _gccallback(_phase, _info):
+    if _phase == 'start':
+        _gcstate[1] = _gcclock()
+    elif _gcstate[1] is not None:
+        _gcstate[0] += _gcclock() - _gcstate[1]
+        _gcstate[1] = None
+
+
+def gctime():
+    """
+    Nanoseconds spent in garbage collection since the first CpuMeter was made
+    :rtype: int
+    """
+    return _gcstate[0]
+
+
+def installgchook():
+    """
+    Start measuring garbage collection pauses; done once, by the first CpuMeter
+    """
+    if _gccallback not in gc.callbacks:
+        gc.callbacks.append(_gccallback)
+
+
+class CpuMeter(object):
+    """
+    Process CPU, thread CPU and GC nanoseconds of a clock in total and for its current lap.  Thread CPU time is that
+    of the thread calling begin and end, so a running segment should start and end on the same thread (as it does
+    with ConcurrentStopWatch)
+    """
+    __slots__ = ('cpu', 'threadcpu', 'gc', 'lapcpu', 'lapthreadcpu', 'lapgc', '_mark')
+
+    # names of the lap detail columns, in the order of lap()
+    COLUMNS = ('cpu', 'threadcpu', 'gc')
+
+    def __init__(self):
+        if _threadtime is None:
+            raise StopWatchException('Thread CPU time is not available here; CPU time cannot be metered')
+        installgchook()
+        self.reset()
+
+    def new(self):
+        """
+        Fresh meter measuring the same way
+        :rtype: CpuMeter
+        """
+        return CpuMeter()
+
+    def reset(self):
+        self.cpu = self.threadcpu = self.gc = 0
+        self.lapcpu = self.lapthreadcpu = self.lapgc = 0
+        self._mark = None
+
+    def newlap(self):
+        """
+        Start counting a new lap
+        """
+        self.lapcpu = self.lapthreadcpu = self.lapgc = 0
+
+    def begin(self):
+        """
+        Mark the start of a running segment
+        """
+        self._mark = (_processtime(), _threadtime(), _gcstate[0])
+
+    def end(self):
+        """
+        Add the time since begin to the totals and the current lap
+        """
+        _cpu = _processtime()
+        _threadcpu = _threadtime()
+        if self._mark is None:
+            return
+        _cpumark, _threadmark, _gcmark = self._mark
+        self._mark = None
+        _cpu -= _cpumark
+        _threadcpu -= _threadmark
+        _gc = _gcstate[0] - _gcmark
+        self.cpu += _cpu
+        self.threadcpu += _threadcpu
+        self.gc += _gc
+        self.lapcpu += _cpu
+        self.lapthreadcpu += _threadcpu
+        self.lapgc += _gc
+
+    def lap(self, _nspersec):
+        """
+        Current lap's CPU, thread CPU and GC time
+        :param _nspersec: divisor converting nanoseconds to the unit wanted
+        :rtype: tuple
+        """
+        return self.lapcpu / _nspersec, self.lapthreadcpu / _nspersec, self.lapgc / _nspersec
+
+    def todict(self, _nspersec):
+        """
+        Total CPU, thread CPU and GC time
+        :param _nspersec: divisor converting nanoseconds to the unit wanted
+        :rtype: dict
+        """
+        return {'cpu': self.cpu / _nspersec, 'threadcpu': self.threadcpu / _nspersec, 'gc': self.gc / _nspersec}
+
+    def describe(self, _nspersec):
+        """
+        Totals for a text summary
+        :rtype: str
+        """
+        return 'cpu {0:f} seconds, thread cpu {1:f} seconds, gc {2:f} seconds'.format(
+            self.cpu / _nspersec, self.threadcpu / _nspersec, self.gc / _nspersec)
+
+    def merge(self, _other):
+        """
+        Add another meter's totals to this one
+        :type _other: CpuMeter
+        """
+        self.cpu += _other.cpu
+        self.threadcpu += _other.threadcpu
+        self.gc += _other.gc
@@ -0,0 +1,251 @@
+# coding=utf-8
+"""
+Append-only binary log of clock events.  EventLogWriter is a StopWatch sink that appends one fixed size record per
+start/stop/pause/unpause through a buffered writer, so a long running job keeps every event on disk rather than in
+memory.  EventLog memory-maps a log and replays it into a StopWatch to get totals, lap counts and lap detail back.
+
+File layout (little endian):
+
+    magic 'PYSWEVT\\0', version (uint32), data offset (uint32), bytes of name table used (uint32)
+    name table: entries of kind (uint8), length (uint16), payload; kind 0 is a clock name (utf-8) and kind 1 a
+                thread ident (uint64).  Clocks and threads are numbered in the order their entries appear
+    records from the data offset on: clock number (uint32), thread number (uint32), event (uint8), 3 pad bytes,
+                timestamp in nanoseconds (int64)
+
+Version 1 logs, whose thread number is a uint16 followed by the event and 1 pad byte, are still read.
+"""
+
+import mmap
+import struct
+import threading
+
+from .StopWatch import StopWatch, Clock, EVENTS, EVENT_START, EVENT_STOP, EVENT_PAUSE, EVENT_UNPAUSE
+from .StopWatchException import StopWatchException
+from .LapStore import LapStore
+
+MAGIC = b'PYSWEVT\x00'
+VERSION = 2
+
+_HEADER = struct.Struct('<8sIII')
+_ENTRY = struct.Struct('<BH')
+_THREAD = struct.Struct('<Q')
+# record layout by log version
+_RECORDS = {1: struct.Struct('<IHBxq'), 2: struct.Struct('<IIBxxxq')}
+RECORD = _RECORDS[VERSION]
+
+_CLOCKNAME = 0
+_THREADIDENT = 1
+
+
+class EventLogWriter(object):
+    """
+    Sink appending clock events to a binary log:
+
+        with EventLogWriter('job.events') as log:
+            sw.addsink(log)
+            ...
+        print(EventLog('job.events').stopwatch().summary)
+
+    Events of a clock or thread that no longer fits in the name table are not written but counted in dropped
+    """
+
+    def __init__(self, _path, _tablesize=65536, _buffersize=65536):
+        """
+        :param _path: log file to create (an existing file is replaced)
+        :type _path: str
+        :param _tablesize: bytes reserved for the clock name table
+        :type _tablesize: int
+        :param _buffersize: bytes of records buffered before they are written out
+        :type _buffersize: int
+        """
+        self.path = _path
+        self._dataoffset = _HEADER.size + _tablesize
+        self._tableused = 0
+        self.dropped = 0
+        self._clockids = {}
+        self._threadids = {}
+        self._lock = threading.Lock()
+        self._header = open(_path, 'w+b')
+        self._header.write(_HEADER.pack(MAGIC, VERSION, self._dataoffset, 0))
+        self._header.write(b'\x00' * _tablesize)
+        self._header.flush()
+        self._records = open(_path, 'ab', buffering=_buffersize)
+
+    def __intern(self, _ids, _kind, _key, _payload):
+        with self._lock:
+            if _key in _ids:
+                return _ids[_key]
+            _entry = _ENTRY.pack(_kind, len(_payload)) + _payload
+            if _HEADER.size + self._tableused + len(_entry) > self._dataoffset:
+                return None
+            self._header.seek(_HEADER.size + self._tableused)
+            self._header.write(_entry)
+            self._tableused += len(_entry)
+            # publish the entry only once it is written
+            self._header.seek(_HEADER.size - 4)
+            self._header.write(struct.pack('<I', self._tableused))
+            self._header.flush()
+            _ids[_key] = len(_ids)
+            return _ids[_key]
+
+    def event(self, _clockname, _event, _timestamp, _thread):
+        """
+        Sink interface, see StopWatch.addsink
+        """
+        _clockid = self._clockids.get(_clockname)
+        if _clockid is None:
+            _clockid = self.__intern(self._clockids, _CLOCKNAME, _clockname, _clockname.encode('utf-8'))
+        _threadid = self._threadids.get(_thread)
+        if _threadid is None:
+            _threadid = self.__intern(self._threadids, _THREADIDENT, _thread, _THREAD.pack(_thread))
+        if _clockid is None or _threadid is None:
+            # the name table is full; raising here would break the timed code
+            self.dropped += 1
+            return
+        self._records.write(RECORD.pack(_clockid, _threadid, _event, _timestamp))
+
+    def flush(self):
+        """
+        Write out buffered records
+        """
+        self._records.flush()
+
+    def close(self):
+        """
+        Write out buffered records and close the log
+        """
+        self._records.close()
+        self._header.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _exctype, _exc, _tb):
+        self.close()
+        return False
+
+
+class EventLog(object):
+    """
+    Read only, memory mapped view of a log written by EventLogWriter.  Records are decoded one at a time as they are
+    iterated; a partly written last record is ignored
+    """
+
+    def __init__(self, _path):
+        """
+        :param _path: log file
+        :type _path: str
+        """
+        self.path = _path
+        self.clocks = []
+        self.threads = []
+        with open(_path, 'rb') as _file:
+            self._map = mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ)
+        _magic, _version, self._dataoffset, _tableused = _HEADER.unpack_from(self._map, 0)
+        if _magic != MAGIC or _version not in _RECORDS:
+            self.close()
+            raise StopWatchException('{0} is not an event log of version {1} or earlier'.format(_path, VERSION))
+        self._record = _RECORDS[_version]
+        _offset = _HEADER.size
+        while _offset < _HEADER.size + _tableused:
+            _kind, _length = _ENTRY.unpack_from(self._map, _offset)
+            _payload = self._map[_offset + _ENTRY.size:_offset + _ENTRY.size + _length]
+            if _kind == _CLOCKNAME:
+                self.clocks.append(_payload.decode('utf-8'))
+            else:
+                self.threads.append(_THREAD.unpack(_payload)[0])
+            _offset += _ENTRY.size + _length
+
+    def __len__(self):
+        return max(0, len(self._map) - self._dataoffset) // self._record.size
+
+    def records(self):
+        """
+        Raw records
+        :return: iterator of (clock number, thread number, event, timestamp)
+        """
+        _view = memoryview(self._map)[self._dataoffset:self._dataoffset + len(self) * self._record.size]
+        try:
+            for _record in self._record.iter_unpack(_view):
+                yield _record
+        finally:
+            _view.release()
+
+    def events(self):
+        """
+        Decoded records
+        :return: iterator of (clock name, event name, timestamp, thread ident)
+        """
+        for _clockid, _threadid, _event, _timestamp in self.records():
+            yield self.clocks[_clockid], EVENTS[_event], _timestamp, self.threads[_threadid]
+
+    def stopwatch(self, _title='Event log', _recordlapdetail=True, _lapretention=None):
+        """
+        Replay the log into a new StopWatch.  Lap start offsets are relative to the first event.  Events of a
+        thread that cannot be replayed (e.g. a stop for a lap that began before the log) are skipped.  The
+        stopwatch's clock stands at the last event, so laps still open at the end of the log (a job still running)
+        count up to it
+        :param _title: title of the stopwatch
+        :param _recordlapdetail: rebuild lap detail
+        :param _lapretention: lap retention of the stopwatch
+        :rtype: StopWatch
+        """
+        _origin = _last = 0
+        if len(self):
+            _origin = self._record.unpack_from(self._map, self._dataoffset)[3]
+            _last = self._record.unpack_from(self._map, self._dataoffset + (len(self) - 1) * self._record.size)[3]
+        _sw = StopWatch(_title, _recordlapdetail=_recordlapdetail, _lapretention=_lapretention,
+                        _clocksource=lambda: _last)
+        _sw._epoch = _origin
+        _threadclocks = {}
+        for _clockid, _threadid, _event, _timestamp in self.records():
+            _clock = _threadclocks.get((_clockid, _threadid))
+            if _clock is None:
+                _clockname = self.clocks[_clockid]
+                _clock = _threadclocks[(_clockid, _threadid)] = Clock(_clockname, _name=_clockname)
+            try:
+                if _event == EVENT_START:
+                    _sw._startclock(_clock, _timestamp)
+                elif _event == EVENT_STOP:
+                    _sw._stopclock(_clock, _timestamp)
+                elif _event == EVENT_PAUSE:
+                    _sw._pauseclock(_clock, _timestamp, _clock.name)
+                elif _event == EVENT_UNPAUSE:
+                    _sw._unpauseclock(_clock, _timestamp)
+            except StopWatchException:
+                pass
+        for _clockid, _clockname in enumerate(self.clocks):
+            _clocks = [_clock for (_id, _threadid), _clock in sorted(_threadclocks.items()) if _id == _clockid]
+            if len(_clocks) == 1:
+                _sw._clocks[_clockname] = _clocks[0]
+            elif _clocks:
+                _sw._clocks[_clockname] = self.__mergethreads(_clockname, _clocks, _lapretention)
+            _sw._reindex(_clockname)
+        return _sw
+
+    @staticmethod
+    def __mergethreads(_clockname, _clocks, _lapretention):
+        _merged = Clock(_clockname, _name=_clockname)
+        _laps = []
+        for _clock in _clocks:
+            _merged.merge(_clock)
+            if _clock.lapdetail is not None:
+                _laps.extend((_offset, _total) for _lapnumber, _total, _offset in _clock.lapdetail)
+        if _laps:
+            _merged.lapdetail = LapStore(_lapretention)
+            for _offset, _total in sorted(_laps):
+                _merged.lapdetail.append(_total, _offset)
+        return _merged
+
+    def close(self):
+        """
+        Unmap the log
+        """
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _exctype, _exc, _tb):
+        self.close()
+        return False
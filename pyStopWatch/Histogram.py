@@ -0,0 +1,210 @@
+# coding=utf-8
+"""
+Streaming latency histogram with log-linear buckets (in the style of HDR histograms).  Recording is O(1) and the
+memory used is bounded by the value range, not by the number of values recorded.
+"""
+
+import math
+from array import array
+
+NS_PER_SEC = 1000000000
+
+PERCENTILES = (('p50', 50.0), ('p90', 90.0), ('p99', 99.0), ('p999', 99.9))
+
+
+class Histogram(object):
+    """
+    Histogram of integer nanosecond values
+    Values below 2**precision each get their own bucket; above that every power of two range is split into
+    2**(precision-1) linear buckets so the relative error of a reported value is at most 2**-(precision-1).
+    """
+    __slots__ = ('precision', 'counts', 'count', 'min', 'max', 'mean', 'm2')
+
+    def __init__(self, _precision=7):
+        """
+        :param _precision: significant bits kept per value
+        :type _precision: int
+        """
+        if _precision < 2:
+            raise ValueError('Histogram precision must be at least 2 bits')
+        self.precision = _precision
+        self.clear()
+
+    def clear(self):
+        """
+        Forget all recorded values
+        """
+        self.counts = array('Q')
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def bucket(self, _value):
+        """
+        Bucket index for a value
+        :param _value: value in nanoseconds
+        :type _value: int
+        :rtype: int
+        """
+        _shift = _value.bit_length() - self.precision
+        if _shift <= 0:
+            return _value
+        _half = 1 << (self.precision - 1)
+        return _shift * _half + (_value >> _shift)
+
+    def bucketbounds(self, _index):
+        """
+        Lowest value and width of a bucket
+        :param _index: bucket index
+        :type _index: int
+        :return: (lowest value, width) in nanoseconds
+        :rtype: tuple
+        """
+        _half = 1 << (self.precision - 1)
+        if _index < 2 * _half:
+            return _index, 1
+        _shift = _index // _half - 1
+        return (_index - _shift * _half) << _shift, 1 << _shift
+
+    def record(self, _value, _count=1):
+        """
+        Record a value
+        :param _value: value in nanoseconds
+        :type _value: int
+        :param _count: number of times the value was seen
+        :type _count: int
+        """
+        if _value < 0:
+            _value = 0
+        _idx = self.bucket(_value)
+        _counts = self.counts
+        if _idx >= len(_counts):
+            _counts.extend([0] * (_idx + 1 - len(_counts)))
+        _counts[_idx] += _count
+        self.count += _count
+        if self.min is None or _value < self.min:
+            self.min = _value
+        if self.max is None or _value > self.max:
+            self.max = _value
+        _delta = _value - self.mean
+        self.mean += _delta * _count / self.count
+        self.m2 += _delta * (_value - self.mean) * _count
+
+    def getstate(self):
+        """
+        Compact, picklable state of the histogram
+        :return: (precision, counts, count, min, max, mean, m2)
+        :rtype: tuple
+        """
+        return self.precision, self.counts.tobytes(), self.count, self.min, self.max, self.mean, self.m2
+
+    @classmethod
+    def fromstate(cls, _state):
+        """
+        Rebuild a histogram from getstate()
+        :param _state: histogram state
+        :type _state: tuple
+        :rtype: Histogram
+        """
+        _histogram = cls(_state[0])
+        _histogram.counts.frombytes(_state[1])
+        _histogram.count, _histogram.min, _histogram.max, _histogram.mean, _histogram.m2 = _state[2:]
+        return _histogram
+
+    def merge(self, _other):
+        """
+        Add the values recorded by another histogram of the same precision
+        :param _other: histogram to merge in
+        :type _other: Histogram
+        """
+        if _other.precision != self.precision:
+            raise ValueError('Cannot merge histograms of different precision')
+        if not _other.count:
+            return
+        _counts = self.counts
+        if len(_other.counts) > len(_counts):
+            _counts.extend([0] * (len(_other.counts) - len(_counts)))
+        for _idx, _bucketcount in enumerate(_other.counts):
+            if _bucketcount:
+                _counts[_idx] += _bucketcount
+        _count = self.count + _other.count
+        _delta = _other.mean - self.mean
+        self.m2 += _other.m2 + _delta * _delta * self.count * _other.count / _count
+        self.mean += _delta * _other.count / _count
+        self.count = _count
+        if self.min is None or _other.min < self.min:
+            self.min = _other.min
+        if self.max is None or _other.max > self.max:
+            self.max = _other.max
+
+    def stddev(self):
+        """
+        Population standard deviation in nanoseconds
+        :rtype: float
+        """
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / self.count)
+
+    def percentile(self, _percentile):
+        """
+        Value at or below which the given percentage of recorded values fall
+        :param _percentile: percentile between 0 and 100
+        :type _percentile: float
+        :return: value in nanoseconds (midpoint of the containing bucket, clamped to min/max)
+        :rtype: int
+        """
+        if not self.count:
+            return 0
+        _target = max(1, int(math.ceil(self.count * _percentile / 100.0)))
+        _seen = 0
+        for _idx, _bucketcount in enumerate(self.counts):
+            _seen += _bucketcount
+            if _seen >= _target:
+                _low, _width = self.bucketbounds(_idx)
+                return min(max(_low + (_width - 1) // 2, self.min), self.max)
+        return self.max
+
+    def cumulative(self, _bounds):
+        """
+        Number of values at or below each bound, with values placed at the midpoint of their bucket (clamped to
+        min/max)
+        :param _bounds: ascending upper bounds in nanoseconds
+        :type _bounds: list
+        :return: cumulative counts, one per bound
+        :rtype: list
+        """
+        _counts = [0] * len(_bounds)
+        _idx = 0
+        _seen = 0
+        for _bucket, _bucketcount in enumerate(self.counts):
+            if not _bucketcount:
+                continue
+            _low, _width = self.bucketbounds(_bucket)
+            _value = min(max(_low + (_width - 1) // 2, self.min), self.max)
+            while _idx < len(_bounds) and _bounds[_idx] < _value:
+                _counts[_idx] = _seen
+                _idx += 1
+            _seen += _bucketcount
+        while _idx < len(_bounds):
+            _counts[_idx] = _seen
+            _idx += 1
+        return _counts
+
+    def summary(self):
+        """
+        Summary statistics in seconds
+        :rtype: dict
+        """
+        _summary = {
+            'count': self.count,
+            'min': (self.min or 0) / NS_PER_SEC,
+            'max': (self.max or 0) / NS_PER_SEC,
+            'mean': self.mean / NS_PER_SEC,
+            'stddev': self.stddev() / NS_PER_SEC,
+        }
+        for _name, _percentile in PERCENTILES:
+            _summary[_name] = self.percentile(_percentile) / NS_PER_SEC
+        return _summary
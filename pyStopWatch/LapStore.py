@@ -0,0 +1,153 @@
+# coding=utf-8
+"""
+Columnar storage for lap detail.  Lap totals and start offsets, and any extra named columns, are kept in flat arrays
+of doubles rather than one object per lap, optionally bounded to the most recent laps.
+"""
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class LapStore(object):
+    """
+    Stores completed laps as parallel columns of totals and start offsets (in seconds)
+    Retention policy:
+        None - keep every lap
+        0    - keep no laps, only count them
+        N    - keep the last N laps in a ring buffer
+    """
+    __slots__ = ('retention', 'count', 'totals', 'offsets', 'columns', 'extra')
+
+    def __init__(self, _retention=None, _columns=()):
+        """
+        :param _retention: number of laps to keep, None to keep all
+        :type _retention: int | None
+        :param _columns: names of extra per lap values to keep
+        :type _columns: tuple
+        """
+        if _retention is not None and _retention < 0:
+            raise ValueError('Lap retention must be None or a non-negative number of laps')
+        self.retention = _retention
+        self.count = 0
+        self.columns = tuple(_columns)
+        if _retention:
+            self.totals = array('d', [0.0]) * _retention
+            self.offsets = array('d', [0.0]) * _retention
+            self.extra = [array('d', [0.0]) * _retention for _column in self.columns]
+        else:
+            self.totals = array('d')
+            self.offsets = array('d')
+            self.extra = [array('d') for _column in self.columns]
+
+    def append(self, _total, _offset, _extra=()):
+        """
+        Record a completed lap
+        :param _total: lap total in seconds
+        :type _total: float
+        :param _offset: lap start in seconds from the stopwatch epoch
+        :type _offset: float
+        :param _extra: values of the extra columns, in column order; missing values are 0
+        :type _extra: tuple
+        """
+        if len(_extra) < len(self.extra):
+            _extra = tuple(_extra) + (0.0,) * (len(self.extra) - len(_extra))
+        if self.retention is None:
+            self.totals.append(_total)
+            self.offsets.append(_offset)
+            for _column, _value in zip(self.extra, _extra):
+                _column.append(_value)
+        elif self.retention:
+            _idx = self.count % self.retention
+            self.totals[_idx] = _total
+            self.offsets[_idx] = _offset
+            for _column, _value in zip(self.extra, _extra):
+                _column[_idx] = _value
+        self.count += 1
+
+    def __len__(self):
+        if self.retention is None:
+            return self.count
+        return min(self.count, self.retention)
+
+    def firstlap(self):
+        """
+        Lap number (1 based) of the oldest retained lap
+        :rtype: int
+        """
+        return self.count - len(self) + 1
+
+    def isretained(self, _lapnumber):
+        return self.firstlap() <= _lapnumber <= self.count
+
+    def lap(self, _lapnumber):
+        """
+        Get total and start offset for a lap
+        :param _lapnumber: 1 based lap number
+        :type _lapnumber: int
+        :return: (total, offset) in seconds
+        :rtype: tuple
+        """
+        if not self.isretained(_lapnumber):
+            raise IndexError('Lap {0} is not retained'.format(_lapnumber))
+        _idx = _lapnumber - 1
+        if self.retention:
+            _idx %= self.retention
+        return self.totals[_idx], self.offsets[_idx]
+
+    def lapextra(self, _lapnumber):
+        """
+        Get the extra column values of a lap
+        :param _lapnumber: 1 based lap number
+        :type _lapnumber: int
+        :return: column name to value
+        :rtype: dict
+        """
+        if not self.isretained(_lapnumber):
+            raise IndexError('Lap {0} is not retained'.format(_lapnumber))
+        _idx = _lapnumber - 1
+        if self.retention:
+            _idx %= self.retention
+        return dict((_name, _column[_idx]) for _name, _column in zip(self.columns, self.extra))
+
+    def __iter__(self):
+        """
+        Iterate (lapnumber, total, offset) for retained laps, oldest first
+        """
+        for _lapnumber in range(self.firstlap(), self.count + 1):
+            _total, _offset = self.lap(_lapnumber)
+            yield _lapnumber, _total, _offset
+
+    def __column(self, _column):
+        if self.retention and self.count > self.retention:
+            _split = self.count % self.retention
+            _column = _column[_split:] + _column[:_split]
+        else:
+            _column = _column[:len(self)]
+        if numpy is not None:
+            return numpy.frombuffer(_column, dtype=numpy.float64)
+        return _column
+
+    def laptotals(self):
+        """
+        Retained lap totals, oldest first, as a NumPy array when NumPy is available otherwise array('d')
+        """
+        return self.__column(self.totals)
+
+    def lapoffsets(self):
+        """
+        Retained lap start offsets, oldest first, as a NumPy array when NumPy is available otherwise array('d')
+        """
+        return self.__column(self.offsets)
+
+    def column(self, _name):
+        """
+        Retained values of an extra column, oldest first, as a NumPy array when NumPy is available otherwise
+        array('d')
+        :param _name: column name
+        :type _name: str
+        """
+        return self.__column(self.extra[self.columns.index(_name)])
@@ -0,0 +1,194 @@
+# coding=utf-8
+"""
+Memory use of a clock.  A MemoryMeter records for each lap of a clock the net bytes allocated while it ran and the
+peak above the memory in use when the lap started, measured either with tracemalloc (Python allocations, exact peak)
+or as the process resident set size (everything the process maps, peak sampled at pause/stop).  Both are process
+wide, so allocations by other threads during a lap are counted too.
+
+tracemalloc keeps a single peak for the process, reset by every running segment that begins.  So that nested or
+overlapping clocks keep their own peaks, the peak reached so far is folded into every other open segment before it
+is reset.  Before Python 3.9 (no tracemalloc.reset_peak) the tracemalloc peak is sampled at pause/stop as with RSS.
+"""
+
+import os
+import threading
+import tracemalloc
+
+from .StopWatchException import StopWatchException
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+_STATM = '/proc/self/statm'
+_HASSTATM = os.path.exists(_STATM)
+_PAGESIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# [descriptor of /proc/self/statm, pid it was opened by]; reopened after a fork
+_statm = [None, None]
+
+
+def rss():
+    """
+    Resident set size of this process in bytes, from /proc/self/statm where there is one otherwise psutil
+    :rtype: int
+    """
+    if _HASSTATM:
+        _pid = os.getpid()
+        if _statm[1] != _pid:
+            if _statm[0] is not None:
+                os.close(_statm[0])
+            _statm[:] = [os.open(_STATM, os.O_RDONLY), _pid]
+        return int(os.pread(_statm[0], 128, 0).split()[1]) * _PAGESIZE
+    if psutil is None:
+        raise StopWatchException('Resident set size is not available here; install psutil')
+    return psutil.Process().memory_info().rss
+
+
+_resetpeak = getattr(tracemalloc, 'reset_peak', None)
+
+# tracemalloc meters with a running segment -> highest traced memory reached since the segment began, up to the last
+# reset of tracemalloc's peak
+_segments = {}
+_segmentslock = threading.Lock()
+
+
+def _tracedbegin(_meter):
+    if _resetpeak is None:
+        return tracemalloc.get_traced_memory()[0]
+    with _segmentslock:
+        _current, _peak = tracemalloc.get_traced_memory()
+        for _open, _seen in _segments.items():
+            if _peak > _seen:
+                _segments[_open] = _peak
+        _resetpeak()
+        _segments[_meter] = _current
+    return _current
+
+
+def _tracedend(_meter):
+    if _resetpeak is None:
+        _current = tracemalloc.get_traced_memory()[0]
+        return _current, _current
+    with _segmentslock:
+        _current, _peak = tracemalloc.get_traced_memory()
+        _seen = _segments.pop(_meter, _peak)
+    return _current, max(_peak, _seen)
+
+
+def _rssbegin(_meter):
+    return rss()
+
+
+def _rssend(_meter):
+    _current = rss()
+    return _current, _current
+
+
+class MemoryMeter(object):
+    """
+    Net allocated and peak bytes of a clock in total and for its current lap.  Net allocation adds up over laps; the
+    peak is the highest of any lap
+    """
+    __slots__ = ('source', 'allocated', 'peak', 'lapallocated', 'lappeak', '_lapbase', '_mark', '_begin', '_end')
+
+    TRACEMALLOC = 'tracemalloc'
+    RSS = 'rss'
+
+    # names of the lap detail columns, in the order of lap()
+    COLUMNS = ('allocated', 'peak')
+
+    def __init__(self, _source=TRACEMALLOC):
+        """
+        :param _source: TRACEMALLOC (started here if it is not tracing yet) or RSS
+        :type _source: str
+        """
+        if _source == MemoryMeter.TRACEMALLOC:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._begin, self._end = _tracedbegin, _tracedend
+        elif _source == MemoryMeter.RSS:
+            rss()
+            self._begin, self._end = _rssbegin, _rssend
+        else:
+            raise StopWatchException('Unknown memory source, {0}'.format(_source))
+        self.source = _source
+        self.reset()
+
+    def new(self):
+        """
+        Fresh meter measuring the same way
+        :rtype: MemoryMeter
+        """
+        return MemoryMeter(self.source)
+
+    def reset(self):
+        self.allocated = self.peak = 0
+        self.lapallocated = self.lappeak = 0
+        self._lapbase = None
+        self._mark = None
+        with _segmentslock:
+            _segments.pop(self, None)
+
+    def newlap(self):
+        """
+        Start counting a new lap
+        """
+        self.lapallocated = self.lappeak = 0
+        self._lapbase = None
+
+    def begin(self):
+        """
+        Mark the start of a running segment
+        """
+        _current = self._begin(self)
+        if self._lapbase is None:
+            self._lapbase = _current
+        self._mark = _current
+
+    def end(self):
+        """
+        Add the memory allocated since begin to the totals and the current lap
+        """
+        _current, _peak = self._end(self)
+        if self._mark is None:
+            return
+        _allocated = _current - self._mark
+        self._mark = None
+        self.allocated += _allocated
+        self.lapallocated += _allocated
+        self.lappeak = max(self.lappeak, _peak - self._lapbase)
+        self.peak = max(self.peak, self.lappeak)
+
+    def lap(self, _nspersec):
+        """
+        Current lap's net allocated and peak bytes
+        :param _nspersec: unused, see CpuMeter.lap
+        :rtype: tuple
+        """
+        return float(self.lapallocated), float(self.lappeak)
+
+    def todict(self, _nspersec):
+        """
+        Net allocated and peak bytes over all laps
+        :param _nspersec: unused, see CpuMeter.todict
+        :rtype: dict
+        """
+        return {'allocated': self.allocated, 'peak': self.peak}
+
+    def describe(self, _nspersec):
+        """
+        Totals for a text summary
+        :rtype: str
+        """
+        return 'allocated {0} bytes, peak {1} bytes'.format(self.allocated, self.peak)
+
+    def merge(self, _other):
+        """
+        Add another meter's net allocation to this one and keep the higher peak
+        :type _other: MemoryMeter
+        """
+        self.allocated += _other.allocated
+        self.peak = max(self.peak, _other.peak)
@@ -0,0 +1,150 @@
+# coding=utf-8
+"""
+OpenMetrics (Prometheus) exposition of stopwatch clocks.  MetricsExporter renders each clock's total seconds, lap
+count, running and paused state and, when a histogram is kept, lap latency buckets, and can serve them from a
+background HTTP server thread.  Rendering only reads clock state, so scrapes never hold up start/stop.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .StopWatch import NS_PER_SEC
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# upper bounds in seconds of the lap latency buckets
+BUCKETS = (0.000001, 0.00001, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(_value):
+    return str(_value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(_pairs):
+    return '{' + ','.join('{0}="{1}"'.format(_name, _escape(_value)) for _name, _value in _pairs) + '}'
+
+
+class MetricsExporter(object):
+    """
+    Publishes the clocks of one or more stopwatches in OpenMetrics text format:
+
+        exporter = MetricsExporter(sw, _port=9102)
+        exporter.start()        # scrape http://127.0.0.1:9102/metrics
+        ...
+        exporter.stop()
+
+    Each clock is labelled with the stopwatch title, clock name, clock title and display flag
+    """
+
+    def __init__(self, _stopwatches, _host='127.0.0.1', _port=0, _prefix='stopwatch', _buckets=BUCKETS, _tag=None,
+                 _clockprefix=None):
+        """
+        :param _stopwatches: stopwatch or list of stopwatches to publish
+        :param _host: interface to listen on
+        :type _host: str
+        :param _port: port to listen on; 0 picks a free port (see port)
+        :type _port: int
+        :param _prefix: metric name prefix
+        :type _prefix: str
+        :param _buckets: ascending upper bounds in seconds of the lap latency buckets
+        :param _tag: only publish clocks with this tag (see StopWatch.tagclock)
+        :param _clockprefix: only publish clocks whose name starts with this prefix
+        :type _clockprefix: str
+        """
+        self.stopwatches = list(_stopwatches) if isinstance(_stopwatches, (list, tuple)) else [_stopwatches]
+        self.host = _host
+        self.port = _port
+        self.prefix = _prefix
+        self.buckets = tuple(_buckets)
+        self.tag = _tag
+        self.clockprefix = _clockprefix
+        self._server = None
+        self._thread = None
+
+    def render(self):
+        """
+        Current state of all clocks in OpenMetrics text format
+        :rtype: str
+        """
+        _totals, _laps, _running, _paused, _histograms = [], [], [], [], []
+        _bounds = [int(_bound * NS_PER_SEC) for _bound in self.buckets]
+        for _sw in self.stopwatches:
+            _now = _sw._now()
+            for _clockname, _clock in _sw._readselected(self.tag, self.clockprefix):
+                _labelpairs = (('stopwatch', _sw.title), ('clock', _clockname), ('title', _clock.title),
+                               ('display', 'true' if _clock.display else 'false'))
+                _clocklabels = _labels(_labelpairs)
+                _totals.append('{0} {1!r}'.format(_clocklabels, _sw._totalns(_clockname, _now) / NS_PER_SEC))
+                _laps.append('{0} {1}'.format(_clocklabels, _clock.currentlap))
+                _running.append('{0} {1}'.format(_clocklabels, int(_clock.isstarted() and not _clock.paused)))
+                _paused.append('{0} {1}'.format(_clocklabels, int(bool(_clock.paused))))
+                if _clock.histogram is not None:
+                    _histogram = _clock.histogram
+                    for _bound, _count in zip(self.buckets, _histogram.cumulative(_bounds)):
+                        _histograms.append('_bucket{0} {1}'.format(_labels(_labelpairs + (('le', repr(_bound)),)),
+                                                                   _count))
+                    _histograms.append('_bucket{0} {1}'.format(_labels(_labelpairs + (('le', '+Inf'),)),
+                                                               _histogram.count))
+                    _histograms.append('_count{0} {1}'.format(_clocklabels, _histogram.count))
+                    _histograms.append('_sum{0} {1!r}'.format(_clocklabels,
+                                                              _histogram.mean * _histogram.count / NS_PER_SEC))
+        _lines = []
+        for _name, _type, _help, _suffix, _samples in (
+                ('clock_seconds', 'counter', 'Time timed by the clock, including the lap in progress', '_total',
+                 _totals),
+                ('clock_laps', 'counter', 'Laps started on the clock', '_total', _laps),
+                ('clock_running', 'gauge', '1 while the clock is running', '', _running),
+                ('clock_paused', 'gauge', '1 while the clock is paused', '', _paused),
+                ('clock_lap_seconds', 'histogram', 'Lap latency', '', _histograms)):
+            if not _samples:
+                continue
+            _family = '{0}_{1}'.format(self.prefix, _name)
+            _lines.append('# TYPE {0} {1}'.format(_family, _type))
+            if _name.endswith('seconds'):
+                _lines.append('# UNIT {0} seconds'.format(_family))
+            _lines.append('# HELP {0} {1}'.format(_family, _help))
+            _lines.extend('{0}{1}{2}'.format(_family, _suffix, _sample) for _sample in _samples)
+        _lines.append('# EOF\n')
+        return '\n'.join(_lines)
+
+    def start(self):
+        """
+        Serve the metrics at /metrics from a daemon thread
+        """
+        if self._server is not None:
+            return
+        _exporter = self
+
+        class _Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                _body = _exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(_body)))
+                self.end_headers()
+                self.wfile.write(_body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='pyStopWatch-metrics', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Shut the HTTP server down
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = self._thread = None
@@ -0,0 +1,168 @@
+# coding=utf-8
+"""
+Background reporting.  A Reporter takes compact timing records (title, nanoseconds, laps) from the timed code
+through a bounded queue and formats and emits them from a daemon thread, so a slow log handler no longer adds to
+the latency of the code being timed.  The queue is flushed every interval seconds, as soon as it holds flushsize
+records, on flush() and at interpreter exit.
+"""
+
+import atexit
+import collections
+import threading
+
+from .StopWatch import NS_PER_SEC, humanreadabletime
+from .StopWatchException import StopWatchException
+
+# what submit does when the queue is full
+DROP = 'drop'
+BLOCK = 'block'
+
+
+def formatrecord(_title, _totalns, _laps=None):
+    """
+    Default record format, the same as StopWatch.get_clock_summary
+    :param _title: clock title
+    :param _totalns: nanoseconds timed
+    :param _laps: lap count; None leaves it out
+    :rtype: str
+    """
+    _msg = '{0}: Duration: {1}'.format(_title, humanreadabletime(_totalns / NS_PER_SEC))
+    if _laps is not None:
+        _msg = '{0} in {1} lap(s)'.format(_msg, _laps)
+    return _msg
+
+
+class Reporter(object):
+    """
+    Emits timing records from a background thread:
+
+        reporter = Reporter(logging.getLogger('timing'), 'info')
+
+        @timeit(reporter=reporter)
+        def handle(request):
+            ...
+
+        sw.report(reporter, 'db')
+
+    Records are only appended to a deque on the calling thread; formatting and logging happen on the reporter's
+    thread.  Call close() to stop the thread early; it is otherwise flushed and stopped at exit
+    """
+
+    def __init__(self, _logger=None, _level='debug', _interval=1.0, _flushsize=100, _maxsize=10000, _policy=DROP,
+                 _formatter=formatrecord):
+        """
+        :param _logger: logging module instance; None prints to stdout
+        :param _level: logging level method name
+        :type _level: str
+        :param _interval: seconds between flushes
+        :type _interval: float
+        :param _flushsize: records queued that trigger a flush before the interval is up
+        :type _flushsize: int
+        :param _maxsize: most records queued; see _policy
+        :type _maxsize: int
+        :param _policy: DROP discards records submitted while the queue is full (counted in dropped), BLOCK makes the
+                        submitting thread wait for the reporter to catch up
+        :type _policy: str
+        :param _formatter: callable turning (title, nanoseconds, laps) into the message to emit
+        """
+        if _policy not in (DROP, BLOCK):
+            raise StopWatchException('Unknown queue full policy, {0}'.format(_policy))
+        self.logger = _logger
+        self.level = _level
+        self.interval = _interval
+        self.flushsize = _flushsize
+        self.maxsize = _maxsize
+        self.policy = _policy
+        self.formatter = _formatter
+        self.dropped = 0
+        self.errors = 0
+        self.closed = False
+        self._queue = collections.deque()
+        self._wake = threading.Event()
+        self._space = threading.Condition()
+        self._flushlock = threading.Lock()
+        self._droplock = threading.Lock()
+        self._thread = threading.Thread(target=self.__run, name='pyStopWatch-reporter', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, _title, _totalns, _laps=None):
+        """
+        Queue a record for reporting
+        :param _title: clock title
+        :type _title: str
+        :param _totalns: nanoseconds timed
+        :type _totalns: int
+        :param _laps: lap count; None leaves it out of the message
+        :type _laps: int
+        :return: False if the record was dropped
+        :rtype: bool
+        """
+        _queue = self._queue
+        if (len(_queue) >= self.maxsize or self.closed) and not self.__waitforspace():
+            return False
+        _queue.append((_title, _totalns, _laps))
+        if len(_queue) >= self.flushsize and not self._wake.is_set():
+            self._wake.set()
+        return True
+
+    def __waitforspace(self):
+        if self.policy == BLOCK and not self.closed:
+            with self._space:
+                while len(self._queue) >= self.maxsize and not self.closed:
+                    self._wake.set()
+                    self._space.wait(self.interval)
+            if not self.closed:
+                return True
+        with self._droplock:
+            self.dropped += 1
+        return False
+
+    def __emit(self, _msg):
+        if self.logger:
+            getattr(self.logger, self.level.lower())(_msg)
+        else:
+            print(_msg)
+
+    def flush(self):
+        """
+        Format and emit every queued record now, on the calling thread
+        """
+        with self._flushlock:
+            _queue = self._queue
+            while _queue:
+                _record = _queue.popleft()
+                try:
+                    self.__emit(self.formatter(*_record))
+                except Exception:
+                    self.errors += 1
+            with self._space:
+                self._space.notify_all()
+
+    def __run(self):
+        while not self.closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """
+        Stop the reporting thread and emit what is still queued.  Records submitted afterwards are dropped
+        """
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        self._wake.set()
+        with self._space:
+            self._space.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _exctype, _exc, _tb):
+        self.close()
+        return False
@@ -0,0 +1,115 @@
+# coding=utf-8
+"""
+Call sampling for clocks and timeit.  Only a fraction of calls are timed; the rest cost a countdown decrement.
+Totals are scaled up from the sampled laps.
+
+Estimates: with N calls of which n were timed, lap mean m and lap standard deviation s,
+
+    estimated total = m * N
+    error           = 1.96 * N * s / sqrt(n) * sqrt(1 - n / N)
+
+error is the half width of an approximate 95% confidence interval for the total (normal approximation with finite
+population correction); it is 0 when every call was timed.
+"""
+
+import math
+import random
+
+NS_PER_SEC = 1000000000
+
+Z95 = 1.96
+
+
+class Sampler(object):
+    """
+    Decides which calls are timed and keeps the statistics needed to scale sampled laps up to all calls
+        rate N (int)      - time every Nth call
+        rate p (float)    - time each call with probability p
+        budget b (float)  - adapt p so the timing overhead stays near fraction b of the time measured
+    """
+    __slots__ = ('rate', 'budget', 'cost', 'probability', 'calls', 'countdown', 'samples', 'sum', 'sumsq')
+
+    def __init__(self, _rate=1, _budget=None, _cost=None):
+        """
+        :param _rate: time every Nth call (int) or each call with probability p (float)
+        :type _rate: int | float
+        :param _budget: target timing overhead as a fraction of timed work; overrides _rate
+        :type _budget: float
+        :param _cost: nanoseconds of overhead per timed call, needed with _budget
+        :type _cost: int
+        """
+        if isinstance(_rate, float):
+            if not 0.0 < _rate <= 1.0:
+                raise ValueError('Sample probability must be in (0, 1]')
+        elif _rate < 1:
+            raise ValueError('Sample rate must be at least 1')
+        if _budget is not None and (_budget <= 0 or not _cost):
+            raise ValueError('An overhead budget needs a positive budget and the cost of a timed call')
+        self.rate = _rate
+        self.budget = _budget
+        self.cost = _cost
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all calls and samples, keeping the configuration
+        """
+        self.probability = 1.0 if self.budget is not None else (self.rate if isinstance(self.rate, float) else None)
+        self.calls = 0
+        self.countdown = 1
+        self.samples = 0
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+    def skip(self):
+        """
+        Count a call and decide whether to skip timing it
+        :return: True when the call is not timed
+        :rtype: bool
+        """
+        self.calls += 1
+        self.countdown -= 1
+        if self.countdown:
+            return True
+        if self.probability is None:
+            self.countdown = self.rate
+        elif self.probability >= 1.0:
+            self.countdown = 1
+        else:
+            # calls until the next sample are geometrically distributed
+            self.countdown = 1 + int(math.log(1.0 - random.random()) / math.log(1.0 - self.probability))
+        return False
+
+    def observe(self, _lapns):
+        """
+        Record the length of a timed lap
+        :param _lapns: lap total in nanoseconds
+        """
+        self.samples += 1
+        self.sum += _lapns
+        self.sumsq += _lapns * _lapns
+        if self.budget is not None:
+            _mean = self.sum / self.samples
+            self.probability = min(1.0, max(1e-6, self.budget * _mean / self.cost))
+
+    def estimate(self):
+        """
+        Estimated totals over all calls, in seconds
+        :return: calls, sampled laps, estimated total and its 95% error bound
+        :rtype: dict
+        """
+        _estimate = {
+            'calls': self.calls,
+            'sampled': self.samples,
+            'estimated_laps': self.calls,
+            'estimated_total': 0.0,
+            'error': 0.0
+        }
+        if self.samples:
+            _mean = self.sum / self.samples
+            _estimate['estimated_total'] = _mean * self.calls / NS_PER_SEC
+            if self.samples > 1 and self.calls > self.samples:
+                _var = max(0.0, (self.sumsq - self.samples * _mean * _mean) / (self.samples - 1))
+                _fpc = math.sqrt(1.0 - float(self.samples) / self.calls)
+                _estimate['error'] = Z95 * self.calls * math.sqrt(_var / self.samples) * _fpc / NS_PER_SEC
+        return _estimate
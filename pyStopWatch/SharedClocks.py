@@ -0,0 +1,228 @@
+# coding=utf-8
+"""
+Clock totals shared between processes through multiprocessing.shared_memory.  Every worker owns a fixed row of
+int64 counters (total nanoseconds and laps per clock) and overwrites it in place as laps complete, so no IPC happens
+per lap.  The parent sums the rows into a snapshot that StopWatch.merge() accepts.  A worker that exits releases
+its row: the row's counters are added to a row kept for retired workers and the row can be claimed again, so pools
+that replace their workers keep every lap.  Needs Python 3.8 or later.
+
+Layout: one claimed flag per worker row, then the worker rows, then the retired row.
+"""
+
+import multiprocessing
+import multiprocessing.util
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+from .StopWatch import StopWatch, SNAPSHOT_VERSION
+from .StopWatchException import StopWatchException
+
+# int64 counters per clock: total nanoseconds, laps
+_FIELDS = 2
+
+
+class SharedClocks(object):
+    """
+    Fixed layout counters for a set of clocks, one row per worker process
+    Create it in the parent and hand it to workers when they are started (Process args or a pool initializer):
+
+        shared = SharedClocks({'parse': 'Parse', 'db': 'Database'}, _workers=8)
+        with ProcessPoolExecutor(8, initializer=init, initargs=(shared,)) as pool:
+            ...
+        # in init: global sw; sw = shared.stopwatch()     (the row is released when the worker exits)
+        parent.merge(shared.snapshot())
+        shared.unlink()
+    """
+
+    def __init__(self, _clocks, _workers, _title='Shared StopWatch'):
+        """
+        :param _clocks: clock names, or a dict of clock name to title
+        :type _clocks: list | dict
+        :param _workers: number of worker rows to allocate
+        :type _workers: int
+        """
+        if shared_memory is None:
+            raise StopWatchException('SharedClocks needs multiprocessing.shared_memory, available from Python 3.8')
+        if not isinstance(_clocks, dict):
+            _clocks = dict((_clockname, _clockname) for _clockname in _clocks)
+        self.title = _title
+        self.clocks = list(_clocks.items())
+        self.workers = _workers
+        self._lock = multiprocessing.Lock()
+        _size = (_workers + (_workers + 1) * len(self.clocks) * _FIELDS) * 8
+        self._shm = shared_memory.SharedMemory(create=True, size=_size)
+        self._counters = self._shm.buf.cast('q')
+        for _idx in range(len(self._counters)):
+            self._counters[_idx] = 0
+
+    def __getstate__(self):
+        return self.title, self.clocks, self.workers, self._lock, self._shm.name
+
+    def __setstate__(self, _state):
+        self.title, self.clocks, self.workers, self._lock, _name = _state
+        self._shm = shared_memory.SharedMemory(name=_name)
+        self._counters = self._shm.buf.cast('q')
+
+    def rowoffset(self, _row):
+        """
+        Index of the first counter of a worker row; row workers is the retired row
+        :rtype: int
+        """
+        return self.workers + _row * len(self.clocks) * _FIELDS
+
+    def claim(self):
+        """
+        Claim an unused worker row
+        :return: row number
+        :rtype: int
+        """
+        with self._lock:
+            for _row in range(self.workers):
+                if not self._counters[_row]:
+                    self._counters[_row] = 1
+                    return _row
+        raise StopWatchException('All {0} shared clock rows are in use'.format(self.workers))
+
+    def release(self, _row):
+        """
+        Give a worker row back: its counters move to the retired row and the row can be claimed again
+        :param _row: row number
+        :type _row: int
+        """
+        if self._counters is None:
+            # already detached, e.g. unlinked before a stopwatch in this process exits
+            return
+        _offset = self.rowoffset(_row)
+        _retired = self.rowoffset(self.workers)
+        with self._lock:
+            for _idx in range(len(self.clocks) * _FIELDS):
+                self._counters[_retired + _idx] += self._counters[_offset + _idx]
+                self._counters[_offset + _idx] = 0
+            self._counters[_row] = 0
+
+    def stopwatch(self, _row=None, **kwargs):
+        """
+        StopWatch for a worker process whose clocks publish into a row of the shared counters.  A claimed row is
+        released when the stopwatch is closed or the process exits
+        :param _row: row to write, claimed automatically when None
+        :type _row: int
+        :param kwargs: passed on to StopWatch
+        :rtype: SharedStopWatch
+        """
+        if _row is not None:
+            return SharedStopWatch(self, _row, **kwargs)
+        return SharedStopWatch(self, self.claim(), _claimed=True, **kwargs)
+
+    def snapshot(self):
+        """
+        Sum of all worker rows as a snapshot for StopWatch.merge()
+        :rtype: dict
+        """
+        _clocks = []
+        for _idx, (_clockname, _title) in enumerate(self.clocks):
+            _total = _laps = 0
+            for _row in range(self.workers + 1):
+                _offset = self.rowoffset(_row) + _idx * _FIELDS
+                _total += self._counters[_offset]
+                _laps += self._counters[_offset + 1]
+            _clocks.append((_clockname, _title, True, _total, _laps, _laps, None, None, None))
+        return {
+            'version': SNAPSHOT_VERSION,
+            'title': self.title,
+            'clocks': _clocks
+        }
+
+    def close(self):
+        """
+        Detach from the shared memory in this process
+        """
+        if self._counters is None:
+            return
+        self._counters.release()
+        self._counters = None
+        self._shm.close()
+
+    def unlink(self):
+        """
+        Detach and free the shared memory; call once from the parent after the workers are done
+        """
+        self.close()
+        self._shm.unlink()
+
+
+class SharedStopWatch(StopWatch):
+    """
+    StopWatch whose shared clocks copy their total and lap count into a row of SharedClocks each time a lap ends
+    """
+
+    def __init__(self, _shared, _row, _claimed=False, **kwargs):
+        super(SharedStopWatch, self).__init__(**kwargs)
+        self._shared = _shared
+        self._row = _row
+        self._claimed = _claimed
+        self._counterindex = {}
+        if _claimed:
+            # runs at exit of multiprocessing workers, which skip atexit
+            self._finalizer = multiprocessing.util.Finalize(self, self.close, exitpriority=10)
+        for _clockname, _title in _shared.clocks:
+            if _clockname not in self._clocks:
+                self.addclock(_clockname, _title)
+            else:
+                self.__register(_clockname)
+
+    def __register(self, _clockname):
+        for _idx, (_sharedname, _title) in enumerate(self._shared.clocks):
+            if _sharedname == _clockname:
+                self._counterindex[id(self._clocks[_clockname])] = \
+                    self._shared.rowoffset(self._row) + _idx * _FIELDS
+                return
+
+    def addclock(self, _clockname, _clocktitle, _display=True, _histogram=None, _sample=None, _overheadbudget=None,
+                 _tags=None, _cputime=None, _memory=None):
+        _old = self._clocks.get(_clockname)
+        if _old is not None:
+            self._counterindex.pop(id(_old), None)
+        super(SharedStopWatch, self).addclock(_clockname, _clocktitle, _display, _histogram, _sample,
+                                              _overheadbudget, _tags, _cputime, _memory)
+        self.__register(_clockname)
+
+    def removeclock(self, _clockname):
+        _old = self._clocks.get(_clockname)
+        super(SharedStopWatch, self).removeclock(_clockname)
+        self._counterindex.pop(id(_old), None)
+
+    def __publish(self, _clock):
+        _idx = self._counterindex.get(id(_clock))
+        if _idx is not None:
+            _counters = self._shared._counters
+            _counters[_idx] = _clock.total
+            _counters[_idx + 1] = _clock.laps
+
+    def close(self):
+        """
+        Stop publishing and release the row if this stopwatch claimed it; done automatically at process exit
+        """
+        self._counterindex = {}
+        if self._claimed:
+            self._claimed = False
+            self._shared.release(self._row)
+
+    def reset(self, _clockname=None):
+        super(SharedStopWatch, self).reset(_clockname)
+        self.__publish(self._clocks[_clockname or self._defaultname])
+
+    def resetall(self):
+        super(SharedStopWatch, self).resetall()
+        for _clock in self._clocks.values():
+            self.__publish(_clock)
+
+    def _stopclock(self, _clock, _end=None):
+        super(SharedStopWatch, self)._stopclock(_clock, _end)
+        self.__publish(_clock)
+
+    def _recordlap(self, _clock, _begin, _end):
+        super(SharedStopWatch, self)._recordlap(_clock, _begin, _end)
+        self.__publish(_clock)
@@ -0,0 +1,359 @@
+# coding=utf-8
+"""
+Snapshot files and run to run comparison.  save() writes a StopWatch snapshot (see StopWatch.snapshot) to a versioned
+file, either JSON or a compact binary form, and load() reads either back.  diff() lines the clocks of two snapshots up
+by name and reports the change in total, laps, mean lap and lap percentiles, flagging regressions above a threshold;
+it backs python -m pyStopWatch diff.
+
+JSON form:
+
+    {"format": "pyStopWatch-snapshot", "version": 1, "title": ..., "clocks": [
+        {"name", "title", "display", "total_ns", "laps", "currentlap", "tasktime": [running, suspended] | null,
+         "histogram": {"precision", "counts": [[bucket, count], ...], "count", "min", "max", "mean", "m2"} | null,
+         "lapdetail": {"totals": [...], "offsets": [...]} | null}, ...]}
+
+Binary form: magic 'PYSWSNP\\0', version and header length (uint32 little endian), the JSON form as the header with
+histogram counts and lap detail columns replaced by [offset, length] references, then the referenced arrays (uint64
+bucket, count pairs and float64 lap columns, little endian).
+"""
+
+import argparse
+import json
+import math
+import struct
+import sys
+from array import array
+
+from .StopWatch import StopWatch, SNAPSHOT_VERSION, NS_PER_SEC
+from .StopWatchException import StopWatchException
+from .Histogram import Histogram, PERCENTILES
+
+FORMAT = 'pyStopWatch-snapshot'
+VERSION = 1
+MAGIC = b'PYSWSNP\x00'
+
+_HEADER = struct.Struct('<8sII')
+
+# metrics compared by diff, in report order
+METRICS = ('total', 'laps', 'mean') + tuple(_name for _name, _percentile in PERCENTILES)
+
+
+def _arrayof(_typecode, _bytes):
+    _array = array(_typecode)
+    _array.frombytes(_bytes)
+    return _array
+
+
+def _tolittle(_array):
+    if sys.byteorder == 'big':
+        _array = array(_array.typecode, _array)
+        _array.byteswap()
+    return _array.tobytes()
+
+
+def _fromlittle(_typecode, _bytes):
+    _array = _arrayof(_typecode, _bytes)
+    if sys.byteorder == 'big':
+        _array.byteswap()
+    return _array
+
+
+def _put(_blobs, _typecode, _bytes):
+    """
+    Inline array values (JSON form) or a reference to them in _blobs (binary form)
+    """
+    if _blobs is None:
+        return list(_arrayof(_typecode, _bytes))
+    _offset = len(_blobs)
+    _blobs.extend(_tolittle(_arrayof(_typecode, _bytes)))
+    return [_offset, len(_blobs) - _offset]
+
+
+def _get(_blobs, _typecode, _value):
+    """
+    Native byte order array bytes from inline values or a reference into _blobs
+    """
+    if _blobs is None:
+        return array(_typecode, _value).tobytes()
+    _offset, _length = _value
+    return _fromlittle(_typecode, bytes(_blobs[_offset:_offset + _length])).tobytes()
+
+
+def todocument(_snapshot, _blobs=None):
+    """
+    File form of a snapshot
+    :param _snapshot: snapshot from StopWatch.snapshot
+    :param _blobs: bytearray to place arrays in (binary form); None puts them inline
+    :rtype: dict
+    """
+    if _snapshot.get('version') != SNAPSHOT_VERSION:
+        raise StopWatchException('Unsupported snapshot version, {0}'.format(_snapshot.get('version')))
+    _clocks = []
+    for _clockname, _title, _display, _total, _laps, _currentlap, _histogram, _lapdetail, _tasktime \
+            in _snapshot['clocks']:
+        _clock = {
+            'name': _clockname,
+            'title': _title,
+            'display': _display,
+            'total_ns': _total,
+            'laps': _laps,
+            'currentlap': _currentlap,
+            'tasktime': list(_tasktime) if _tasktime is not None else None,
+            'histogram': None,
+            'lapdetail': None
+        }
+        if _histogram is not None:
+            _precision, _counts, _count, _min, _max, _mean, _m2 = _histogram
+            _buckets = [(_idx, _bucketcount) for _idx, _bucketcount in enumerate(_arrayof('Q', _counts))
+                        if _bucketcount]
+            if _blobs is None:
+                _counts = [list(_bucket) for _bucket in _buckets]
+            else:
+                _pairs = array('Q', [_value for _bucket in _buckets for _value in _bucket])
+                _counts = _put(_blobs, 'Q', _pairs.tobytes())
+            _clock['histogram'] = {
+                'precision': _precision,
+                'counts': _counts,
+                'count': _count,
+                'min': _min,
+                'max': _max,
+                'mean': _mean,
+                'm2': _m2
+            }
+        if _lapdetail is not None:
+            _clock['lapdetail'] = {'totals': _put(_blobs, 'd', _lapdetail[0]),
+                                   'offsets': _put(_blobs, 'd', _lapdetail[1])}
+        _clocks.append(_clock)
+    return {'format': FORMAT, 'version': VERSION, 'title': _snapshot['title'], 'clocks': _clocks}
+
+
+def fromdocument(_document, _blobs=None):
+    """
+    Snapshot (as from StopWatch.snapshot) of a file form document
+    :param _document: document from todocument
+    :param _blobs: arrays referenced by a binary form document
+    :rtype: dict
+    """
+    if _document.get('format') != FORMAT:
+        raise StopWatchException('Not a pyStopWatch snapshot')
+    if _document.get('version') != VERSION:
+        raise StopWatchException('Unsupported snapshot file version, {0}'.format(_document.get('version')))
+    _clocks = []
+    for _clock in _document['clocks']:
+        _histogram = _clock['histogram']
+        if _histogram is not None:
+            _buckets = _histogram['counts']
+            if _blobs is not None:
+                _pairs = _arrayof('Q', _get(_blobs, 'Q', _buckets))
+                _buckets = zip(_pairs[::2], _pairs[1::2])
+            _counts = array('Q')
+            for _idx, _bucketcount in _buckets:
+                if _idx >= len(_counts):
+                    _counts.extend([0] * (_idx + 1 - len(_counts)))
+                _counts[_idx] = _bucketcount
+            _counts = _counts.tobytes()
+            _histogram = (_histogram['precision'], _counts, _histogram['count'], _histogram['min'],
+                          _histogram['max'], _histogram['mean'], _histogram['m2'])
+        _lapdetail = _clock['lapdetail']
+        if _lapdetail is not None:
+            _lapdetail = (_get(_blobs, 'd', _lapdetail['totals']), _get(_blobs, 'd', _lapdetail['offsets']))
+        _clocks.append((_clock['name'], _clock['title'], _clock['display'], _clock['total_ns'], _clock['laps'],
+                        _clock['currentlap'], _histogram, _lapdetail,
+                        tuple(_clock['tasktime']) if _clock['tasktime'] is not None else None))
+    return {'version': SNAPSHOT_VERSION, 'title': _document['title'], 'clocks': _clocks}
+
+
+def _snapshotof(_source):
+    return _source.snapshot() if isinstance(_source, StopWatch) else _source
+
+
+def save(_source, _path, _binary=None):
+    """
+    Write a snapshot to a file
+    :param _source: StopWatch or snapshot from StopWatch.snapshot
+    :param _path: file to write
+    :type _path: str
+    :param _binary: write the binary form; None picks JSON for paths ending in .json and binary otherwise
+    :type _binary: bool | None
+    """
+    if _binary is None:
+        _binary = not str(_path).lower().endswith('.json')
+    _snapshot = _snapshotof(_source)
+    if _binary:
+        _blobs = bytearray()
+        _header = json.dumps(todocument(_snapshot, _blobs), separators=(',', ':')).encode('utf-8')
+        with open(_path, 'wb') as _file:
+            _file.write(_HEADER.pack(MAGIC, VERSION, len(_header)))
+            _file.write(_header)
+            _file.write(_blobs)
+    else:
+        with open(_path, 'w') as _file:
+            json.dump(todocument(_snapshot), _file)
+
+
+def load(_path):
+    """
+    Read a snapshot written by save, in either form
+    :param _path: file to read
+    :type _path: str
+    :return: snapshot, as from StopWatch.snapshot (merge it into a StopWatch to query it)
+    :rtype: dict
+    """
+    with open(_path, 'rb') as _file:
+        _data = _file.read()
+    if _data[:len(MAGIC)] == MAGIC:
+        _magic, _version, _length = _HEADER.unpack_from(_data)
+        if _version != VERSION:
+            raise StopWatchException('Unsupported snapshot file version, {0}'.format(_version))
+        _start = _HEADER.size + _length
+        return fromdocument(json.loads(_data[_HEADER.size:_start].decode('utf-8')), memoryview(_data)[_start:])
+    try:
+        return fromdocument(json.loads(_data.decode('utf-8')))
+    except ValueError:
+        raise StopWatchException('{0} is not a pyStopWatch snapshot'.format(_path))
+
+
+def stopwatch(_snapshot):
+    """
+    New StopWatch holding the clocks of a snapshot
+    :rtype: StopWatch
+    """
+    _sw = StopWatch(_snapshot['title'], _recordlapdetail=True)
+    _sw.merge(_snapshot)
+    return _sw
+
+
+def _percentile(_sorted, _percentile):
+    if not _sorted:
+        return 0.0
+    return _sorted[min(len(_sorted), max(1, int(math.ceil(len(_sorted) * _percentile / 100.0)))) - 1]
+
+
+def metrics(_row):
+    """
+    Comparable metrics of a snapshot clock, times in seconds: total, laps, mean lap and, from the histogram or else
+    the lap detail, lap percentiles
+    :param _row: clock of a snapshot
+    :rtype: dict
+    """
+    _clockname, _title, _display, _total, _laps, _currentlap, _histogram, _lapdetail, _tasktime = _row
+    _metrics = {
+        'total': _total / NS_PER_SEC,
+        'laps': _currentlap,
+        'mean': _total / NS_PER_SEC / _currentlap if _currentlap else 0.0
+    }
+    if _histogram is not None:
+        _histogram = Histogram.fromstate(_histogram)
+        for _name, _value in PERCENTILES:
+            _metrics[_name] = _histogram.percentile(_value) / NS_PER_SEC
+    elif _lapdetail is not None:
+        _totals = sorted(_arrayof('d', _lapdetail[0]))
+        if _totals:
+            for _name, _value in PERCENTILES:
+                _metrics[_name] = _percentile(_totals, _value)
+    return _metrics
+
+
+def diff(_base, _new, _threshold=0.1, _metric='mean'):
+    """
+    Compare the clocks of two snapshots by name
+    :param _base: baseline snapshot
+    :param _new: snapshot to check against the baseline
+    :param _threshold: relative increase of _metric above which a clock counts as regressed (0.1 is 10%)
+    :type _threshold: float
+    :param _metric: metric checked for regressions, one of METRICS
+    :type _metric: str
+    :return: one dict per clock with name, title, status ('changed', 'added' or 'removed'), regression flag and
+             for each metric both have, base, new, change and relative change (None when the base is 0)
+    :rtype: list
+    """
+    if _metric not in METRICS:
+        raise StopWatchException('Unknown metric, {0}'.format(_metric))
+    _base, _new = _snapshotof(_base), _snapshotof(_new)
+    _baserows = dict((_row[0], _row) for _row in _base['clocks'])
+    _newrows = dict((_row[0], _row) for _row in _new['clocks'])
+    _names = list(_baserows) + [_clockname for _clockname in _newrows if _clockname not in _baserows]
+    _rows = []
+    for _clockname in _names:
+        _baserow, _newrow = _baserows.get(_clockname), _newrows.get(_clockname)
+        _row = {'name': _clockname, 'title': (_newrow or _baserow)[1], 'regression': False, 'metrics': {}}
+        if _baserow is None or _newrow is None:
+            _row['status'] = 'added' if _baserow is None else 'removed'
+            _rows.append(_row)
+            continue
+        _row['status'] = 'changed'
+        _basemetrics, _newmetrics = metrics(_baserow), metrics(_newrow)
+        for _name in METRICS:
+            if _name in _basemetrics and _name in _newmetrics:
+                _was, _now = _basemetrics[_name], _newmetrics[_name]
+                _row['metrics'][_name] = {
+                    'base': _was,
+                    'new': _now,
+                    'change': _now - _was,
+                    'relative': (_now - _was) / _was if _was else None
+                }
+        _checked = _row['metrics'].get(_metric)
+        if _checked is not None:
+            _relative = _checked['relative']
+            _row['regression'] = (_relative > _threshold) if _relative is not None else _checked['new'] > 0
+        _rows.append(_row)
+    return _rows
+
+
+def formatdiff(_rows, _metric='mean'):
+    """
+    Lines of a text report of diff(); clocks unused in both runs are left out
+    :rtype: list of str
+    """
+    _lines = []
+    for _row in _rows:
+        _laps = _row['metrics'].get('laps')
+        if _laps is not None and not _laps['base'] and not _laps['new']:
+            continue
+        if _row['status'] != 'changed':
+            _lines.append('{0}: {1}'.format(_row['name'], _row['status']))
+            continue
+        _lines.append('{0}:{1}'.format(_row['name'], ' REGRESSION ({0})'.format(_metric) if _row['regression'] else ''))
+        for _name in METRICS:
+            _values = _row['metrics'].get(_name)
+            if _values is None:
+                continue
+            _relative = 'n/a' if _values['relative'] is None else '{0:+.1%}'.format(_values['relative'])
+            _fmt = '    {0:<6} {1:>14} -> {2:>14}  {3:>15}  {4:>8}' if _name == 'laps' else \
+                '    {0:<6} {1:>13.6f}s -> {2:>13.6f}s  {3:>+14.6f}s  {4:>8}'
+            _lines.append(_fmt.format(_name, _values['base'], _values['new'], _values['change'], _relative))
+    return _lines
+
+
+def main(_argv=None):
+    """
+    python -m pyStopWatch diff base new: exit status 1 when a clock regressed, 0 otherwise
+    """
+    _parser = argparse.ArgumentParser(prog='python -m pyStopWatch')
+    _commands = _parser.add_subparsers(dest='command')
+    _commands.required = True
+    _diff = _commands.add_parser('diff', help='compare two snapshot files and flag regressions')
+    _diff.add_argument('base', help='baseline snapshot file')
+    _diff.add_argument('new', help='snapshot file to check')
+    _diff.add_argument('--threshold', type=float, default=0.1,
+                       help='relative increase counted as a regression (default 0.1, i.e. 10%%)')
+    _diff.add_argument('--metric', default='mean', choices=METRICS, help='metric checked for regressions')
+    _diff.add_argument('--json', action='store_true', help='print the comparison as JSON')
+    _args = _parser.parse_args(_argv)
+    try:
+        _rows = diff(load(_args.base), load(_args.new), _args.threshold, _args.metric)
+    except (OSError, StopWatchException) as _error:
+        sys.stderr.write('{0}\n'.format(_error))
+        return 2
+    if _args.json:
+        json.dump(_rows, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        for _line in formatdiff(_rows, _args.metric):
+            sys.stdout.write('{0}\n'.format(_line))
+    _regressions = [_row['name'] for _row in _rows if _row['regression']]
+    if _regressions:
+        sys.stderr.write('{0} clock(s) regressed by more than {1:.1%} in {2}: {3}\n'.format(
+            len(_regressions), _args.threshold, _args.metric, ', '.join(_regressions)))
+        return 1
+    return 0
@@ -0,0 +1,216 @@
+# coding=utf-8
+"""
+statsd output.  StatsdSink is a StopWatch sink turning the laps of a stopwatch's clocks into statsd timing metrics
+named after the clocks, optionally tagged (DogStatsD style) with the clock titles.  Laps are only queued on the
+timing thread; a background thread packs the metric lines into datagrams of at most one MTU and sends them over UDP
+every interval.  With pre-aggregation a clock sends one line per interval however many laps it ran.
+"""
+
+import atexit
+import re
+import socket
+import threading
+
+from .StopWatch import EVENT_START, EVENT_PAUSE, EVENT_UNPAUSE
+
+# payload that fits an ethernet frame after IP and UDP headers; use 8932 on jumbo frame networks and ~512 across the
+# internet
+MTU = 1432
+
+NS_PER_MS = 1000000.0
+
+_UNSAFE = re.compile(r'[:|@#,\s]')
+
+
+def metricname(_text):
+    """
+    statsd safe metric name or tag value: separators of the protocol become '_' and nested clock paths use '.'
+    :rtype: str
+    """
+    return _UNSAFE.sub('_', _text).replace('/', '.')
+
+
+class StatsdSink(object):
+    """
+    Sink sending clock laps to a statsd agent:
+
+        statsd = StatsdSink(_stopwatch=sw)
+        sw.addsink(statsd)
+        ...
+        statsd.close()          # or left to the atexit flush
+
+    A lap is the time from start to stop less its pauses.  Without aggregation each lap is one timing line
+    (prefix.clock:12.5|ms).  With aggregation a clock's laps in an interval are sent as their mean with a sample rate
+    of 1/laps (prefix.clock:12.5|ms|@0.01), so the agent still counts every lap, plus a prefix.clock.max gauge
+    """
+
+    def __init__(self, _host='127.0.0.1', _port=8125, _prefix='stopwatch', _interval=1.0, _aggregate=False,
+                 _mtu=MTU, _stopwatch=None, _tags=None, _maxpending=100000):
+        """
+        :param _host: statsd agent host
+        :type _host: str
+        :param _port: statsd agent UDP port
+        :type _port: int
+        :param _prefix: metric name prefix; '' for none
+        :type _prefix: str
+        :param _interval: seconds between sends
+        :type _interval: float
+        :param _aggregate: send one mean (and max) per clock per interval instead of every lap
+        :type _aggregate: bool
+        :param _mtu: largest datagram payload in bytes
+        :type _mtu: int
+        :param _stopwatch: stopwatch whose clock titles are sent as a title tag
+        :param _tags: extra tags sent with every metric, as {name: value}
+        :type _tags: dict
+        :param _maxpending: laps queued between sends (without aggregation) before further laps are dropped
+        :type _maxpending: int
+        """
+        self.address = (_host, _port)
+        self.prefix = '{0}.'.format(metricname(_prefix)) if _prefix else ''
+        self.interval = _interval
+        self.aggregate = _aggregate
+        self.mtu = _mtu
+        self.stopwatch = _stopwatch
+        self.tags = ['{0}:{1}'.format(metricname(str(_name)), metricname(str(_value)))
+                     for _name, _value in sorted((_tags or {}).items())]
+        self.maxpending = _maxpending
+        self.dropped = 0
+        self.errors = 0
+        self.sent = 0
+        self.closed = False
+        self._open = {}
+        self._pending = []
+        self._aggregates = {}
+        self._names = {}
+        self._lock = threading.Lock()
+        self._flushlock = threading.Lock()
+        self._wake = threading.Event()
+        self._socket = socket.socket(socket.getaddrinfo(_host, _port, 0, socket.SOCK_DGRAM)[0][0], socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._thread = threading.Thread(target=self.__run, name='pyStopWatch-statsd', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def event(self, _clockname, _event, _timestamp, _thread):
+        """
+        Sink interface, see StopWatch.addsink
+        """
+        _key = (_clockname, _thread)
+        with self._lock:
+            if _event == EVENT_START:
+                self._open[_key] = [_timestamp, 0, None]
+                return
+            _open = self._open.get(_key)
+            if _open is None:
+                # lap began before the sink was added
+                return
+            if _event == EVENT_PAUSE:
+                _open[2] = _timestamp
+                return
+            if _event == EVENT_UNPAUSE:
+                _open[1] += _timestamp - _open[2]
+                _open[2] = None
+                return
+            del self._open[_key]
+            _lap = (_open[2] if _open[2] is not None else _timestamp) - _open[0] - _open[1]
+            if self.aggregate:
+                _aggregate = self._aggregates.get(_clockname)
+                if _aggregate is None:
+                    self._aggregates[_clockname] = [1, _lap, _lap]
+                else:
+                    _aggregate[0] += 1
+                    _aggregate[1] += _lap
+                    if _lap > _aggregate[2]:
+                        _aggregate[2] = _lap
+            elif len(self._pending) < self.maxpending:
+                self._pending.append((_clockname, _lap))
+            else:
+                self.dropped += 1
+
+    def __name(self, _clockname):
+        """
+        Metric name and tag suffix of a clock
+        """
+        _name = self._names.get(_clockname)
+        if _name is None:
+            _tags = list(self.tags)
+            if self.stopwatch is not None and _clockname in self.stopwatch._clocks:
+                _tags.insert(0, 'title:{0}'.format(metricname(self.stopwatch._clocks[_clockname].title)))
+            _name = self._names[_clockname] = (self.prefix + metricname(_clockname),
+                                               '|#{0}'.format(','.join(_tags)) if _tags else '')
+        return _name
+
+    def lines(self):
+        """
+        Take the laps queued since the last call as statsd lines
+        :rtype: list of str
+        """
+        with self._lock:
+            _pending, self._pending = self._pending, []
+            _aggregates, self._aggregates = self._aggregates, {}
+        _lines = []
+        for _clockname, _lap in _pending:
+            _name, _tags = self.__name(_clockname)
+            _lines.append('{0}:{1:g}|ms{2}'.format(_name, _lap / NS_PER_MS, _tags))
+        for _clockname, (_count, _sum, _max) in _aggregates.items():
+            _name, _tags = self.__name(_clockname)
+            _rate = '|@{0:g}'.format(1.0 / _count) if _count > 1 else ''
+            _lines.append('{0}:{1:g}|ms{2}{3}'.format(_name, _sum / _count / NS_PER_MS, _rate, _tags))
+            _lines.append('{0}.max:{1:g}|g{2}'.format(_name, _max / NS_PER_MS, _tags))
+        return _lines
+
+    def packets(self, _lines):
+        """
+        Pack lines into newline separated datagrams of at most mtu bytes; a longer line goes alone
+        :rtype: list of bytes
+        """
+        _packets = []
+        _packet = b''
+        for _line in _lines:
+            _line = _line.encode('utf-8')
+            if _packet and len(_packet) + 1 + len(_line) > self.mtu:
+                _packets.append(_packet)
+                _packet = b''
+            _packet = _packet + b'\n' + _line if _packet else _line
+        if _packet:
+            _packets.append(_packet)
+        return _packets
+
+    def flush(self):
+        """
+        Send everything queued now, on the calling thread
+        """
+        with self._flushlock:
+            for _packet in self.packets(self.lines()):
+                try:
+                    self._socket.sendto(_packet, self.address)
+                    self.sent += 1
+                except OSError:
+                    self.errors += 1
+
+    def __run(self):
+        while not self.closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """
+        Stop the sending thread, send what is still queued and close the socket
+        """
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        self._wake.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _exctype, _exc, _tb):
+        self.close()
+        return False
@@ -3,31 +3,99 @@
 This class simplifies the interactions needed to determine the time code chunks take to operate.
 """
 
+import functools
+import inspect
+import json as _json
+import threading
+import time
+from array import array
 from datetime import datetime
 from .StopWatchException import StopWatchException, StopWatchLapException
+from .LapStore import LapStore
+from .Histogram import Histogram, PERCENTILES
+from .Sampler import Sampler
+from .CpuMeter import CpuMeter
+from .MemoryMeter import MemoryMeter
+from .CallTree import ClockContext, buildtree, findnode, hotpath, rendertree
+
+NS_PER_SEC = 1000000000
+SNAPSHOT_VERSION = 1
+
+# clock events sent to sinks added with StopWatch.addsink
+EVENT_START = 0
+EVENT_STOP = 1
+EVENT_PAUSE = 2
+EVENT_UNPAUSE = 3
+EVENTS = ('start', 'stop', 'pause', 'unpause')
+
+# Clock sources return an integer nanosecond count.  Only differences between two readings of the same
+# source are meaningful, so the monotonic counters are safe against NTP adjustments of the wall clock.
+CLOCKSOURCES = {
+    'perf_counter': time.perf_counter_ns,
+    'monotonic': time.monotonic_ns,
+    'process_time': time.process_time_ns,
+}
+if hasattr(time, 'thread_time_ns'):
+    CLOCKSOURCES['thread_time'] = time.thread_time_ns
+
+
+def getclocksource(_source='perf_counter'):
+    """
+    Resolve a clock source to a callable returning integer nanoseconds
+    :param _source: name from CLOCKSOURCES or a callable returning nanoseconds
+    :type _source: str | callable
+    :return: clock source callable
+    :rtype: callable
+    """
+    if callable(_source):
+        return _source
+    try:
+        return CLOCKSOURCES[_source]
+    except KeyError:
+        raise StopWatchException('Unknown clock source, {0}.  Must be one of: {1}'
+                                 .format(_source, ', '.join(sorted(CLOCKSOURCES))))
+
+
+def totimestamp(_value, _now):
+    """
+    Convert an override time into the timebase of the given clock source
+    Integers are taken as already being readings of the clock source.  datetime values (as used before clock
+    sources existed) are translated by their distance from the current wall clock time.
+    :param _value: override time
+    :type _value: int | datetime
+    :param _now: clock source callable
+    :type _now: callable
+    :return: timestamp in nanoseconds
+    :rtype: int
+    """
+    if isinstance(_value, datetime):
+        _wall = datetime.now(_value.tzinfo) if _value.tzinfo else datetime.utcnow()
+        return _now() - int((_wall - _value).total_seconds() * NS_PER_SEC)
+    return int(_value)
+
 
 class Lap(object):
 
-    def __init__(self):
+    def __init__(self, _clocksource='perf_counter'):
         self.paused = False
-        self.total = 0.0
+        self.total = 0
         self.starttime = None
         self.endtime = None
+        self._now = getclocksource(_clocksource)
 
     def pause(self,_override=None):
         if self.ispaused():
             raise StopWatchLapException('Cannot pause a lap that is paused')
-        end = _override or datetime.utcnow()
+        end = self._now() if _override is None else totimestamp(_override, self._now)
         self.paused = True
-        _d = end - self.starttime
-        self.total += _d.total_seconds()
+        self.total += end - self.starttime
         self.starttime = None
         self.endtime = None
 
     def unpause(self,_override=None):
         if not self.ispaused():
             raise StopWatchLapException('Cannot unpause a lap that is not paused')
-        self.starttime = _override or datetime.utcnow()
+        self.starttime = self._now() if _override is None else totimestamp(_override, self._now)
         self.paused = False
 
     def start(self,_override=None):
@@ -35,7 +103,7 @@ class Lap(object):
             raise StopWatchLapException('Cannot start a lap already started')
         elif self.ispaused():
             self.paused = False
-        self.starttime = _override or datetime.utcnow()
+        self.starttime = self._now() if _override is None else totimestamp(_override, self._now)
 
     def stop(self, _override=None):
         if self.isstopped():
@@ -44,15 +112,14 @@ class Lap(object):
         elif self.ispaused():
             self.paused = False
         else:
-            self.endtime = _override or datetime.utcnow()
-            _d = self.endtime - self.starttime
-            self.total += _d.total_seconds()
+            self.endtime = self._now() if _override is None else totimestamp(_override, self._now)
+            self.total += self.endtime - self.starttime
             self.starttime = None
             self.endtime = None
             self.paused = False
 
     def laptotalsecs(self):
-        return self.total
+        return self.total / NS_PER_SEC
 
     def isstarted(self):
         if self.starttime is not None or self.paused is True:
@@ -68,7 +135,205 @@ class Lap(object):
         return False
 
 
+def humanreadabletime(_secs):
+    """
+    Seconds as days, hours, minutes and seconds, e.g. '1 minutes 2.500000 seconds'
+    :param _secs: seconds
+    :type _secs: float
+    :rtype: str
+    """
+    _days = _hrs = _mins = 0.0
+    _timestr = ''
+    if _secs >= 60.0:
+        _mins = _secs // 60.0
+        _secs %= 60.0
+    if _mins >= 60.0:
+        _hrs = _mins // 60.0
+        _mins %= 60.0
+    if _hrs >= 24.0:
+        _days = _hrs // 24.0
+        _hrs %= 24.0
+    if _days > 0:
+        _timestr = '{0}{1} days '.format(_timestr, int(_days))
+    if _hrs > 0:
+        _timestr = '{0}{1} hours '.format(_timestr, int(_hrs))
+    if _mins > 0:
+        _timestr = '{0}{1} minutes '.format(_timestr, int(_mins))
+    if _secs > 0:
+        _timestr = '{0}{1} seconds'.format(_timestr, '{0:f}'.format(_secs))
+    if not _timestr:
+        _timestr = '{0:f} seconds'.format(_secs)
+    return _timestr
+
+
+class Clock(object):
+    """
+    Compact state record for a single clock.  Lap detail storage is only created once a lap is recorded
+    """
+    __slots__ = ('title', 'display', 'begin', 'end', 'total', 'laps', 'currentlap', 'paused', 'lapstart', 'laptotal',
+                 'lapdetail', 'histogram', 'running', 'suspended', 'sampler', 'skipped', 'name', 'corrected', 'meters',
+                 'removed')
+
+    def __init__(self, _title, _display=True, _histogram=None, _sampler=None, _name=None, _meters=()):
+        self.name = _name
+        self.title = _title
+        self.display = _display
+        self.histogram = _histogram
+        self.sampler = _sampler
+        self.meters = _meters
+        # set once the clock is removed from (or replaced in) its stopwatch, so handles resolve the name again
+        self.removed = False
+        self.reset()
+
+    def reset(self):
+        """
+        Return the clock to its never used state, keeping title and display
+        """
+        self.begin = None
+        self.end = None
+        self.total = 0
+        self.laps = 0
+        self.currentlap = 0
+        self.paused = False
+        self.lapstart = None
+        self.laptotal = 0
+        self.lapdetail = None
+        self.running = None
+        self.suspended = None
+        self.skipped = False
+        self.corrected = 0
+        if self.histogram is not None:
+            self.histogram.clear()
+        if self.sampler is not None:
+            self.sampler.reset()
+        for _meter in self.meters:
+            _meter.reset()
+
+    def isstarted(self):
+        return self.paused or (self.begin is not None and self.end is None)
+
+    def everused(self):
+        return self.currentlap > 0 or self.begin is not None
+
+    def isstopped(self):
+        return (self.end is not None and self.begin is not None and not self.paused) or not self.everused()
+
+    def addtasktime(self, _running, _suspended):
+        """
+        Add time an asyncio task spent running on the event loop and suspended while timed by this clock
+        :param _running: nanoseconds running
+        :param _suspended: nanoseconds suspended
+        """
+        self.running = (self.running or 0) + _running
+        self.suspended = (self.suspended or 0) + _suspended
+
+    def merge(self, _other):
+        """
+        Fold another clock's accumulated totals, laps and histogram into this one.  The merged clock shows as
+        started if either clock is started, preferring a running clock over a paused one
+        :param _other: clock to merge in
+        :type _other: Clock
+        """
+        self.total += _other.total
+        self.corrected += _other.corrected
+        self.laps += _other.laps
+        self.currentlap += _other.currentlap
+        if _other.isstarted():
+            if not self.isstarted() or (self.paused and not _other.paused):
+                self.begin, self.end, self.paused = _other.begin, _other.end, _other.paused
+                self.lapstart, self.laptotal = _other.lapstart, _other.laptotal
+        elif self.begin is None:
+            self.begin, self.end = _other.begin, _other.end
+        if _other.running is not None:
+            self.addtasktime(_other.running, _other.suspended)
+        if self.histogram is not None and _other.histogram is not None:
+            self.histogram.merge(_other.histogram)
+        for _meter, _othermeter in zip(self.meters, _other.meters):
+            _meter.merge(_othermeter)
+
+
+class ClockHandle(object):
+    """
+    A clock of a stopwatch looked up once, so a tight loop does not resolve the clock name on every call:
+
+        parse = sw.handle('parse')
+        for item in items:
+            parse.start()
+            ...
+            parse.stop()
+
+    A handle acts on the same clock as the name based methods and keeps the state queries up to date.  It follows
+    its name: reset keeps timing into the same clock, a clock added again under the name is picked up, and once the
+    name is removed calls raise StopWatchException
+    """
+    __slots__ = ('name', '_sw', '_clock', '_start', '_stop', '_pause', '_unpause')
+
+    def __init__(self, _sw, _clockname):
+        self.name = _clockname
+        self._sw = _sw
+        self._start = _sw._startclock
+        self._stop = _sw._stopclock
+        self._pause = _sw._pauseclock
+        self._unpause = _sw._unpauseclock
+        self._resolve()
+
+    def _resolve(self):
+        """
+        Look the clock up by name again
+        :rtype: Clock
+        """
+        try:
+            self._clock = self._sw._writeclock(self.name)
+        except KeyError:
+            raise StopWatchException('Clock, {0}, does not exist'.format(self.name))
+        return self._clock
+
+    def start(self, overridestart=None):
+        _clock = self._clock
+        if _clock.removed:
+            _clock = self._resolve()
+        self._start(_clock, overridestart)
+
+    def stop(self, overrideend=None):
+        _clock = self._clock
+        if _clock.removed:
+            _clock = self._resolve()
+        self._stop(_clock, overrideend)
+
+    def pause(self, overrideend=None):
+        _clock = self._clock
+        if _clock.removed:
+            _clock = self._resolve()
+        self._pause(_clock, overrideend, self.name)
+
+    def unpause(self, overridestart=None):
+        _clock = self._clock
+        if _clock.removed:
+            _clock = self._resolve()
+        self._unpause(_clock, overridestart)
+
+    def reset(self):
+        self._sw.reset(self.name)
+
+    def isstarted(self):
+        return self._sw.isstarted(self.name)
+
+    def ispaused(self):
+        return self._sw.ispaused(self.name)
+
+    def totalsecs(self):
+        return self._sw.clocktotalsecs(self.name)
 
+    def lapcount(self):
+        return self._sw.clocklapcount(self.name)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, _exctype, _exc, _tb):
+        self.stop()
+        return False
 
 
 class StopWatch(object):
@@ -78,35 +343,96 @@ class StopWatch(object):
     stopwatch functionality
     """
 
-    def __init__(self, _swtitle='StopWatch Default', _defaulttitle='default', _defaultname='default', _recordlapdetail=False):
+    def __init__(self, _swtitle='StopWatch Default', _defaulttitle='default', _defaultname='default', _recordlapdetail=False,
+                 _clocksource='perf_counter', _lapretention=None, _histogram=False, _subtractoverhead=False,
+                 _cputime=False, _memory=False):
         """
         initialize StopWatch object instance
         :param _swtitle: Title for the stop watch
         :type _swtitle: str
+        :param _recordlapdetail: record the total and start offset of each lap
+        :type _recordlapdetail: bool
+        :param _lapretention: laps kept per clock when recording lap detail; None keeps all, 0 keeps none and
+                              N keeps the last N
+        :type _lapretention: int | None
+        :param _histogram: keep a streaming latency histogram of lap totals for each clock
+        :type _histogram: bool
+        :param _clocksource: clock source name (perf_counter, monotonic, process_time, thread_time) or a callable
+                             returning integer nanoseconds
+        :type _clocksource: str | callable
+        :param _subtractoverhead: subtract the stopwatch's own start/stop overhead from each lap.  True calibrates
+                                  it for the clock source (see calibrate); a number gives it in nanoseconds.  Raw
+                                  totals are kept and reported next to the corrected ones
+        :type _subtractoverhead: bool | int
+        :param _cputime: also accumulate process CPU, thread CPU and garbage collection time for each clock (see
+                         clockcpusecs)
+        :type _cputime: bool
+        :param _memory: also record each clock's net allocated and peak memory per lap (see clockmemory): True or
+                        'tracemalloc' for memory traced by tracemalloc (started if needed), 'rss' for the process
+                        resident set size
+        :type _memory: bool | str
         :var self._clocks: various clocks being tracked.  'default' is only one setup immediately
-        :type self._clocks: dict
+        :type self._clocks: dict of Clock
         :return: n/a
         """
         self.title = _swtitle
+        self._clocksource = _clocksource
+        self._now = getclocksource(_clocksource)
+        self._epoch = self._now()
         self._defaulttitle = _defaulttitle
         self._defaultname = _defaultname
-        self._clocks = self.__init_clock(self._defaultname, self._defaulttitle)
+        self._histogram = _histogram
+        self._cputime = _cputime
+        self._memory = _memory
+        self._clocks = {self._defaultname: Clock(self._defaulttitle, _histogram=Histogram() if _histogram else None,
+                                                 _name=self._defaultname, _meters=self._newmeters(_cputime, _memory))}
         self._recordlapdetail = _recordlapdetail
+        self._lapretention = _lapretention
+        if _subtractoverhead is True:
+            _subtractoverhead = calibrate(_clocksource)
+        self._overhead = int(_subtractoverhead or 0)
+        self._timedlapcost = None
+        self._treeroots = set()
+        self._sinks = ()
+        # names of the clocks in each state, kept up to date on every transition (dicts keep transition order)
+        self._started = {}
+        self._paused = {}
+        self._used = {}
+        # clocks whose current lap was skipped by their sampler, so stopall can close them
+        self._skipped = {}
+        # tag -> names of the clocks with the tag; prefix -> names of the clocks starting with it, for the
+        # prefixes asked for so far (kept up to date by _reindex)
+        self._tags = {}
+        self._prefixes = {}
+        if _lapretention is not None and _lapretention < 0:
+            raise StopWatchException('Lap retention must be None or a non-negative number of laps')
 
-    def __init_clock(self, _name, _title, _display=True):
-        return {
-            _name: {
-                'title': _title,
-                'begin': None,
-                'end': None,
-                'total': 0.0,
-                'laps': 0,
-                'lapdetail': [],
-                'currentlap': 0,
-                'display': _display,
-                'paused': False
-            }
-        }
+    def _writeclock(self, _clockname):
+        """
+        Clock record that laps are recorded into
+        :param _clockname: clock name
+        :type _clockname: str
+        :rtype: Clock
+        """
+        return self._clocks[_clockname]
+
+    def _readclock(self, _clockname=None, _lapdetail=False):
+        """
+        Clock record used by queries and summaries
+        :param _clockname: clock name
+        :type _clockname: str
+        :param _lapdetail: the caller reads the lap detail, which a subclass may have to assemble
+        :type _lapdetail: bool
+        :rtype: Clock
+        """
+        return self._clocks[_clockname or self._defaultname]
+
+    def _readclocks(self, _lapdetail=False):
+        """
+        (name, Clock) pairs used by queries and summaries
+        :param _lapdetail: see _readclock
+        """
+        return self._clocks.items()
 
     def clocklapcount(self, _clockname=None):
         """
@@ -116,8 +442,7 @@ class StopWatch(object):
         :return: lap count
         :rtype: int
         """
-        _clockname = _clockname or self._defaultname
-        return self._clocks[_clockname]['currentlap']
+        return self._readclock(_clockname).currentlap
 
     def clocktotalsecs(self, _clockname=''):
         """
@@ -125,16 +450,40 @@ class StopWatch(object):
         :param _clockname: clock name to retrieve lap count
         :type _clockname: str
         :return: time running
+        :rtype: float
+        """
+        return self._totalns(_clockname) / NS_PER_SEC
+
+    def overhead(self):
+        """
+        Nanoseconds subtracted from each lap, 0 unless the stopwatch was created with _subtractoverhead
         :rtype: int
         """
-        if not _clockname:
-            _clockname = self._defaultname
-        _time = self._clocks[_clockname]['total']
-        if self.isstarted(_clockname):
-            _time += (datetime.utcnow() - self._clocks[_clockname]['begin']).total_seconds()
-        return float(_time)
+        return self._overhead
+
+    def clockcorrectedsecs(self, _clockname=None):
+        """
+        Get total time of the completed laps of a clock with the stopwatch's own overhead subtracted from each lap
+        (see _subtractoverhead).  Equal to the raw completed lap time when no overhead is subtracted
+        :param _clockname: clock name
+        :type _clockname: str
+        :rtype: float
+        """
+        _clock = self._readclock(_clockname)
+        return (_clock.corrected if self._overhead else _clock.total) / NS_PER_SEC
 
-    def addclock(self, _clockname, _clocktitle, _display=True):
+    def _totalns(self, _clockname, _now=None):
+        """
+        Total nanoseconds for a clock, including the lap in progress up to _now (read when needed if None)
+        """
+        _clock = self._clocks[_clockname or self._defaultname]
+        _time = _clock.total
+        if _clock.begin is not None and _clock.end is None and not _clock.paused:
+            _time += (self._now() if _now is None else _now) - _clock.begin
+        return _time
+
+    def addclock(self, _clockname, _clocktitle, _display=True, _histogram=None, _sample=None, _overheadbudget=None,
+                 _tags=None, _cputime=None, _memory=None):
         """
         Add a new clock to the stopwatch
         :param _display:
@@ -142,29 +491,232 @@ class StopWatch(object):
         :type _clocktitle: str
         :param _clockname: clockname
         :type _clockname: str
+        :param _histogram: keep a latency histogram of lap totals; None uses the stopwatch setting
+        :type _histogram: bool | None
+        :param _sample: only time some laps: every Nth start (int) or each start with probability p (float).
+                        Skipped laps are counted but cost no timing; estimated totals are reported alongside the
+                        observed ones (see pyStopWatch.Sampler for the error bounds)
+        :type _sample: int | float
+        :param _overheadbudget: sample adaptively so timing overhead stays near this fraction of the timed work
+        :type _overheadbudget: float
+        :param _tags: tags for operating on and reporting a group of clocks together (see starttagged)
+        :type _tags: list
+        :param _cputime: also accumulate CPU and GC time (see clockcpusecs); defaults to the stopwatch's _cputime
+        :type _cputime: bool
+        :param _memory: also record memory per lap (see clockmemory); defaults to the stopwatch's _memory
+        :type _memory: bool | str
+        """
+        if _histogram is None:
+            _histogram = self._histogram
+        if _cputime is None:
+            _cputime = self._cputime
+        if _memory is None:
+            _memory = self._memory
+        _sampler = None
+        if _overheadbudget is not None:
+            _sampler = Sampler(_budget=_overheadbudget, _cost=self._samplecost())
+        elif _sample is not None:
+            _sampler = Sampler(_sample)
+        _old = self._clocks.get(_clockname)
+        if _old is not None:
+            _old.removed = True
+        self._clocks[_clockname] = Clock(_clocktitle, _display, Histogram() if _histogram else None, _sampler,
+                                         _clockname, self._newmeters(_cputime, _memory))
+        self._reindex(_clockname)
+        self.__untag(_clockname)
+        if _tags:
+            self.tagclock(_clockname, *_tags)
+
+    def tagclock(self, _clockname, *tags):
+        """
+        Add tags to a clock
+        :param _clockname: clock name
+        :type _clockname: str
+        :param tags: tags to add
+        """
+        if _clockname not in self._clocks:
+            raise StopWatchException('Clock, {0}, does not exist'.format(_clockname))
+        for _tag in tags:
+            self._tags.setdefault(_tag, {})[_clockname] = None
+
+    def untagclock(self, _clockname, *tags):
+        """
+        Remove tags from a clock
+        :param _clockname: clock name
+        :type _clockname: str
+        :param tags: tags to remove
+        """
+        for _tag in tags:
+            _members = self._tags.get(_tag)
+            if _members is not None:
+                _members.pop(_clockname, None)
+                if not _members:
+                    del self._tags[_tag]
+
+    def __untag(self, _clockname):
+        self.untagclock(_clockname, *list(self._tags))
+
+    def clocktags(self, _clockname=None):
+        """
+        Tags of a clock
+        :param _clockname: clock name
+        :type _clockname: str
+        :rtype: list
         """
-        self._clocks.update(self.__init_clock(_clockname, _clocktitle, _display))
+        _clockname = _clockname or self._defaultname
+        return [_tag for _tag, _members in self._tags.items() if _clockname in _members]
+
+    def taggedclocks(self, _tag=None, _prefix=None):
+        """
+        Names of the clocks with a tag and/or whose name starts with a prefix; all clocks when neither is given.
+        Both come from membership indexes kept as clocks are added, tagged and removed
+        :param _tag: tag
+        :param _prefix: clock name prefix
+        :type _prefix: str
+        :rtype: list
+        """
+        if _tag is not None:
+            _names = list(self._tags.get(_tag, ()))
+            if _prefix is not None:
+                _names = [_clockname for _clockname in _names if _clockname.startswith(_prefix)]
+            return _names
+        if _prefix is not None:
+            _names = self._prefixes.get(_prefix)
+            if _names is None:
+                _names = self._prefixes[_prefix] = dict.fromkeys(_clockname for _clockname in self._clocks
+                                                                 if _clockname.startswith(_prefix))
+            return list(_names)
+        return list(self._clocks)
+
+    def _readselected(self, _tag=None, _prefix=None, _lapdetail=False):
+        """
+        (name, Clock) pairs of the clocks selected by tag and/or prefix, see taggedclocks
+        :param _lapdetail: see _readclock
+        """
+        if _tag is None and _prefix is None:
+            return list(self._readclocks(_lapdetail))
+        return [(_clockname, self._readclock(_clockname, _lapdetail))
+                for _clockname in self.taggedclocks(_tag, _prefix)]
+
+    def starttagged(self, _tag=None, _prefix=None):
+        """
+        Start the stopped clocks with a tag and/or name prefix, all at the same time
+        :param _tag: tag
+        :param _prefix: clock name prefix
+        :type _prefix: str
+        """
+        _start = self._now()
+        for _clockname in self.taggedclocks(_tag, _prefix):
+            _clock = self._writeclock(_clockname)
+            if not _clock.isstarted():
+                self._startclock(_clock, _start)
+
+    def stoptagged(self, _tag=None, _prefix=None):
+        """
+        Stop the started clocks with a tag and/or name prefix, all at the same time
+        :param _tag: tag
+        :param _prefix: clock name prefix
+        :type _prefix: str
+        """
+        _stop = self._now()
+        for _clockname in self.taggedclocks(_tag, _prefix):
+            _clock = self._writeclock(_clockname)
+            if _clock.isstarted() or _clock.skipped:
+                self._stopclock(_clock, _stop)
+
+    def pausetagged(self, _tag=None, _prefix=None):
+        """
+        Pause the running clocks with a tag and/or name prefix, all at the same time
+        :param _tag: tag
+        :param _prefix: clock name prefix
+        :type _prefix: str
+        """
+        _end = self._now()
+        for _clockname in self.taggedclocks(_tag, _prefix):
+            _clock = self._writeclock(_clockname)
+            if _clock.isstarted() and not _clock.paused:
+                self._pauseclock(_clock, _end, _clockname)
+
+    def unpausetagged(self, _tag=None, _prefix=None):
+        """
+        Unpause the paused clocks with a tag and/or name prefix, all at the same time
+        :param _tag: tag
+        :param _prefix: clock name prefix
+        :type _prefix: str
+        """
+        _start = self._now()
+        for _clockname in self.taggedclocks(_tag, _prefix):
+            _clock = self._writeclock(_clockname)
+            if _clock.paused:
+                self._unpauseclock(_clock, _start)
+
+    def resettagged(self, _tag=None, _prefix=None):
+        """
+        Reset the clocks with a tag and/or name prefix
+        :param _tag: tag
+        :param _prefix: clock name prefix
+        :type _prefix: str
+        """
+        for _clockname in self.taggedclocks(_tag, _prefix):
+            self.reset(_clockname)
+
+    def _samplecost(self):
+        """
+        Nanoseconds a timed lap adds to the code being timed, measured once per stopwatch
+        :rtype: int
+        """
+        if self._timedlapcost is None:
+            _clock = Clock('calibration')
+            _now = self._now
+            _costs = []
+            for _lap in range(101):
+                _begin = _now()
+                self._recordlap(_clock, _now(), _now())
+                _costs.append(_now() - _begin)
+            _costs.sort()
+            # the scratch clock is not one of this stopwatch's clocks
+            self._reindex(None)
+            self._timedlapcost = max(1, _costs[len(_costs) // 2])
+        return self._timedlapcost
 
     def start(self, _clockname=None, overridestart=None):
         """
         Sets the start time
         As object can be reused, sets _end to None to ensure _end can't be before _begin
         :param overridestart: override the starttime if needbe
-        :type overridestart: datetime.utcnow()
+        :type overridestart: int | datetime
         :param _clockname: clock name to start
         :type _clockname: str
         """
-        if not _clockname:
-            _clockname = self._defaultname
-        _start = overridestart or datetime.utcnow()
-        if self.isstopped(_clockname):
-            self._clocks[_clockname]['begin'] = _start
-            self._clocks[_clockname]['end'] = None
-            self._clocks[_clockname]['currentlap'] += 1
-            if self._recordlapdetail:
-                self._clocks[_clockname]['lapdetail'].append(Lap())
-                self._clocks[_clockname]['lapdetail'][-1].start(_start)
-        elif self.ispaused(_clockname):
+        self._startclock(self._clocks[_clockname or self._defaultname], overridestart)
+
+    def _startclock(self, _clock, _start=None):
+        if _clock.sampler is not None and _clock.sampler.skip():
+            if _clock.skipped or _clock.isstarted():
+                raise StopWatchException('StopWatch is already started')
+            _clock.skipped = True
+            self._skipped[_clock.name] = None
+            return
+        if _clock.skipped:
+            # a skipped lap left open; the lap sampled now replaces it
+            _clock.skipped = False
+            self._skipped.pop(_clock.name, None)
+        _start = self._now() if _start is None else totimestamp(_start, self._now)
+        if _clock.isstopped():
+            _clock.begin = _start
+            _clock.end = None
+            _clock.currentlap += 1
+            _clock.lapstart = _start
+            _clock.laptotal = 0
+            for _meter in _clock.meters:
+                _meter.newlap()
+                _meter.begin()
+            self._started[_clock.name] = None
+            if _clock.currentlap == 1:
+                self._used[_clock.name] = None
+            if self._sinks:
+                self._emit(_clock, EVENT_START, _start)
+        elif _clock.paused:
             raise StopWatchException('StopWatch is currently paused')
         else:
             raise StopWatchException('StopWatch is already started')
@@ -173,7 +725,7 @@ class StopWatch(object):
         """
         Start all clocks at same time
         """
-        _start = datetime.utcnow()
+        _start = self._now()
         for _clock in self._clocks:
             self.start(_clock, overridestart=_start)
 
@@ -182,26 +734,256 @@ class StopWatch(object):
         Sets the _end time and adds the difference between start and _end to the _total time so can have
         a running _total time (looping but only want to see how much part of the loop takes over all iterations)
         :param overrideend: overrid the end time if needbe
-        :type overrideend: datetime.utcnow()
+        :type overrideend: int | datetime
         :param _clockname: clock name to start
         :type _clockname: str
         """
-        if not _clockname:
-            _clockname = self._defaultname
-        _end = overrideend or datetime.utcnow()
-        if self.ispaused(_clockname):
-            self._clocks[_clockname]['laps'] += 1
-            self._clocks[_clockname]['paused'] = False
-            if self._recordlapdetail:
-                self._clocks[_clockname]['lapdetail'][-1].stop(_end)
-        elif self.isstarted(_clockname):
-            self._clocks[_clockname]['end'] = _end
-            self._clocks[_clockname]['total'] += (self._clocks[_clockname].get('end') - self._clocks[_clockname].get('begin')).total_seconds()
-            self._clocks[_clockname]['laps'] += 1
-            if self._recordlapdetail:
-                self._clocks[_clockname]['lapdetail'][-1].stop(_end)
+        self._stopclock(self._clocks[_clockname or self._defaultname], overrideend)
+
+    def _stopclock(self, _clock, _end=None):
+        if _clock.skipped:
+            _clock.skipped = False
+            self._skipped.pop(_clock.name, None)
+            return
+        _end = self._now() if _end is None else totimestamp(_end, self._now)
+        if _clock.paused:
+            _clock.laps += 1
+            _clock.paused = False
+            self._paused.pop(_clock.name, None)
+        elif _clock.begin is not None and _clock.end is None:
+            _clock.end = _end
+            _clock.total += _end - _clock.begin
+            _clock.laptotal += _end - _clock.begin
+            _clock.laps += 1
+            for _meter in _clock.meters:
+                _meter.end()
         else:
             raise StopWatchException('StopWatch is already stopped.  It must be started first.')
+        self._started.pop(_clock.name, None)
+        if self._sinks:
+            self._emit(_clock, EVENT_STOP, _end)
+        if _clock.histogram is not None or _clock.sampler is not None or self._recordlapdetail or self._overhead:
+            self._endlap(_clock, _clock.laptotal, _clock.lapstart)
+
+    def _newlapstore(self, _clock):
+        return LapStore(self._lapretention, sum((_meter.COLUMNS for _meter in _clock.meters), ()))
+
+    @staticmethod
+    def _newmeters(_cputime, _memory):
+        """
+        Meters of a clock measuring CPU time and/or memory
+        :rtype: tuple
+        """
+        _meters = ()
+        if _cputime:
+            _meters += (CpuMeter(),)
+        if _memory:
+            _meters += (MemoryMeter(MemoryMeter.TRACEMALLOC if _memory is True else _memory),)
+        return _meters
+
+    def __meter(self, _clockname, _type):
+        for _meter in self._readclock(_clockname).meters:
+            if isinstance(_meter, _type):
+                return _meter
+        return None
+
+    def _endlap(self, _clock, _laptotal, _lapstart, _metered=True):
+        if self._overhead:
+            _laptotal = _laptotal - self._overhead if _laptotal > self._overhead else 0
+            _clock.corrected += _laptotal
+        if _clock.histogram is not None:
+            _clock.histogram.record(_laptotal)
+        if _clock.sampler is not None:
+            _clock.sampler.observe(_laptotal)
+        if self._recordlapdetail:
+            if _clock.lapdetail is None:
+                _clock.lapdetail = self._newlapstore(_clock)
+            _extra = ()
+            if _metered:
+                for _meter in _clock.meters:
+                    _extra += _meter.lap(NS_PER_SEC)
+            _clock.lapdetail.append(_laptotal / NS_PER_SEC, (_lapstart - self._epoch) / NS_PER_SEC, _extra)
+
+    def _recordlap(self, _clock, _begin, _end):
+        """
+        Record a complete lap timed outside of start/stop, leaving the clock's own start/stop state alone
+        :param _clock: clock record
+        :type _clock: Clock
+        :param _begin: lap start timestamp
+        :param _end: lap end timestamp
+        """
+        _clock.total += _end - _begin
+        _clock.laps += 1
+        _clock.currentlap += 1
+        if _clock.currentlap == 1:
+            self._used[_clock.name] = None
+        if _clock.end is not None or _clock.begin is None:
+            if not _clock.paused:
+                _clock.begin = _begin
+                _clock.end = _end
+        if self._sinks:
+            self._emit(_clock, EVENT_START, _begin)
+            self._emit(_clock, EVENT_STOP, _end)
+        if _clock.histogram is not None or _clock.sampler is not None or self._recordlapdetail or self._overhead:
+            # CPU, GC time and memory are only metered between start/unpause and pause/stop
+            self._endlap(_clock, _end - _begin, _begin, False)
+
+    def addsink(self, _sink):
+        """
+        Send every start, stop, pause and unpause of this stopwatch's clocks to a sink.  A sink is any object with
+        an event(clock name, event, timestamp, thread id) method; event is one of the EVENT_* constants and the
+        timestamp is in clock source nanoseconds.  Laps recorded whole (timeit, atime, clock blocks) are sent as a
+        start and a stop event
+        :param _sink: event sink, e.g. pyStopWatch.Trace.IntervalRecorder
+        """
+        self._sinks = self._sinks + (_sink,)
+
+    def removesink(self, _sink):
+        """
+        Stop sending events to a sink added with addsink
+        :param _sink: event sink
+        """
+        self._sinks = tuple(_added for _added in self._sinks if _added is not _sink)
+
+    def report(self, _reporter, _clockname=None, printlaps=True):
+        """
+        Send a clock's total (including a lap in progress) and lap count to a Reporter, which formats and emits it
+        from its own thread
+        :param _reporter: reporter
+        :type _reporter: pyStopWatch.Reporter.Reporter
+        :param _clockname: clock name
+        :type _clockname: str
+        :param printlaps: include the lap count
+        :return: False if the reporter dropped the record
+        :rtype: bool
+        """
+        _clockname = _clockname or self._defaultname
+        _clock = self._readclock(_clockname)
+        return _reporter.submit(_clock.title, self._totalns(_clockname), _clock.currentlap if printlaps else None)
+
+    def _emit(self, _clock, _event, _timestamp):
+        if _clock.name is None:
+            return
+        _thread = threading.get_ident()
+        for _sink in self._sinks:
+            _sink.event(_clock.name, _event, _timestamp, _thread)
+
+    def handle(self, _clockname=None):
+        """
+        Bound handle on a clock with start/stop/pause/unpause methods that skip the name lookup, for hot loops
+        :param _clockname: clock name
+        :type _clockname: str
+        :rtype: ClockHandle
+        """
+        return ClockHandle(self, _clockname or self._defaultname)
+
+    def atime(self, _clockname=None):
+        """
+        Time one lap of a clock for the current asyncio task:
+
+            async with sw.atime('fetch'):
+                await fetch()
+
+        Clocks in flight are tracked per task, so overlapping tasks can time the same clock.  When the event loop
+        was set up with pyStopWatch.AsyncTiming.instrument() the lap is also split into running and suspended time
+        (see clocktasksecs).  A clock added with sampling only times the laps its sampler picks
+        :param _clockname: clock name
+        :type _clockname: str
+        :return: async context manager
+        """
+        from .AsyncTiming import AsyncClockContext
+        _clockname = _clockname or self._defaultname
+        if _clockname not in self._clocks:
+            raise StopWatchException('Clock, {0}, does not exist'.format(_clockname))
+        return AsyncClockContext(self, _clockname)
+
+    def clock(self, _clockname):
+        """
+        Time one lap of a clock nested under the clock blocks already open in this thread or task:
+
+            with sw.clock('parse'):
+                with sw.clock('tokenize'):      # times clock 'parse/tokenize'
+                    ...
+
+        Nested clocks are added on first use (hidden, titled by their own name) and the same path always times into
+        the same clock.  A clock added with sampling only times the blocks its sampler picks.  See calltree and
+        hotpath
+        :param _clockname: clock name, relative to the enclosing clock block
+        :type _clockname: str
+        :return: context manager
+        """
+        return ClockContext(self, _clockname)
+
+    def _addtreeclock(self, _path, _title, _toplevel):
+        self.addclock(_path, _title, _display=_toplevel)
+        if _toplevel:
+            self._treeroots.add(_path)
+
+    def __calltree(self, _clocks=None, _totals=None):
+        if _clocks is None:
+            _now = self._now()
+            _clocks = list(self._readclocks())
+            _totals = [self._totalns(_clockname, _now) for _clockname, _clock in _clocks]
+        return buildtree(_clocks, _totals, self._treeroots)
+
+    def calltree(self):
+        """
+        Call trees of the clocks timed with clock blocks, keyed by top level clock name.  Each node holds its title,
+        inclusive and exclusive (self) seconds, laps and children
+        :rtype: dict
+        """
+        return dict((_node.name, _node.todict(NS_PER_SEC)) for _node in self.__calltree())
+
+    def hotpath(self, _clockname=None):
+        """
+        Follow the heaviest sub-phase down a call tree for as long as it dominates its parent's own time
+        :param _clockname: clock path to start from; defaults to the heaviest top level clock
+        :type _clockname: str
+        :return: (clock name, inclusive seconds, exclusive seconds) from the start down to the dominant sub-phase
+        :rtype: list of tuple
+        """
+        _roots = self.__calltree()
+        if not _roots:
+            return []
+        _node = _roots[0] if _clockname is None else findnode(_roots, _clockname)
+        return [(_step.path, _step.inclusive / NS_PER_SEC, _step.exclusive / NS_PER_SEC) for _step in hotpath(_node)]
+
+    def clocktasksecs(self, _clockname=None):
+        """
+        Get time asyncio tasks spent running on the event loop and suspended while timed by a clock
+        :param _clockname: clock name
+        :type _clockname: str
+        :return: {'running': seconds, 'suspended': seconds}, or None if never measured
+        :rtype: dict | None
+        """
+        _clock = self._readclock(_clockname)
+        if _clock.running is None:
+            return None
+        return {'running': _clock.running / NS_PER_SEC, 'suspended': _clock.suspended / NS_PER_SEC}
+
+    def clockcpusecs(self, _clockname=None):
+        """
+        Get process CPU, thread CPU and garbage collection time of a clock's completed running segments.  Wall time
+        well above CPU time points at blocking (I/O, locks, sleeping); GC time is part of the wall time
+        :param _clockname: clock name
+        :type _clockname: str
+        :return: {'cpu': seconds, 'threadcpu': seconds, 'gc': seconds}, or None if the clock does not measure CPU time
+        :rtype: dict | None
+        """
+        _meter = self.__meter(_clockname, CpuMeter)
+        return None if _meter is None else _meter.todict(NS_PER_SEC)
+
+    def clockmemory(self, _clockname=None):
+        """
+        Get memory recorded by a clock's completed running segments: net bytes allocated over all laps and the peak
+        above its starting point reached in any lap
+        :param _clockname: clock name
+        :type _clockname: str
+        :return: {'allocated': bytes, 'peak': bytes}, or None if the clock does not record memory
+        :rtype: dict | None
+        """
+        _meter = self.__meter(_clockname, MemoryMeter)
+        return None if _meter is None else _meter.todict(NS_PER_SEC)
 
     def pause(self, _clockname=None, overrideend=None):
         """
@@ -212,18 +994,25 @@ class StopWatch(object):
         :return:
         """
         _clockname = _clockname or self._defaultname
-        _end = overrideend or datetime.utcnow()
-        if self.ispaused(_clockname):
+        self._pauseclock(self._clocks[_clockname], overrideend, _clockname)
+
+    def _pauseclock(self, _clock, _end, _clockname):
+        if _clock.skipped:
+            return
+        _end = self._now() if _end is None else totimestamp(_end, self._now)
+        if _clock.paused:
             raise StopWatchException('StopWatch clock, {0}, is already paused.  It must be unpaused first.'
                                      .format(_clockname))
-        elif self.isstarted(_clockname):
-            self._clocks[_clockname]['end'] = _end
-            self._clocks[_clockname]['total'] += \
-                (_end - self._clocks[_clockname]['begin']).total_seconds()
-
-            self._clocks[_clockname]['paused'] = True
-            if self._recordlapdetail:
-                self._clocks[_clockname]['lapdetail'][-1].pause(_end)
+        elif _clock.begin is not None and _clock.end is None:
+            _clock.end = _end
+            _clock.total += _end - _clock.begin
+            _clock.laptotal += _end - _clock.begin
+            _clock.paused = True
+            for _meter in _clock.meters:
+                _meter.end()
+            self._paused[_clock.name] = None
+            if self._sinks:
+                self._emit(_clock, EVENT_PAUSE, _end)
         else:
             raise StopWatchException('StopWatch clock, {0}, is already stopped.  It must be started first.'
                                      .format(_clockname))
@@ -235,17 +1024,21 @@ class StopWatch(object):
         :param overridestart:
         :return:
         """
-        if not _clockname:
-            _clockname = self._defaultname
-        _start = overridestart or datetime.utcnow()
-        if self.ispaused(_clockname):
-            self._clocks[_clockname].update({
-                'begin': _start,
-                'end': None,
-                'paused': False
-            })
-            if self._recordlapdetail:
-                self._clocks[_clockname]['lapdetail'][-1].unpause(_start)
+        self._unpauseclock(self._clocks[_clockname or self._defaultname], overridestart)
+
+    def _unpauseclock(self, _clock, _start=None):
+        if _clock.skipped:
+            return
+        if _clock.paused:
+            _start = self._now() if _start is None else totimestamp(_start, self._now)
+            if self._sinks:
+                self._emit(_clock, EVENT_UNPAUSE, _start)
+            _clock.begin = _start
+            _clock.end = None
+            _clock.paused = False
+            for _meter in _clock.meters:
+                _meter.begin()
+            self._paused.pop(_clock.name, None)
         else:
             raise StopWatchException('StopWatch is not paused')
 
@@ -255,34 +1048,60 @@ class StopWatch(object):
         :param _clockname:
         :return:
         """
-        clockname = _clockname or self._defaultname
-        return self._clocks[clockname]['paused']
-
+        return self._readclock(_clockname).paused
 
     def stopall(self):
         """
         Stop all clocks at same time
         """
-        _stop = datetime.utcnow()
-        for _clock in self._clocks:
-            if self.isstarted(_clock):
-                self.stop(_clock, overrideend=_stop)
+        _stop = self._now()
+        for _clockname in list(self._started) + list(self._skipped):
+            self._stopclock(self._clocks[_clockname], _stop)
 
     def reset(self, _clockname=None):
         """Resets the StopWatch like it was never used
         :param _clockname: clock to reset
         :type _clockname: str
         """
-        if not _clockname:
-            _clockname = self._defaultname
-        self._clocks.update(self.__init_clock(_clockname, self._clocks[_clockname]['title']))
+        _clockname = _clockname or self._defaultname
+        self._clocks[_clockname].reset()
+        self._reindex(_clockname)
 
     def resetall(self):
         """
         Reset all clocks
         """
-        for _clock in self._clocks:
-            self.reset(_clock)
+        for _clock in self._clocks.values():
+            _clock.reset()
+        self._started.clear()
+        self._paused.clear()
+        self._used.clear()
+        self._skipped.clear()
+
+    def _reindex(self, _clockname):
+        """
+        Bring the state indexes up to date for a clock changed outside the start/stop/pause/unpause transitions
+        :param _clockname: clock name
+        :type _clockname: str
+        """
+        for _index in (self._started, self._paused, self._used, self._skipped):
+            _index.pop(_clockname, None)
+        _clock = self._clocks.get(_clockname)
+        for _prefix, _names in self._prefixes.items():
+            if _clockname is not None and _clockname.startswith(_prefix):
+                _names.pop(_clockname, None)
+                if _clock is not None:
+                    _names[_clockname] = None
+        if _clock is None:
+            return
+        if _clock.everused():
+            self._used[_clockname] = None
+        if _clock.isstarted():
+            self._started[_clockname] = None
+        if _clock.paused:
+            self._paused[_clockname] = None
+        if _clock.skipped:
+            self._skipped[_clockname] = None
 
     def isstarted(self, _clockname=None):
         """Determines if StopWatch is started
@@ -294,11 +1113,7 @@ class StopWatch(object):
         :return: StopWatch start status
         :rtype: bool
         """
-        if not _clockname:
-            _clockname = self._defaultname
-        if self._clocks[_clockname]['begin'] is not None and self._clocks[_clockname]['end'] is None or self._clocks[_clockname]['paused']:
-            return True
-        return False
+        return self._readclock(_clockname).isstarted()
 
     def startedclocks(self):
         """
@@ -306,7 +1121,7 @@ class StopWatch(object):
         :return: clocks running
         :rtype: list
         """
-        return [_clock for _clock in self._clocks if self.isstarted(_clock)]
+        return list(self._started)
 
     def stoppedclocks(self):
         """
@@ -314,7 +1129,7 @@ class StopWatch(object):
         :return: clocks stopped
         :rtype: list
         """
-        return [_clock for _clock in self._clocks if self.isstopped(_clock)]
+        return [_clockname for _clockname in self._clocks if _clockname not in self._started]
 
     def pausedclocks(self):
         """
@@ -322,7 +1137,7 @@ class StopWatch(object):
         :return: clocks stopped
         :rtype: list
         """
-        return [_clock for _clock in self._clocks if self.ispaused(_clock)]
+        return list(self._paused)
 
     def isstopped(self, _clockname=None):
         """Determines if StopWatch is started and not stopped
@@ -334,11 +1149,7 @@ class StopWatch(object):
         :return: StopWatch stop status
         :rtype: bool
         """
-        _clockname = _clockname or self._defaultname
-        if self._clocks[_clockname]['end'] is not None and self._clocks[_clockname]['begin'] is not None and self._clocks[_clockname]['paused'] is False \
-                or not self.everused(_clockname):
-            return True
-        return False
+        return self._readclock(_clockname).isstopped()
 
     def everused(self, _clockname=None):
         """Determines if the StopWatch has ever been started or started again since last reset
@@ -347,10 +1158,7 @@ class StopWatch(object):
         :return: StopWatch used status
         :rtype: bool
         """
-        _clockname = _clockname or self._defaultname
-        if self.clocklapcount(_clockname) > 0 or self._clocks[_clockname]['begin'] is not None:
-            return True
-        return False
+        return self._readclock(_clockname).everused()
 
     def availableclocks(self):
         """
@@ -363,26 +1171,141 @@ class StopWatch(object):
         """
         gets clocks that are currently in use
         """
-        return [_clock for _clock in self._clocks if self.everused(_clock)]
+        return list(self._used)
 
     def haslapdetail(self):
         return self._recordlapdetail
 
     def lapdetail(self,lapnumber,_clockname=None):
-        if not _clockname:
-            _clockname = self._defaultname
+        """
+        Get detail for a lap.  The lap in progress is available while the clock is running; completed laps are
+        available while retained by the lap retention policy
+        :param lapnumber: 1 based lap number
+        :type lapnumber: int
+        :param _clockname: clock name
+        :type _clockname: str
+        :return: lap total and start offset in seconds and lap state, plus cpu, threadcpu and gc seconds for clocks
+                 measuring CPU time (up to the last pause for the lap in progress)
+        :rtype: dict
+        """
+        _clock = self._readclock(_clockname, True)
 
         if self._recordlapdetail is False:
             raise StopWatchException('Lap detail not recorded')
-        elif lapnumber <= 0 or lapnumber > len(self._clocks[_clockname]['lapdetail']):
+        elif lapnumber == _clock.currentlap and _clock.isstarted():
+            _detail = {
+                'total': _clock.laptotal / NS_PER_SEC,
+                'start': (_clock.lapstart - self._epoch) / NS_PER_SEC,
+                'ispaused': _clock.paused,
+                'isstarted': True
+            }
+            for _meter in _clock.meters:
+                _detail.update(zip(_meter.COLUMNS, _meter.lap(NS_PER_SEC)))
+            return _detail
+        elif _clock.lapdetail is None or not _clock.lapdetail.isretained(lapnumber):
             raise StopWatchException('Lap {0} is invalid'.format(lapnumber))
         else:
-            _lapobj = self._clocks[_clockname]['lapdetail'][lapnumber-1]
-            return {
-                'total': _lapobj.laptotalsecs(),
-                'ispaused': _lapobj.ispaused(),
-                'isstarted': _lapobj.isstarted()
+            _total, _offset = _clock.lapdetail.lap(lapnumber)
+            _detail = {
+                'total': _total,
+                'start': _offset,
+                'ispaused': False,
+                'isstarted': False
             }
+            _detail.update(_clock.lapdetail.lapextra(lapnumber))
+            return _detail
+
+    def laptotals(self, _clockname=None):
+        """
+        Get the retained lap totals for a clock, oldest first
+        :param _clockname: clock name
+        :type _clockname: str
+        :return: lap totals in seconds as a NumPy array when NumPy is available otherwise array('d')
+        """
+        if self._recordlapdetail is False:
+            raise StopWatchException('Lap detail not recorded')
+        _store = self._readclock(_clockname, True).lapdetail or LapStore(self._lapretention)
+        return _store.laptotals()
+
+    def snapshot(self, _tag=None, _prefix=None):
+        """
+        Compact, picklable copy of every clock's totals, laps, histogram and lap detail, for example to send a
+        worker process's timings back to its parent.  Laps in progress are counted up to now.  Combine snapshots
+        with merge()
+        :param _tag: only include clocks with this tag
+        :param _prefix: only include clocks whose name starts with this prefix
+        :return: snapshot
+        :rtype: dict
+        """
+        _now = self._now()
+        _clocks = []
+        for _clockname, _clock in self._readselected(_tag, _prefix, True):
+            _lapdetail = None
+            if _clock.lapdetail is not None:
+                _lapdetail = (_clock.lapdetail.laptotals().tobytes(), _clock.lapdetail.lapoffsets().tobytes())
+            _clocks.append((
+                _clockname,
+                _clock.title,
+                _clock.display,
+                self._totalns(_clockname, _now),
+                _clock.laps,
+                _clock.currentlap,
+                _clock.histogram.getstate() if _clock.histogram is not None else None,
+                _lapdetail,
+                (_clock.running, _clock.suspended) if _clock.running is not None else None
+            ))
+        return {
+            'version': SNAPSHOT_VERSION,
+            'title': self.title,
+            'clocks': _clocks
+        }
+
+    def save(self, _path, _binary=None, _tag=None, _prefix=None):
+        """
+        Write a snapshot of the clocks to a versioned JSON or binary file, to load (pyStopWatch.Snapshot.load) or
+        compare with another run later (python -m pyStopWatch diff)
+        :param _path: file to write
+        :type _path: str
+        :param _binary: write the binary form; None picks JSON for paths ending in .json and binary otherwise
+        :param _tag: only include clocks with this tag
+        :param _prefix: only include clocks whose name starts with this prefix
+        """
+        from .Snapshot import save
+        save(self.snapshot(_tag, _prefix), _path, _binary)
+
+    def merge(self, _snapshot):
+        """
+        Add the clocks of a snapshot (see snapshot()) to this stopwatch.  Clocks missing here are added; totals, lap
+        counts, histograms and lap detail of existing clocks are combined.  Merging the same snapshot twice counts
+        it twice
+        :param _snapshot: snapshot from this or another process
+        :type _snapshot: dict
+        """
+        if _snapshot.get('version') != SNAPSHOT_VERSION:
+            raise StopWatchException('Unsupported snapshot version, {0}'.format(_snapshot.get('version')))
+        for _clockname, _title, _display, _total, _laps, _currentlap, _histogram, _lapdetail, _tasktime \
+                in _snapshot['clocks']:
+            if _clockname not in self._clocks:
+                self.addclock(_clockname, _title, _display, _histogram is not None)
+            _other = Clock(_title, _display)
+            if _histogram is not None:
+                _other.histogram = Histogram.fromstate(_histogram)
+            _other.total, _other.laps, _other.currentlap = _total, _laps, _currentlap
+            if _currentlap:
+                _other.begin = _other.end = 0
+            if _tasktime is not None:
+                _other.addtasktime(*_tasktime)
+            _clock = self._writeclock(_clockname)
+            _clock.merge(_other)
+            self._reindex(_clockname)
+            if _lapdetail is not None and self._recordlapdetail:
+                if _clock.lapdetail is None:
+                    _clock.lapdetail = self._newlapstore(_clock)
+                _totals, _offsets = array('d'), array('d')
+                _totals.frombytes(_lapdetail[0])
+                _offsets.frombytes(_lapdetail[1])
+                for _lap, _offset in zip(_totals, _offsets):
+                    _clock.lapdetail.append(_lap, _offset)
 
     def reinitialize(self):
         """
@@ -405,55 +1328,35 @@ class StopWatch(object):
         :return:
         """
         if _clockname in self._clocks:
-            del self._clocks[_clockname]
+            self._clocks.pop(_clockname).removed = True
+            self._treeroots.discard(_clockname)
+            self._reindex(_clockname)
+            self.__untag(_clockname)
         else:
             raise StopWatchException('Clock, {0}, does not exist'.format(_clockname))
 
     @staticmethod
     def __humanreadabletime(_secs):
-        _days = _hrs = _mins = 0.0
-        _timestr = ''
-        if _secs >= 60.0:
-            _mins = _secs // 60.0
-            _secs %= 60.0
-        if _mins >= 60.0:
-            _hrs = _mins // 60.0
-            _mins %= 60.0
-        if _hrs >= 24.0:
-            _days = _hrs // 24.0
-            _hrs %= 24.0
-        if _days > 0:
-            _timestr = '{0}{1} days '.format(_timestr, int(_days))
-        if _hrs > 0:
-            _timestr = '{0}{1} hours '.format(_timestr, int(_hrs))
-        if _mins > 0:
-            _timestr = '{0}{1} minutes '.format(_timestr, int(_mins))
-        if _secs > 0:
-            _timestr = '{0}{1} seconds'.format(_timestr, '{0:f}'.format(_secs))
-        if not _timestr:
-            _timestr = '{0:f} seconds'.format(_secs)
-        return _timestr
+        return humanreadabletime(_secs)
 
     def get_clock_detail(self,_clockname=None):
-        if not _clockname:
-            _clockname = self._defaultname
-        if not self.everused(_clockname):
-            _msg = '{0}: StopWatch never used.'.format(self._clocks[_clockname]['title'])
-        elif self._clocks[_clockname]['end'] is None:
+        _clock = self._readclock(_clockname, True)
+        if not _clock.everused():
+            _msg = '{0}: StopWatch never used.'.format(_clock.title)
+        elif _clock.end is None:
             raise StopWatchException('StopWatch must be stopped before a duration can be calculated')
         else:
-            _timestr = self.__humanreadabletime(self._clocks[_clockname]['total'])
-            _msg = '{0}: Duration: {1}\n'.format(self._clocks[_clockname]['title'], _timestr)
+            _timestr = self.__humanreadabletime(_clock.total / NS_PER_SEC)
+            _msg = '{0}: Duration: {1}\n'.format(_clock.title, _timestr)
             _lapfmt = '    Lap {0}: {1}\n'
-            for _lapidx in range(len(self._clocks[_clockname]['lapdetail'])):
-                _lapobj = self._clocks[_clockname]['lapdetail'][_lapidx]
-                _msg += _lapfmt.format(_lapidx,_lapobj.laptotalsecs())
+            for _lapnumber, _total, _offset in _clock.lapdetail or ():
+                _msg += _lapfmt.format(_lapnumber, _total)
         return _msg
 
     def get_clock_summary(self, onlytime=False, _clockname=None, printlaps=True, json=False):
         """
         Retrieves the duration seen from start to _end.  Prepends a custom label if provided
-        :param json:
+        :param json: return a dict of title, total, laps and histogram statistics (if kept) instead of a string
         :param printlaps:
         :param onlytime: only return time portion
         :type onlytime: bool
@@ -462,31 +1365,85 @@ class StopWatch(object):
         :return: nicely formatted duration string
         :rtype: str
         """
-        if not _clockname:
-            _clockname = self._defaultname
-        if not self.everused(_clockname):
-            _msg = '{0}: StopWatch never used.'.format(self._clocks[_clockname]['title'])
-        elif self._clocks[_clockname]['end'] is None:
-            raise StopWatchException('StopWatch must be stopped before a duration can be calculated')
-        else:
-            _timestr = self.__humanreadabletime(self._clocks[_clockname]['total'])
-            if onlytime:
-                _msg = _timestr
-            else:
-                _msg = '{0}: Duration: {1}'.format(self._clocks[_clockname]['title'], _timestr)
-                if printlaps:
-                    _msg = '{0} in {1} lap(s)'.format(_msg, self._clocks[_clockname]['currentlap'])
+        _clockname = _clockname or self._defaultname
+        _clock = self._readclock(_clockname)
+        if json:
+            return self.__clockjson(_clock, self._totalns(_clockname))
+        return self.__clockstr(_clock, onlytime, printlaps)
+
+    def __clockjson(self, _clock, _totalns):
+        _msg = {
+            'title': _clock.title,
+            'total': _totalns / NS_PER_SEC,
+            'laps': _clock.currentlap
+        }
+        if self._overhead:
+            _msg['corrected'] = _clock.corrected / NS_PER_SEC
+        if _clock.histogram is not None:
+            _msg['histogram'] = _clock.histogram.summary()
+        if _clock.running is not None:
+            _msg['running'] = _clock.running / NS_PER_SEC
+            _msg['suspended'] = _clock.suspended / NS_PER_SEC
+        for _meter in _clock.meters:
+            _msg.update(_meter.todict(NS_PER_SEC))
+        if _clock.sampler is not None:
+            _msg['sampling'] = _clock.sampler.estimate()
         return _msg
 
+    def __clockstr(self, _clock, onlytime=False, printlaps=True):
+        if not _clock.everused():
+            return '{0}: StopWatch never used.'.format(_clock.title)
+        elif _clock.end is None:
+            raise StopWatchException('StopWatch must be stopped before a duration can be calculated')
+        _timestr = self.__humanreadabletime(_clock.total / NS_PER_SEC)
+        if onlytime:
+            return _timestr
+        _parts = ['{0}: Duration: {1}'.format(_clock.title, _timestr)]
+        if printlaps:
+            _parts.append(' in {0} lap(s)'.format(_clock.currentlap))
+        if self._overhead:
+            _parts.append(' (corrected {0})'.format(self.__humanreadabletime(_clock.corrected / NS_PER_SEC)))
+        if _clock.running is not None:
+            _parts.append(' (running {0:f} seconds, suspended {1:f} seconds)'.format(
+                _clock.running / NS_PER_SEC, _clock.suspended / NS_PER_SEC))
+        for _meter in _clock.meters:
+            _parts.append(' ({0})'.format(_meter.describe(NS_PER_SEC)))
+        if _clock.histogram is not None and _clock.histogram.count:
+            _parts.append(' ({0})'.format(self.__histogramstr(_clock.histogram)))
+        if _clock.sampler is not None:
+            _estimate = _clock.sampler.estimate()
+            _parts.append(' (sampled {0} of {1} calls, estimated {2:f} +/- {3:f} seconds)'.format(
+                _estimate['sampled'], _estimate['calls'], _estimate['estimated_total'], _estimate['error']))
+        return ''.join(_parts)
+
+    @staticmethod
+    def __histogramstr(_histogram):
+        _stats = _histogram.summary()
+        _parts = ['mean {0:f}'.format(_stats['mean']), 'stddev {0:f}'.format(_stats['stddev'])]
+        for _name, _percentile in PERCENTILES:
+            _parts.append('p{0:g} {1:f}'.format(_percentile, _stats[_name]))
+        _parts.append('max {0:f}'.format(_stats['max']))
+        return '{0} seconds'.format(', '.join(_parts))
+
     @property
     def summary(self):
         return self.get_summary()
 
-    def get_summary(self, json=False, _displayall=False,default_is_overall=False):
+    def get_summary(self, json=False, _displayall=False,default_is_overall=False, calltree=False, stream=None,
+                    tag=None, prefix=None):
         """
-        Get summary for stopwatch as a whole
+        Get summary for stopwatch as a whole.  Every clock is read once, as of a single timestamp, and the summary
+        is built in one pass over the clocks
+        :param calltree: include the call trees of nested clock blocks (see clock)
+        :param stream: file-like object to write the summary to line by line instead of returning it; with json=True
+                       one clock entry per line, followed by the totals
+        :param tag: only summarize clocks with this tag
+        :param prefix: only summarize clocks whose name starts with this prefix
         :return: str
         """
+        _now = self._now()
+        _clocks = self._readselected(tag, prefix)
+        _totals = [self._totalns(_clockname, _now) for _clockname, _clock in _clocks]
         if json:
             _msg = {
                 'Overall': {
@@ -502,87 +1459,307 @@ class StopWatch(object):
                     'laps': 0
                 },
             }
-            for _clockname in self._clocks:
-                _clock = self._clocks[_clockname]
-                _msg['Combined']['total'] += self.clocktotalsecs(_clockname)
-                if _displayall or _clock['display']:
+            if stream is not None:
+                # each clock's entry is written as soon as it is built; the totals follow once all are counted
+                stream.write('{')
+                _sep = ''
+            for (_clockname, _clock), _total in zip(_clocks, _totals):
+                _secs = _total / NS_PER_SEC
+                _msg['Combined']['total'] += _secs
+                if _displayall or _clock.display:
                     if default_is_overall and _clockname == self._defaultname:
-                        _msg['Overall']['total'] = self.clocktotalsecs(_clockname)
+                        _msg['Overall']['total'] = _secs
                     elif not default_is_overall:
-                        _msg['Overall']['total'] += self.clocktotalsecs(_clockname)
-                    _msg[_clockname] = {
-                        'title': _clock['title'],
-                        'total': self.clocktotalsecs(_clockname),
-                        'laps': self.clocklapcount(_clockname)
-                    }
+                        _msg['Overall']['total'] += _secs
+                    if stream is None:
+                        _msg[_clockname] = self.__clockjson(_clock, _total)
+                    else:
+                        stream.write('{0}{1}: {2}\n'.format(_sep, _json.dumps(_clockname),
+                                                            _json.dumps(self.__clockjson(_clock, _total))))
+                        _sep = ', '
                 else:
                     _msg['Hidden']['count'] += 1
-                    _msg['Hidden']['total'] += self.clocktotalsecs(_clockname)
-                    _msg['Hidden']['laps'] += self.clocklapcount(_clockname)
+                    _msg['Hidden']['total'] += _secs
+                    _msg['Hidden']['laps'] += _clock.currentlap
+            if calltree:
+                _msg['calltree'] = dict((_node.name, _node.todict(NS_PER_SEC))
+                                        for _node in self.__calltree(_clocks, _totals))
+            if stream is not None:
+                for _key in ('Overall', 'Combined', 'Hidden', 'calltree'):
+                    if _key in _msg:
+                        stream.write('{0}{1}: {2}\n'.format(_sep, _json.dumps(_key), _json.dumps(_msg[_key])))
+                        _sep = ', '
+                stream.write('}')
+                return None
+            return _msg
+
+        if stream is None:
+            _lines = []
+            _write = _lines.append
         else:
-            _msg = 'Summary for {0} stop watch\n'.format(self.title)
-            _msg = '{0}{1}\n'.format(_msg, '=' * 90)
-            hiddencount = 0
-            hiddentime = 0.0
-            hiddenlaps = 0
-            _combined = 0
-            _overall = 0
-            for _clockname in self._clocks:
-                if _displayall or self._clocks[_clockname]['display']:
-                    _msg = '{0}{1}\n'.format(_msg, self.get_clock_summary(_clockname=_clockname))
-                else:
-                    hiddencount += 1
-                    hiddentime += self.clocktotalsecs(_clockname)
-                    hiddenlaps += self.clocklapcount(_clockname)
-                if default_is_overall and _clockname == self._defaultname:
-                    _overall = self.clocktotalsecs(_clockname)
-                elif not default_is_overall:
-                    _overall += self.clocktotalsecs(_clockname)
-                _combined += self.clocktotalsecs(_clockname)
-            if hiddencount > 0:
-                _msg = '{0}{4}\n{1} Hidden Clock(s): {2:f} seconds in {3} lap(s)\n'.format(_msg, hiddencount,
-                                                                                           hiddentime, hiddenlaps,
-                                                                                           '-' * 90)
-            _msg = '{0}{1}\n'.format(_msg, '=' * 90)
-            _msg = '{0}Total Duration: {1}'.format(_msg, self.__humanreadabletime(_overall))
-            if default_is_overall:
-                _msg = '{0}Total Duration (All Clocks): {1}'.format(_msg, self.__humanreadabletime(_combined))
-        return _msg
+            _write = stream.write
+        _write('Summary for {0} stop watch\n'.format(self.title))
+        _write('{0}\n'.format('=' * 90))
+        hiddencount = 0
+        hiddentime = 0
+        hiddenlaps = 0
+        _combined = 0
+        _overall = 0
+        for (_clockname, _clock), _total in zip(_clocks, _totals):
+            if _displayall or _clock.display:
+                _write('{0}\n'.format(self.__clockstr(_clock)))
+            else:
+                hiddencount += 1
+                hiddentime += _total
+                hiddenlaps += _clock.currentlap
+            if default_is_overall and _clockname == self._defaultname:
+                _overall = _total
+            elif not default_is_overall:
+                _overall += _total
+            _combined += _total
+        if hiddencount > 0:
+            _write('{0}\n{1} Hidden Clock(s): {2:f} seconds in {3} lap(s)\n'.format('-' * 90, hiddencount,
+                                                                                     hiddentime / NS_PER_SEC,
+                                                                                     hiddenlaps))
+        if calltree:
+            _tree = rendertree(self.__calltree(_clocks, _totals), NS_PER_SEC)
+            if _tree:
+                _write('{0}\nCall Tree\n'.format('-' * 90))
+                for _line in _tree:
+                    _write('{0}\n'.format(_line))
+        _write('{0}\n'.format('=' * 90))
+        _write('Total Duration: {0}'.format(self.__humanreadabletime(_overall / NS_PER_SEC)))
+        if default_is_overall:
+            _write('Total Duration (All Clocks): {0}'.format(self.__humanreadabletime(_combined / NS_PER_SEC)))
+        if stream is None:
+            return ''.join(_lines)
+        return None
+
+
+_CALIBRATION = {}
+
+
+def calibrate(_clocksource='perf_counter', _pairs=2001):
+    """
+    Overhead of timing an empty block with start/stop: the lap recorded for a start immediately followed by a stop.
+    Measured once per clock source and process as the median of _pairs laps
+    :param _clocksource: clock source name or callable returning integer nanoseconds
+    :param _pairs: start/stop pairs to time
+    :return: nanoseconds
+    :rtype: int
+    """
+    try:
+        return _CALIBRATION[_clocksource]
+    except KeyError:
+        pass
+    _sw = StopWatch('calibration', _clocksource=_clocksource)
+    _clock = _sw._clocks[_sw._defaultname]
+    _laps = []
+    for _pair in range(_pairs):
+        _sw.start()
+        _sw.stop()
+        _laps.append(_clock.laptotal)
+    _laps.sort()
+    _CALIBRATION[_clocksource] = _laps[len(_laps) // 2]
+    return _CALIBRATION[_clocksource]
+
 
+_timeitregistry = None
 
-def timeit(logger=None, level='debug'):
+
+def timeitregistry():
+    """
+    StopWatch holding the persistent clocks of functions decorated with timeit(persistent=True)
+    :rtype: StopWatch
+    """
+    global _timeitregistry
+    if _timeitregistry is None:
+        _timeitregistry = StopWatch('timeit', _defaulttitle='timeit', _defaultname='timeit')
+    return _timeitregistry
+
+
+def timeit(logger=None, level='debug', clocksource='perf_counter', persistent=False, interval=None, registry=None,
+           sample=None, overheadbudget=None, reporter=None):
     """
     decorator to time a function in general.  Takes optional logging module instance and logging level
     None means print to stdout
+    Coroutine functions are timed until the coroutine finishes (split into running and suspended time) and async
+    generator functions across all of their steps, excluding time the consumer holds each item.
+    With persistent=True no StopWatch is built per call.  Each decorated function gets one clock in a shared
+    registry that calls only accumulate into; the clock is reported every interval seconds (if given) or on demand
+    with the wrapper's report() method.
     :param level:
     :param logger:
+    :param clocksource: clock source name or callable returning integer nanoseconds (per call StopWatch only; a
+                        persistent clock uses the registry's clock source)
+    :param persistent: accumulate into a persistent clock per function instead of reporting every call
+    :param interval: with persistent, seconds between reports; None reports only on demand
+    :param registry: with persistent, StopWatch to keep the clocks in (defaults to timeitregistry()).  Use a
+                     ConcurrentStopWatch when the function is called from several threads
+    :param sample: only time every Nth call (int) or each call with probability p (float); untimed calls run the
+                   function directly.  Summaries report estimated totals for all calls
+    :param overheadbudget: sample adaptively so timing overhead stays near this fraction of the function's time
+    :param reporter: pyStopWatch.Reporter.Reporter to hand reports to instead of logging them on the calling thread
+                     (logger and level are then the reporter's)
     :return:
     """
 
+    def emit(_msg):
+        if logger:
+            getattr(logger, level.lower())(_msg)
+        else:
+            print(_msg)
+
     def decorator(func):
         """
 
         :param func:
         :return:
         """
+        _title = getattr(func, '__qualname__', func.__name__)
+        _sampler = None
+        if persistent:
+            _registry = registry if registry is not None else timeitregistry()
+            _clockname = '{0}.{1}'.format(func.__module__, _title)
+            if sample is not None or overheadbudget is not None:
+                _sampler = Sampler(sample or 1, overheadbudget,
+                                   _registry._samplecost() if overheadbudget is not None else None)
+
+            def addclock():
+                _registry.addclock(_clockname, _title)
+                _registry._clocks[_clockname].sampler = _sampler
+
+            if _clockname not in _registry.availableclocks():
+                addclock()
+            elif _sampler is not None:
+                _registry._clocks[_clockname].sampler = _sampler
+            _interval = None if interval is None else int(interval * NS_PER_SEC)
+            _next = [_registry._now() + (_interval or 0)]
+
+            def _getstopwatch():
+                return _registry
+
+            def report():
+                if reporter is not None:
+                    _registry.report(reporter, _clockname)
+                else:
+                    emit(_registry.get_clock_summary(_clockname=_clockname))
+
+            def record(_sw, _begin, _end, _tasktime=None):
+                try:
+                    _clock = _sw._writeclock(_clockname)
+                except KeyError:
+                    # clock was removed from the registry; start accumulating again
+                    addclock()
+                    _clock = _sw._writeclock(_clockname)
+                _sw._recordlap(_clock, _begin, _end)
+                if _tasktime is not None:
+                    _clock.addtasktime(*_tasktime)
+                if _interval is not None and _end >= _next[0]:
+                    _next[0] = _end + _interval
+                    report()
+        else:
+            _clockname = 'decorator'
+
+            def _getstopwatch():
+                return StopWatch(_defaultname='decorator', _defaulttitle=func.__name__, _clocksource=clocksource)
 
-        def wrapper(*args, **kwargs):
-            """
+            if sample is not None or overheadbudget is not None:
+                _sampler = Sampler(sample or 1, overheadbudget,
+                                   _getstopwatch()._samplecost() if overheadbudget is not None else None)
 
-            :param args:
-            :param kwargs:
-            :return:
-            """
-            _sw = StopWatch(_defaultname='decorator', _defaulttitle=func.__name__)
-            _sw.start()
-            _output = func(*args, **kwargs)
-            _sw.stop()
-            if logger:
-                getattr(logger, level.lower())(_sw.get_clock_summary(_clockname='decorator', printlaps=False))
+            def record(_sw, _begin, _end, _tasktime=None):
+                _clock = _sw._writeclock(_clockname)
+                _sw._recordlap(_clock, _begin, _end)
+                if _tasktime is not None:
+                    _clock.addtasktime(*_tasktime)
+                if _sampler is not None:
+                    _sampler.observe(_end - _begin)
+                if reporter is not None:
+                    reporter.submit(func.__name__, _clock.total)
+                else:
+                    emit(_sw.get_clock_summary(_clockname=_clockname, printlaps=False))
+
+        if inspect.iscoroutinefunction(func) or inspect.isasyncgenfunction(func):
+            from .AsyncTiming import timecoroutine, timeasyncgen
+            if inspect.isasyncgenfunction(func):
+                wrapper = timeasyncgen(func, _getstopwatch, record, _sampler)
             else:
-                print(_sw.get_clock_summary(_clockname='decorator', printlaps=False))
-            return _output
+                wrapper = timecoroutine(func, _getstopwatch, record, _sampler)
+        elif reporter is not None and not persistent:
+            # no StopWatch per call: the lap is handed straight to the reporter
+            _now = _getstopwatch()._now
+            _submit = reporter.submit
+            _skip = _sampler.skip if _sampler is not None else None
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if _skip is not None and _skip():
+                    return func(*args, **kwargs)
+                _begin = _now()
+                _output = func(*args, **kwargs)
+                _elapsed = _now() - _begin
+                if _sampler is not None:
+                    _sampler.observe(_elapsed)
+                _submit(func.__name__, _elapsed)
+                return _output
+        elif persistent and _sampler is not None:
+            _now = _registry._now
+            _skip = _sampler.skip
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if _skip():
+                    return func(*args, **kwargs)
+                _begin = _now()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    record(_registry, _begin, _now())
+        elif persistent:
+            _now = _registry._now
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                _begin = _now()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    record(_registry, _begin, _now())
+        elif _sampler is not None:
+            _skip = _sampler.skip
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if _skip():
+                    return func(*args, **kwargs)
+                _sw = _getstopwatch()
+                _sw.start(_clockname)
+                _output = func(*args, **kwargs)
+                _sw.stop(_clockname)
+                _sampler.observe(_sw._readclock(_clockname).total)
+                emit(_sw.get_clock_summary(_clockname=_clockname, printlaps=False))
+                return _output
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                """
+
+                :param args:
+                :param kwargs:
+                :return:
+                """
+                _sw = _getstopwatch()
+                _sw.start(_clockname)
+                _output = func(*args, **kwargs)
+                _sw.stop(_clockname)
+                emit(_sw.get_clock_summary(_clockname=_clockname, printlaps=False))
+                return _output
 
+        if persistent:
+            wrapper.report = report
+            wrapper.clockname = _clockname
+        wrapper.sampler = _sampler
         return wrapper
 
     return decorator
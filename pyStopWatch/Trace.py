@@ -0,0 +1,187 @@
+# coding=utf-8
+"""
+Lap timelines.  IntervalRecorder is a StopWatch sink that keeps every lap as an interval (clock, lap, start, end,
+pause segments, thread) so a run can be exported to a trace viewer: Chrome Trace Event JSON (chrome://tracing,
+Perfetto) or speedscope.  Exports are written to a file-like object one event at a time.
+"""
+
+import bisect
+import heapq
+import json
+import os
+import threading
+
+from .StopWatch import EVENT_START, EVENT_STOP, EVENT_PAUSE, EVENT_UNPAUSE
+
+
+class IntervalRecorder(object):
+    """
+    Sink keeping the intervals of every lap of a stopwatch's clocks:
+
+        recorder = IntervalRecorder()
+        sw.addsink(recorder)
+        ...
+        with open('run.json', 'w') as trace:
+            recorder.chrometrace(trace)
+
+    Each interval is (clock name, lap number, start, end, ((pause start, pause end), ...), thread id) with times in
+    clock source nanoseconds
+    """
+
+    def __init__(self, _title='pyStopWatch'):
+        """
+        :param _title: name shown by the trace viewer
+        :type _title: str
+        """
+        self.title = _title
+        self.intervals = []
+        # thread id -> [(start, -end of first segment, interval)] kept sorted, so exports need no sort
+        self._bythread = {}
+        self._open = {}
+        self._laps = {}
+        self._lock = threading.Lock()
+
+    def event(self, _clockname, _event, _timestamp, _thread):
+        """
+        Sink interface, see StopWatch.addsink
+        """
+        _key = (_clockname, _thread)
+        with self._lock:
+            if _event == EVENT_START:
+                _lap = self._laps[_clockname] = self._laps.get(_clockname, 0) + 1
+                self._open[_key] = [_lap, _timestamp, [], None]
+                return
+            _open = self._open.get(_key)
+            if _open is None:
+                # lap began before the recorder was added
+                return
+            if _event == EVENT_PAUSE:
+                _open[3] = _timestamp
+            elif _event == EVENT_UNPAUSE:
+                _open[2].append((_open[3], _timestamp))
+                _open[3] = None
+            elif _event == EVENT_STOP:
+                del self._open[_key]
+                if _open[3] is not None:
+                    _open[2].append((_open[3], _timestamp))
+                _interval = (_clockname, _open[0], _open[1], _timestamp, tuple(_open[2]), _thread)
+                self.intervals.append(_interval)
+                _firstend = _open[2][0][0] if _open[2] else _timestamp
+                bisect.insort(self._bythread.setdefault(_thread, []), (_open[1], -_firstend, _interval))
+
+    def clear(self):
+        """
+        Forget all recorded intervals
+        """
+        with self._lock:
+            self.intervals = []
+            self._bythread = {}
+            self._open.clear()
+            self._laps.clear()
+
+    def segments(self):
+        """
+        Running parts of the recorded laps, i.e. laps with their pauses cut out
+        :return: iterator of (clock name, lap number, start, end, thread id)
+        """
+        for _interval in self.intervals:
+            for _segment in self.__cut(_interval):
+                yield _segment
+
+    @staticmethod
+    def __cut(_interval):
+        _clockname, _lap, _start, _end, _pauses, _thread = _interval
+        for _pausestart, _pauseend in _pauses:
+            yield _clockname, _lap, _start, _pausestart, _thread
+            _start = _pauseend
+        if _end > _start:
+            yield _clockname, _lap, _start, _end, _thread
+
+    def __threadsegments(self, _thread):
+        """
+        Running segments of one thread ordered by start (longest first on ties).  Laps are kept in that order as
+        they are recorded; later segments of paused laps wait in a heap until their start comes up
+        :return: iterator of (clock name, lap number, start, end, thread id)
+        """
+        _later = []
+        for _start, _negend, _interval in self._bythread[_thread]:
+            while _later and _later[0][:2] <= (_start, _negend):
+                yield heapq.heappop(_later)[2]
+            for _segment in self.__cut(_interval):
+                heapq.heappush(_later, (_segment[2], -_segment[3], _segment))
+        while _later:
+            yield heapq.heappop(_later)[2]
+
+    def __origin(self):
+        return min(_laps[0][0] for _laps in self._bythread.values()) if self._bythread else 0
+
+    def chrometrace(self, _stream):
+        """
+        Write the recorded laps as Chrome Trace Event JSON, one complete ("X") event per running segment
+        :param _stream: file-like object opened for text
+        """
+        _origin = self.__origin()
+        _pid = os.getpid()
+        _stream.write('{"displayTimeUnit": "ns", "otherData": ')
+        _stream.write(json.dumps({'title': self.title}))
+        _stream.write(', "traceEvents": [\n')
+        _stream.write(json.dumps({'name': 'process_name', 'ph': 'M', 'pid': _pid, 'args': {'name': self.title}}))
+        for _clockname, _lap, _start, _end, _thread in self.segments():
+            _stream.write(',\n')
+            _stream.write(json.dumps({
+                'name': _clockname,
+                'cat': 'clock',
+                'ph': 'X',
+                'ts': (_start - _origin) / 1000.0,
+                'dur': (_end - _start) / 1000.0,
+                'pid': _pid,
+                'tid': _thread,
+                'args': {'lap': _lap}
+            }))
+        _stream.write('\n]}\n')
+
+    def speedscope(self, _stream):
+        """
+        Write the recorded laps as a speedscope file with one evented profile per thread.  Segments are nested in
+        the order they started; a segment outlasting the one it started in is cut off where that one ends.  Events
+        are written as they are generated from laps kept in start order per thread, so nothing is sorted or copied
+        :param _stream: file-like object opened for text
+        """
+        _origin = self.__origin()
+        _frames = {}
+        _stream.write('{"$schema": "https://www.speedscope.app/file-format-schema.json", "exporter": "pyStopWatch", ')
+        _stream.write('"name": {0}, "activeProfileIndex": 0, "profiles": ['.format(json.dumps(self.title)))
+        for _idx, _thread in enumerate(sorted(self._bythread)):
+            _stream.write('{0}\n{{"type": "evented", "name": {1}, "unit": "nanoseconds", "startValue": {2}, '
+                          '"events": ['.format(',' if _idx else '', json.dumps('thread {0}'.format(_thread)),
+                                               self._bythread[_thread][0][0] - _origin))
+            _last = _origin
+            for _eventidx, (_type, _frame, _at) in enumerate(self.__nest(self.__threadsegments(_thread), _frames)):
+                _stream.write('{0}{{"type": "{1}", "frame": {2}, "at": {3}}}'.format(
+                    ', ' if _eventidx else '', _type, _frame, _at - _origin))
+                _last = max(_last, _at)
+            _stream.write('], "endValue": {0}}}'.format(_last - _origin))
+        _names = sorted(_frames, key=_frames.get)
+        _stream.write('\n], "shared": {"frames": ')
+        _stream.write(json.dumps([{'name': _name} for _name in _names]))
+        _stream.write('}}\n')
+
+    @staticmethod
+    def __nest(_segments, _frames):
+        """
+        Open and close events for segments ordered by start, properly nested
+        :return: iterator of ('O' | 'C', frame index, timestamp)
+        """
+        _stack = []
+        for _clockname, _lap, _start, _end, _thread in _segments:
+            while _stack and _stack[-1][1] <= _start:
+                _frame, _closed = _stack.pop()
+                yield 'C', _frame, _closed
+            if _stack and _end > _stack[-1][1]:
+                _end = _stack[-1][1]
+            _frame = _frames.setdefault(_clockname, len(_frames))
+            yield 'O', _frame, _start
+            _stack.append((_frame, _end))
+        while _stack:
+            _frame, _closed = _stack.pop()
+            yield 'C', _frame, _closed
@@ -0,0 +1,11 @@
+# coding=utf-8
+"""
+python -m pyStopWatch diff base.json new.json [--threshold 0.1] [--metric mean] [--json]
+"""
+
+import sys
+
+from .Snapshot import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+# coding=utf-8
+"""
+Micro-benchmarks of StopWatch's own overhead and how it scales with the number of clocks.  Results are printed (or
+written) as JSON so runs of different versions can be compared:
+
+    python -m pyStopWatch.bench [--quick | --number N] [--clocks 10,1000,100000] [--output results.json]
+
+run() benchmarks any callable on a StopWatch clock, repeating batches until the mean is known precisely enough.
+"""
+
+import argparse
+import gc
+import json
+import math
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+from . import __version__
+from .StopWatch import StopWatch, NS_PER_SEC, calibrate, timeit as timeitdecorator
+from .Reporter import Reporter
+from .Sampler import Z95
+from .Statsd import StatsdSink
+
+# two sided 95% Student t critical values by degrees of freedom; Z95 beyond the table
+_T95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+        2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+
+class _NullLogger(object):
+    """
+    Logger that drops timeit's per call reports
+    """
+
+    def debug(self, _msg):
+        pass
+
+
+def _pernanos(_stmt, _globals, _number, _repeat=5):
+    """
+    Best of _repeat timings of _stmt, in nanoseconds per execution
+    :rtype: float
+    """
+    _timer = timeit.Timer(_stmt, globals=_globals)
+    return min(_timer.repeat(_repeat, _number)) / _number * 1e9
+
+
+def _once(_func):
+    """
+    Wall time of one call in seconds
+    :rtype: float
+    """
+    _begin = time.perf_counter()
+    _func()
+    return time.perf_counter() - _begin
+
+
+def percall(_number=200000):
+    """
+    Nanoseconds per start/stop (by name, through a handle, and with meters or a statsd sink) and pause/unpause pair
+    and per call of a timeit decorated no-op (less the bare call), reporting on the calling thread or through a
+    Reporter
+    :param _number: calls per repetition
+    :rtype: dict
+    """
+    _sw = StopWatch('bench')
+    _sw.addclock('bench', 'Bench')
+    _globals = {'sw': _sw}
+    _startstop = _pernanos('sw.start("bench"); sw.stop("bench")', _globals, _number)
+    _startstophandle = _pernanos('clock.start(); clock.stop()', {'clock': _sw.handle('bench')}, _number)
+    _sw.start('bench')
+    _pauseunpause = _pernanos('sw.pause("bench"); sw.unpause("bench")', _globals, _number)
+    _sw.stop('bench')
+    _lapdetail = StopWatch('bench', _recordlapdetail=True, _lapretention=1000)
+    _startstoplapdetail = _pernanos('sw.start(); sw.stop()', {'sw': _lapdetail}, _number)
+    _startstopcputime = _pernanos('sw.start(); sw.stop()', {'sw': StopWatch('bench', _cputime=True)}, _number)
+    _startstoprss = _pernanos('sw.start(); sw.stop()', {'sw': StopWatch('bench', _memory='rss')}, _number)
+    _tracing = tracemalloc.is_tracing()
+    _startstoptraced = _pernanos('sw.start(); sw.stop()', {'sw': StopWatch('bench', _memory=True)}, _number)
+    if not _tracing:
+        tracemalloc.stop()
+    _statsdsw = StopWatch('bench')
+    with StatsdSink(_port=9, _aggregate=True) as _statsd:
+        _statsdsw.addsink(_statsd)
+        _startstopstatsd = _pernanos('sw.start(); sw.stop()', {'sw': _statsdsw}, _number)
+
+    def _noop():
+        pass
+
+    _bare = _pernanos('f()', {'f': _noop}, _number)
+    _persistent = timeitdecorator(persistent=True, registry=StopWatch('bench'))(_noop)
+    _sampled = timeitdecorator(persistent=True, registry=StopWatch('bench'), sample=100)(_noop)
+    _percall = timeitdecorator(_NullLogger())(_noop)
+    with Reporter(_NullLogger(), _flushsize=1000, _maxsize=_number * 5) as _reporter:
+        _reported = _pernanos('f()', {'f': timeitdecorator(reporter=_reporter)(_noop)}, _number) - _bare
+    return {
+        'start_stop_ns': _startstop,
+        'start_stop_handle_ns': _startstophandle,
+        'pause_unpause_ns': _pauseunpause,
+        'start_stop_lapdetail_ns': _startstoplapdetail,
+        'start_stop_cputime_ns': _startstopcputime,
+        'start_stop_memory_rss_ns': _startstoprss,
+        'start_stop_memory_tracemalloc_ns': _startstoptraced,
+        'start_stop_statsd_ns': _startstopstatsd,
+        'calibrated_overhead_ns': calibrate(),
+        'timeit_persistent_ns': _pernanos('f()', {'f': _persistent}, _number) - _bare,
+        'timeit_sampled_ns': _pernanos('f()', {'f': _sampled}, _number) - _bare,
+        'timeit_percall_ns': _pernanos('f()', {'f': _percall}, max(1, _number // 20)) - _bare,
+        'timeit_reporter_ns': _reported,
+    }
+
+
+def scaling(_counts):
+    """
+    Seconds taken by addclock (all clocks), startall, stopall and get_summary for stopwatches of various sizes, and
+    by the state queries and stopall when only two clocks are in use and the tagged bulk operations on a tenth of them
+    :param _counts: clock counts to measure
+    :rtype: dict
+    """
+    _results = {}
+    for _count in _counts:
+        _sw = StopWatch('bench')
+        _names = ['clock{0}'.format(_idx) for _idx in range(_count)]
+
+        def _addclocks():
+            for _name in _names:
+                _sw.addclock(_name, _name)
+
+        _results[str(_count)] = _result = {
+            'addclock_s': _once(_addclocks),
+            'startall_s': _once(_sw.startall),
+            'stopall_s': _once(_sw.stopall),
+            'get_summary_s': _once(_sw.get_summary),
+            'get_summary_json_s': _once(lambda: _sw.get_summary(json=True)),
+        }
+        # state queries and stopall with only two of the clocks running
+        _sw.resetall()
+        _sw.start(_names[0])
+        _sw.start(_names[-1])
+        _sw.pause(_names[-1])
+        _result['startedclocks_2_s'] = _once(_sw.startedclocks)
+        _result['pausedclocks_1_s'] = _once(_sw.pausedclocks)
+        _result['usedclocks_2_s'] = _once(_sw.usedclocks)
+        _result['stopall_2_s'] = _once(_sw.stopall)
+        # bulk operations on a tagged tenth of the clocks
+        for _name in _names[::10]:
+            _sw.tagclock(_name, 'tenth')
+        _result['starttagged_tenth_s'] = _once(lambda: _sw.starttagged('tenth'))
+        _result['stoptagged_tenth_s'] = _once(lambda: _sw.stoptagged('tenth'))
+    return _results
+
+
+def lapdetailmemory(_laps=(1000, 10000, 100000)):
+    """
+    Bytes held by lap detail after recording increasing numbers of laps
+    :param _laps: lap counts to measure
+    :rtype: dict
+    """
+    _results = {}
+    for _count in _laps:
+        gc.collect()
+        tracemalloc.start()
+        _before = tracemalloc.get_traced_memory()[0]
+        _sw = StopWatch('bench', _recordlapdetail=True)
+        for _lap in range(_count):
+            _sw.start()
+            _sw.stop()
+        _used = tracemalloc.get_traced_memory()[0] - _before
+        tracemalloc.stop()
+        _results[str(_count)] = {'bytes': _used, 'bytes_per_lap': _used / float(_count)}
+        del _sw
+    return _results
+
+
+def _t95(_df):
+    return _T95[_df - 1] if _df <= len(_T95) else Z95
+
+
+def _median(_sorted):
+    _mid = len(_sorted) // 2
+    return _sorted[_mid] if len(_sorted) % 2 else (_sorted[_mid - 1] + _sorted[_mid]) / 2.0
+
+
+def _resolution(_clocksource):
+    """
+    Smallest interval a clock source can measure, in seconds: the larger of its tick and the start/stop overhead
+    :rtype: float
+    """
+    try:
+        _tick = time.get_clock_info(_clocksource).resolution
+    except (TypeError, ValueError):
+        _tick = 0.0
+    return max(_tick, calibrate(_clocksource) / float(NS_PER_SEC))
+
+
+def _stats(_percall, _outliers):
+    """
+    Mean, median, sample standard deviation and 95% confidence interval half width of per call times, leaving out
+    those more than _outliers scaled median absolute deviations from the median
+    :rtype: dict
+    """
+    _sorted = sorted(_percall)
+    _center = _median(_sorted)
+    _kept = _sorted
+    if _outliers and len(_sorted) > 2:
+        # 1.4826 scales the MAD to a standard deviation for normal data
+        _mad = 1.4826 * _median(sorted(abs(_value - _center) for _value in _sorted))
+        if _mad > 0:
+            _kept = [_value for _value in _sorted if abs(_value - _center) <= _outliers * _mad]
+    _count = len(_kept)
+    _mean = math.fsum(_kept) / _count
+    _stddev = math.sqrt(math.fsum((_value - _mean) ** 2 for _value in _kept) / (_count - 1)) if _count > 1 else 0.0
+    _ci = _t95(_count - 1) * _stddev / math.sqrt(_count) if _count > 1 else float('inf')
+    return {
+        'mean': _mean,
+        'median': _median(_kept),
+        'stddev': _stddev,
+        'min': _kept[0],
+        'max': _kept[-1],
+        'ci': _ci,
+        'ci_low': _mean - _ci,
+        'ci_high': _mean + _ci,
+        'ci_relative': _ci / _mean if _mean > 0 else float('inf'),
+        'batches': len(_sorted),
+        'outliers': len(_sorted) - _count,
+    }
+
+
+def run(_callable, _name='bench', _stopwatch=None, _warmup=0.1, _batchtime=0.01, _precision=0.01, _budget=10.0,
+        _minbatches=5, _maxbatches=1000, _outliers=3.5, _args=(), _kwargs=None):
+    """
+    Benchmark a callable: call it for _warmup seconds, pick the number of calls per batch (1, 2, 5, 10, 20, ...) so a
+    batch takes at least _batchtime and 1000 clock resolutions, then time batches as laps of clock _name until the 95%
+    confidence interval of the mean is within _precision of it, _budget seconds have passed or _maxbatches ran.
+    Batches more than _outliers scaled median absolute deviations from the median (GC pauses, preemption) are left
+    out of the statistics but stay in the clock's laps.
+
+        result = pyStopWatch.bench.run(lambda: parse(text), 'parse')
+        print('{mean:.3g}s +/- {ci:.2g}s per call'.format(**result))
+
+    :param _callable: function to benchmark, called as _callable(*_args, **_kwargs)
+    :param _name: clock name
+    :type _name: str
+    :param _stopwatch: StopWatch to record the batches in, one made with lap detail when None
+    :type _stopwatch: StopWatch
+    :param _warmup: seconds of calls before measuring
+    :type _warmup: float
+    :param _batchtime: least seconds per batch
+    :type _batchtime: float
+    :param _precision: wanted confidence interval half width relative to the mean
+    :type _precision: float
+    :param _budget: seconds to spend measuring at most, after warmup and autoranging
+    :type _budget: float
+    :param _minbatches: batches to time before checking the precision
+    :type _minbatches: int
+    :param _maxbatches: batches to time at most
+    :type _maxbatches: int
+    :param _outliers: rejection threshold in scaled median absolute deviations; 0 or None keeps every batch
+    :type _outliers: float
+    :return: per call seconds (mean, median, stddev, min, max, ci, ci_low, ci_high), ci_relative, batches, outliers,
+             number of calls per batch, calls, converged and the stopwatch
+    :rtype: dict
+    """
+    _kwargs = _kwargs or {}
+    if _stopwatch is None:
+        _stopwatch = StopWatch(_name, _recordlapdetail=True)
+    if _name not in _stopwatch.availableclocks():
+        _stopwatch.addclock(_name, _name)
+    _clock = _stopwatch.handle(_name)
+
+    _deadline = time.perf_counter() + _warmup
+    while True:
+        _callable(*_args, **_kwargs)
+        if time.perf_counter() >= _deadline:
+            break
+
+    _target = max(_batchtime, 1000 * _resolution(_stopwatch._clocksource))
+    _number = 1
+    while True:
+        _begin = time.perf_counter()
+        for _call in range(_number):
+            _callable(*_args, **_kwargs)
+        _elapsed = time.perf_counter() - _begin
+        if _elapsed >= _target:
+            break
+        if _elapsed <= 0:
+            # too quick for a coarse perf_counter to see at all
+            _number *= 10
+            continue
+        # next of 1, 2, 5, 10, 20, 50, ... at least an estimated tenth of the target
+        _step = _number
+        while True:
+            _step = _step * 5 // 2 if str(_step)[0] == '2' else _step * 2
+            if _step * _elapsed >= _number * _target / 10.0:
+                break
+        _number = _step
+
+    _first = _clock.lapcount()
+    # the record the handle's laps land in; its laptotal is the batch just timed, whatever the lap detail settings
+    _record = _stopwatch._writeclock(_name)
+    _percall = []
+    _result = None
+    _deadline = time.perf_counter() + _budget
+    _calls = range(_number)
+    while True:
+        _clock.start()
+        for _call in _calls:
+            _callable(*_args, **_kwargs)
+        _clock.stop()
+        _percall.append(_record.laptotal / float(NS_PER_SEC) / _number)
+        if len(_percall) >= _minbatches:
+            _result = _stats(_percall, _outliers)
+            if _result['ci_relative'] <= _precision:
+                _result['converged'] = True
+                break
+        if len(_percall) >= _maxbatches or time.perf_counter() >= _deadline:
+            _result = _stats(_percall, _outliers)
+            _result['converged'] = _result['ci_relative'] <= _precision
+            break
+    _result.update({
+        'name': _name,
+        'number': _number,
+        'calls': _number * (_clock.lapcount() - _first),
+        'stopwatch': _stopwatch,
+    })
+    return _result
+
+
+def runall(_counts=(10, 1000, 100000), _number=200000):
+    """
+    Run every benchmark
+    :rtype: dict
+    """
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'percall': percall(_number),
+        'scaling': scaling(_counts),
+        'lapdetail_memory': lapdetailmemory(),
+    }
+
+
+def main(_argv=None):
+    _parser = argparse.ArgumentParser(prog='python -m pyStopWatch.bench',
+                                      description='Measure StopWatch overhead and scaling; prints JSON')
+    _parser.add_argument('--clocks', default='10,1000,100000',
+                         help='comma separated clock counts for the scaling benchmarks')
+    _parser.add_argument('--quick', action='store_true', help='fewer calls per measurement')
+    _parser.add_argument('--number', type=int, help='calls per measurement of the per call benchmarks')
+    _parser.add_argument('--output', help='write the JSON here instead of stdout')
+    _args = _parser.parse_args(_argv)
+    _number = _args.number or (20000 if _args.quick else 200000)
+    _results = runall([int(_count) for _count in _args.clocks.split(',')], _number)
+    if _args.output:
+        with open(_args.output, 'w') as _output:
+            json.dump(_results, _output, indent=2)
+    else:
+        json.dump(_results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+asyncio Timing Test Definitions
+"""
+import asyncio
+import time
+import unittest
+from pyStopWatch.StopWatch import StopWatch, timeit
+from pyStopWatch.StopWatchException import StopWatchException
+from pyStopWatch import AsyncTiming
+
+
+class _Logger(object):
+    def __init__(self):
+        self.messages = []
+
+    def info(self, _msg):
+        self.messages.append(_msg)
+
+
+class AsyncTimingTestCase(unittest.TestCase):
+
+    def test_TimeitCoroutine(self):
+        logger = _Logger()
+
+        @timeit(logger, 'info')
+        async def _work():
+            time.sleep(0.05)
+            await asyncio.sleep(0.2)
+            return 'done'
+
+        self.assertTrue(asyncio.iscoroutinefunction(_work))
+        self.assertEqual('done', asyncio.run(_work()))
+        self.assertEqual(1, len(logger.messages))
+        self.assertIn('running 0.05', logger.messages[0])
+        self.assertIn('suspended 0.2', logger.messages[0])
+
+    def test_TimeitAsyncGenerator(self):
+        logger = _Logger()
+
+        @timeit(logger, 'info')
+        async def _produce():
+            for _item in range(3):
+                await asyncio.sleep(0.05)
+                yield _item
+
+        async def _consume():
+            _items = []
+            async for _item in _produce():
+                await asyncio.sleep(0.1)
+                _items.append(_item)
+            return _items
+
+        self.assertEqual([0, 1, 2], asyncio.run(_consume()))
+        self.assertIn('0.15', logger.messages[0], 'Consumer time should be excluded: {0}'.format(logger.messages[0]))
+
+    def test_OverlappingTasks(self):
+        stopwatch = StopWatch()
+        stopwatch.addclock('fetch', 'Fetch')
+
+        async def _fetch(_delay):
+            async with stopwatch.atime('fetch'):
+                time.sleep(0.01)
+                await asyncio.sleep(_delay)
+
+        async def _main():
+            AsyncTiming.instrument()
+            await asyncio.gather(*[_fetch(0.1) for _task in range(5)])
+
+        asyncio.run(_main())
+        self.assertEqual(5, stopwatch.clocklapcount('fetch'))
+        self.assertAlmostEqual(0.5, stopwatch.clocktotalsecs('fetch'), delta=0.1)
+        tasksecs = stopwatch.clocktasksecs('fetch')
+        self.assertAlmostEqual(0.05, tasksecs['running'], delta=0.02)
+        self.assertAlmostEqual(0.45, tasksecs['suspended'], delta=0.1)
+        self.assertIn('running', stopwatch.get_summary(json=True)['fetch'])
+
+    def test_SampledATime(self):
+        stopwatch = StopWatch()
+        stopwatch.addclock('fetch', 'Fetch', _sample=4)
+
+        async def _main():
+            for _call in range(20):
+                async with stopwatch.atime('fetch'):
+                    await asyncio.sleep(0)
+
+        asyncio.run(_main())
+        self.assertEqual(5, stopwatch.clocklapcount('fetch'))
+        sampling = stopwatch.get_clock_summary(_clockname='fetch', json=True)['sampling']
+        self.assertEqual(20, sampling['calls'])
+        self.assertEqual(5, sampling['sampled'])
+        self.assertGreater(sampling['estimated_total'], 0.0)
+
+    def test_NestedSameClockRaises(self):
+        stopwatch = StopWatch()
+
+        async def _main():
+            async with stopwatch.atime():
+                async with stopwatch.atime():
+                    pass
+
+        self.assertRaises(StopWatchException, asyncio.run, _main())
+        self.assertIsNone(stopwatch.clocktasksecs())
+
+    def test_TaskTimes(self):
+        async def _task():
+            time.sleep(0.02)
+            await asyncio.sleep(0.05)
+            return AsyncTiming.tasktimes()
+
+        async def _main():
+            AsyncTiming.instrument()
+            return await asyncio.create_task(_task())
+
+        times = asyncio.run(_main())
+        self.assertAlmostEqual(0.02, times['running'], delta=0.01)
+        self.assertAlmostEqual(0.05, times['suspended'], delta=0.03)
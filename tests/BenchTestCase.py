@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Benchmark Suite Test Definitions
+"""
+import json
+import os
+import tempfile
+import time
+import unittest
+from pyStopWatch import bench
+from pyStopWatch.StopWatch import StopWatch
+
+
+class BenchTestCase(unittest.TestCase):
+
+    def test_Output(self):
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        try:
+            self.assertEqual(0, bench.main(['--clocks', '10,20', '--number', '100', '--output', path]))
+            with open(path) as output:
+                results = json.load(output)
+        finally:
+            os.remove(path)
+        self.assertEqual(['10', '20'], sorted(results['scaling']))
+        self.assertGreater(results['percall']['start_stop_ns'], 0)
+        self.assertIn('timeit_persistent_ns', results['percall'])
+        self.assertGreater(results['lapdetail_memory']['1000']['bytes_per_lap'], 0)
+
+    def test_Run(self):
+        result = bench.run(time.sleep, 'sleep', _args=(0.0005,), _warmup=0, _batchtime=0.005, _precision=0.05,
+                           _budget=5)
+        self.assertGreaterEqual(result['number'], 5)
+        self.assertGreaterEqual(result['batches'], 5)
+        self.assertEqual(result['number'] * result['batches'], result['calls'])
+        self.assertEqual(result['batches'], result['stopwatch'].clocklapcount('sleep'))
+        self.assertGreaterEqual(result['mean'], 0.0005)
+        self.assertLessEqual(result['ci_low'], result['mean'])
+        self.assertGreaterEqual(result['ci_high'], result['mean'])
+
+    def test_RunOutliers(self):
+        # every call advances a fake clock; the fifth (the third timed batch) is a 1ms stall
+        now = [0]
+        steps = iter([1000, 1000, 1000, 1100, 1000000, 1100, 1000])
+
+        def call():
+            now[0] += next(steps, 1000)
+
+        sw = StopWatch('run', _recordlapdetail=True, _clocksource=lambda: now[0])
+        result = bench.run(call, 'call', sw, _warmup=0, _batchtime=0, _precision=0.2)
+        self.assertTrue(result['converged'])
+        self.assertEqual((1, 5, 1), (result['number'], result['batches'], result['outliers']))
+        self.assertAlmostEqual(1.05e-6, result['mean'])
+        self.assertAlmostEqual(1.05e-6, result['median'])
+        self.assertEqual(5, sw.clocklapcount('call'))
+        self.assertEqual(3, bench.run(call, 'call', sw, _warmup=0, _batchtime=0, _maxbatches=3)['calls'])
+        self.assertEqual(8, sw.clocklapcount('call'))
+
+    def test_RunWithoutLapDetail(self):
+        sw = StopWatch('plain')
+        result = bench.run(lambda: None, 'noop', sw, _warmup=0, _batchtime=0.001, _maxbatches=5)
+        self.assertEqual(5, sw.clocklapcount('noop'))
+        self.assertGreater(result['mean'], 0)
+
+    def test_RunCoarseClock(self):
+        # a perf_counter ticking every 10ms reads 0.0 for small batches of a trivial call
+        class CoarseTime(object):
+            def __getattr__(self, name):
+                return getattr(time, name)
+
+            @staticmethod
+            def perf_counter():
+                return int(time.perf_counter() * 100) / 100.0
+
+        saved = bench.time
+        bench.time = CoarseTime()
+        try:
+            result = bench.run(lambda: None, 'noop', _warmup=0, _batchtime=0.001, _maxbatches=5)
+        finally:
+            bench.time = saved
+        self.assertGreaterEqual(result['number'], 10)
+        self.assertEqual(5, result['batches'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Call Tree Test Definitions
+"""
+import unittest
+from pyStopWatch.StopWatch import StopWatch
+from pyStopWatch.ConcurrentStopWatch import ConcurrentStopWatch
+
+
+class FakeClock(object):
+    """
+    Clock source that only moves when advanced
+    """
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, _ns):
+        self.now += _ns
+
+
+class CallTreeTestCase(unittest.TestCase):
+
+    def build(self, _cls=StopWatch):
+        clock = FakeClock()
+        sw = _cls('tree', _clocksource=clock)
+        for _loop in range(2):
+            with sw.clock('parse'):
+                clock.advance(10)
+                with sw.clock('tokenize'):
+                    clock.advance(5)
+                    with sw.clock('regex'):
+                        clock.advance(100)
+                with sw.clock('emit'):
+                    clock.advance(20)
+        return sw
+
+    def test_Nesting(self):
+        sw = self.build()
+        self.assertEqual({'default', 'parse', 'parse/tokenize', 'parse/tokenize/regex', 'parse/emit'},
+                         set(sw.availableclocks()))
+        tree = sw.calltree()['parse']
+        self.assertAlmostEqual(270e-9, tree['inclusive'])
+        self.assertAlmostEqual(20e-9, tree['exclusive'])
+        self.assertEqual(2, tree['laps'])
+        tokenize = tree['children']['tokenize']
+        self.assertAlmostEqual(210e-9, tokenize['inclusive'])
+        self.assertAlmostEqual(10e-9, tokenize['exclusive'])
+        self.assertAlmostEqual(200e-9, tokenize['children']['regex']['exclusive'])
+        self.assertAlmostEqual(40e-9, tree['children']['emit']['inclusive'])
+
+    def test_HotPath(self):
+        sw = self.build()
+        self.assertEqual(['parse', 'parse/tokenize', 'parse/tokenize/regex'],
+                         [step[0] for step in sw.hotpath()])
+        self.assertEqual(['parse/emit'], [step[0] for step in sw.hotpath('parse/emit')])
+
+    def test_Summary(self):
+        sw = self.build()
+        summary = sw.get_summary(calltree=True)
+        self.assertIn('Call Tree\nparse: ', summary)
+        self.assertIn('\n    regex: ', summary)
+        self.assertNotIn('Call Tree', sw.get_summary())
+        self.assertIn('parse', sw.get_summary(json=True, calltree=True)['calltree'])
+
+    def test_SeparateStopWatches(self):
+        clock = FakeClock()
+        outer = StopWatch('outer', _clocksource=clock)
+        inner = StopWatch('inner', _clocksource=clock)
+        with outer.clock('request'):
+            with inner.clock('query'):
+                clock.advance(3)
+                with outer.clock('render'):
+                    clock.advance(1)
+        self.assertIn('query', inner.availableclocks())
+        self.assertIn('request/render', outer.availableclocks())
+
+    def test_Concurrent(self):
+        sw = self.build(ConcurrentStopWatch)
+        self.assertAlmostEqual(270e-9, sw.calltree()['parse']['inclusive'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+ConcurrentStopWatch Test Definitions
+"""
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pyStopWatch.ConcurrentStopWatch import ConcurrentStopWatch
+from pyStopWatch.StopWatchException import StopWatchException
+
+THREADS = 16
+LAPS = 2000
+
+
+class ConcurrentStopWatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # each thread's clock source advances by exactly 1ns per reading, so every start/stop pair adds 1ns
+        self._ticks = threading.local()
+        self.stopwatch = ConcurrentStopWatch(_recordlapdetail=True, _histogram=True, _clocksource=self.__tick)
+        self.stopwatch.addclock('shared', 'Shared Clock')
+
+    def __tick(self):
+        self._ticks.now = getattr(self._ticks, 'now', 0) + 1
+        return self._ticks.now
+
+    def __work(self, _index):
+        for _lap in range(LAPS):
+            self.stopwatch.start('shared')
+            self.stopwatch.stop('shared')
+        return _index
+
+    def test_Stress(self):
+        barrier = threading.Barrier(THREADS)
+
+        def _run(_index):
+            barrier.wait()
+            return self.__work(_index)
+
+        with ThreadPoolExecutor(THREADS) as pool:
+            self.assertEqual(list(range(THREADS)), list(pool.map(_run, range(THREADS))))
+        self.assertEqual(THREADS * LAPS, self.stopwatch.clocklapcount('shared'))
+        self.assertEqual(THREADS * LAPS / 1e9, self.stopwatch.clocktotalsecs('shared'))
+        summary = self.stopwatch.get_summary(json=True)
+        self.assertEqual(THREADS * LAPS, summary['shared']['laps'])
+        self.assertEqual(THREADS * LAPS, summary['shared']['histogram']['count'])
+        self.assertEqual(THREADS * LAPS, len(self.stopwatch.laptotals('shared')))
+        self.assertEqual(['default', 'shared'], sorted(self.stopwatch.stoppedclocks()))
+        # scalar and state queries fold totals only; lap detail is merged for the lap detail queries
+        self.assertIsNone(self.stopwatch._readclock('shared').lapdetail)
+        self.assertEqual(THREADS * LAPS, len(self.stopwatch._readclock('shared', True).lapdetail))
+
+    def test_SampledThreads(self):
+        self.stopwatch.addclock('sampled', 'Sampled', _sample=10)
+
+        def _run(_index):
+            for _call in range(100):
+                self.stopwatch.start('sampled')
+                self.stopwatch.stop('sampled')
+            self.stopwatch.stopall()
+
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(_run, range(4)))
+        # a thread arriving after the others must not reset the shared sampling statistics
+        late = threading.Thread(target=_run, args=(4,))
+        late.start()
+        late.join()
+        sampling = self.stopwatch.get_clock_summary(_clockname='sampled', json=True)['sampling']
+        self.assertEqual((500, 50), (sampling['calls'], sampling['sampled']))
+        self.assertEqual(50, self.stopwatch.clocklapcount('sampled'))
+
+    def test_OverlappingLaps(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def _hold():
+            self.stopwatch.start('shared')
+            started.set()
+            release.wait()
+            self.stopwatch.stop('shared')
+
+        worker = threading.Thread(target=_hold)
+        worker.start()
+        started.wait()
+        # same clock started in this thread while the worker's lap is in flight
+        self.stopwatch.start('shared')
+        self.assertTrue(self.stopwatch.isstarted('shared'))
+        self.assertRaises(StopWatchException, self.stopwatch.start, 'shared')
+        self.stopwatch.stop('shared')
+        self.assertTrue(self.stopwatch.isstarted('shared'), 'Worker lap should still be in flight')
+        release.set()
+        worker.join()
+        self.assertTrue(self.stopwatch.isstopped('shared'))
+        self.assertEqual(2, self.stopwatch.clocklapcount('shared'))
+
+    def test_CpuTime(self):
+        sw = ConcurrentStopWatch('cpu', _recordlapdetail=True)
+        sw.addclock('busy', 'Busy', _cputime=True)
+
+        def _busy():
+            sw.start('busy')
+            _end = time.thread_time() + 0.02
+            while time.thread_time() < _end:
+                pass
+            sw.stop('busy')
+
+        _threads = [threading.Thread(target=_busy) for _idx in range(2)]
+        for _thread in _threads:
+            _thread.start()
+        for _thread in _threads:
+            _thread.join()
+        self.assertGreaterEqual(sw.clockcpusecs('busy')['threadcpu'], 0.03)
+        self.assertGreater(sw.lapdetail(2, 'busy')['threadcpu'], 0.0)
+
+    def test_Handle(self):
+        sw = ConcurrentStopWatch('handles')
+        sw.addclock('shared', 'Shared Clock')
+        handle = sw.handle('shared')
+
+        def _work():
+            for _lap in range(100):
+                handle.start()
+                handle.stop()
+
+        with ThreadPoolExecutor(4) as _pool:
+            for _future in [_pool.submit(_work) for _idx in range(4)]:
+                _future.result()
+        self.assertEqual(400, sw.clocklapcount('shared'))
+        sw.removeclock('shared')
+        self.assertRaises(StopWatchException, handle.start)
+
+    def test_ResetAndRemove(self):
+        self.__work(0)
+        self.stopwatch.reset('shared')
+        self.assertFalse(self.stopwatch.everused('shared'))
+        self.__work(0)
+        self.stopwatch.removeclock('shared')
+        self.stopwatch.addclock('shared', 'Shared Clock')
+        self.assertEqual(0, self.stopwatch.clocklapcount('shared'))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Event Log Test Definitions
+"""
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+from pyStopWatch.StopWatch import StopWatch
+from pyStopWatch.ConcurrentStopWatch import ConcurrentStopWatch
+from pyStopWatch.EventLog import EventLogWriter, EventLog, RECORD
+
+
+class EventLogTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'run.events')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_Replay(self):
+        sw = StopWatch('log', _recordlapdetail=True, _clocksource=iter(range(0, 10 ** 6, 1000)).__next__)
+        sw.addclock('parse', 'Parse')
+        with EventLogWriter(self.path) as log:
+            sw.addsink(log)
+            for _lap in range(3):
+                sw.start('parse')
+                sw.pause('parse')
+                sw.unpause('parse')
+                sw.stop('parse')
+            sw.start()
+            sw.stop()
+        with EventLog(self.path) as log:
+            self.assertEqual(14, len(log))
+            self.assertEqual(['parse', 'default'], log.clocks)
+            self.assertEqual(('parse', 'start', 1000, threading.get_ident()), next(log.events()))
+            replayed = log.stopwatch()
+            self.assertEqual(sw.clocktotalsecs('parse'), replayed.clocktotalsecs('parse'))
+            self.assertEqual(3, replayed.clocklapcount('parse'))
+            self.assertEqual(1, replayed.clocklapcount())
+            self.assertEqual(list(sw.laptotals('parse')), list(replayed.laptotals('parse')))
+            self.assertAlmostEqual(sw.lapdetail(2, 'parse')['start'] - sw.lapdetail(1, 'parse')['start'],
+                                   replayed.lapdetail(2, 'parse')['start'] - replayed.lapdetail(1, 'parse')['start'])
+
+    def test_OpenLap(self):
+        sw = StopWatch('log')
+        sw.addclock('a', 'A')
+        with EventLogWriter(self.path) as log:
+            sw.addsink(log)
+            sw.start('a', 1000)
+            sw.stop('a', 2000)
+            sw.start('a', 5000)
+            sw.start('default', 6000)
+            log.flush()
+            with EventLog(self.path) as replay:
+                replayed = replay.stopwatch()
+                self.assertTrue(replayed.isstarted('a'))
+                self.assertEqual(2000 / 1e9, replayed.clocktotalsecs('a'))
+                self.assertEqual(0, replayed.clocktotalsecs())
+                self.assertEqual(0, replayed.lapdetail(1, 'a')['start'])
+
+    def test_FullNameTable(self):
+        sw = StopWatch('log', _clocksource=iter(range(0, 10 ** 6, 1000)).__next__)
+        sw.addclock('x', 'X')
+        # room for the default clock's name and one thread ident only
+        with EventLogWriter(self.path, _tablesize=21) as log:
+            sw.addsink(log)
+            sw.start()
+            sw.stop()
+            sw.start('x')
+            sw.stop('x')
+            self.assertFalse(sw.isstarted('x'))
+            self.assertEqual(2, log.dropped)
+        with EventLog(self.path) as replay:
+            self.assertEqual(['default'], replay.clocks)
+            self.assertEqual(1, replay.stopwatch().clocklapcount())
+
+    def test_Version1(self):
+        table = struct.pack('<BH', 0, 1) + b'a' + struct.pack('<BHQ', 1, 8, 7)
+        with open(self.path, 'wb') as logfile:
+            logfile.write(struct.pack('<8sIII', b'PYSWEVT\x00', 1, 20 + 32, len(table)) + table.ljust(32, b'\x00'))
+            for event, timestamp in ((0, 1000), (1, 4000)):
+                logfile.write(struct.pack('<IHBxq', 0, 0, event, timestamp))
+        with EventLog(self.path) as log:
+            self.assertEqual([('a', 'start', 1000, 7), ('a', 'stop', 4000, 7)], list(log.events()))
+            self.assertEqual(3000 / 1e9, log.stopwatch().clocktotalsecs('a'))
+
+    def test_PartialRecord(self):
+        sw = StopWatch('log')
+        with EventLogWriter(self.path) as log:
+            sw.addsink(log)
+            sw.start()
+            sw.stop()
+        with open(self.path, 'ab') as logfile:
+            logfile.write(b'\x00' * (RECORD.size // 2))
+        with EventLog(self.path) as log:
+            self.assertEqual(2, len(log))
+            self.assertEqual(1, log.stopwatch().clocklapcount())
+
+    def test_Threads(self):
+        sw = ConcurrentStopWatch('log')
+        sw.addclock('work', 'Work')
+        log = EventLogWriter(self.path)
+        sw.addsink(log)
+        # keep all threads alive together so their idents are distinct
+        barrier = threading.Barrier(4)
+
+        def work():
+            for _lap in range(100):
+                sw.start('work')
+                sw.stop('work')
+            barrier.wait()
+
+        threads = [threading.Thread(target=work) for _thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log.close()
+        with EventLog(self.path) as replay:
+            self.assertEqual(4, len(replay.threads))
+            replayed = replay.stopwatch()
+            self.assertEqual(400, replayed.clocklapcount('work'))
+            self.assertAlmostEqual(sw.clocktotalsecs('work'), replayed.clocktotalsecs('work'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Histogram Test Definitions
+"""
+import unittest
+from pyStopWatch.Histogram import Histogram
+
+
+class HistogramTestCase(unittest.TestCase):
+
+    def test_BucketBounds(self):
+        histogram = Histogram()
+        for value in list(range(0, 5000)) + [10 ** 6, 10 ** 9 + 7, 2 ** 40 - 1]:
+            low, width = histogram.bucketbounds(histogram.bucket(value))
+            self.assertTrue(low <= value < low + width, 'Value {0} outside its bucket'.format(value))
+
+    def test_Percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 100001):
+            histogram.record(value * 1000)
+        self.assertEqual(100000, histogram.count)
+        for percentile, expected in ((50, 50000000), (90, 90000000), (99, 99000000), (99.9, 99900000)):
+            got = histogram.percentile(percentile)
+            self.assertLess(abs(got - expected) / float(expected), 1.0 / 64,
+                            'p{0} off by more than the bucket precision: {1}'.format(percentile, got))
+        self.assertEqual(1000, histogram.min)
+        self.assertEqual(100000000, histogram.max)
+        self.assertAlmostEqual(50000500.0, histogram.mean)
+
+    def test_FixedMemory(self):
+        histogram = Histogram()
+        for value in range(100000):
+            histogram.record(1000000 + value % 1000)
+        buckets = len(histogram.counts)
+        for value in range(100000):
+            histogram.record(1000000 + value % 1000)
+        self.assertEqual(buckets, len(histogram.counts), 'Histogram grew with lap count')
+
+    def test_Summary(self):
+        histogram = Histogram()
+        self.assertEqual(0, histogram.summary()['count'])
+        histogram.record(2 * 10 ** 9)
+        histogram.record(4 * 10 ** 9)
+        summary = histogram.summary()
+        self.assertEqual(3.0, summary['mean'])
+        self.assertEqual(1.0, summary['stddev'])
+        self.assertEqual(4.0, summary['max'])
+        histogram.clear()
+        self.assertEqual(0, histogram.count)
+
+    def test_Merge(self):
+        left, right, combined = Histogram(), Histogram(), Histogram()
+        for value in range(1, 1001):
+            (left if value % 3 else right).record(value * 997)
+            combined.record(value * 997)
+        left.merge(right)
+        self.assertEqual(combined.count, left.count)
+        self.assertEqual(list(combined.counts), list(left.counts))
+        self.assertAlmostEqual(combined.mean, left.mean)
+        self.assertAlmostEqual(combined.stddev(), left.stddev())
+        self.assertEqual((combined.min, combined.max), (left.min, left.max))
+        self.assertRaises(ValueError, left.merge, Histogram(5))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+LapStore Test Definitions
+"""
+import unittest
+from pyStopWatch.LapStore import LapStore
+
+
+class LapStoreTestCase(unittest.TestCase):
+
+    def __fill(self, _store, _laps):
+        for _lap in range(1, _laps + 1):
+            _store.append(float(_lap), float(_lap * 10))
+        return _store
+
+    def test_KeepAll(self):
+        store = self.__fill(LapStore(), 5)
+        self.assertEqual(5, len(store))
+        self.assertEqual((3.0, 30.0), store.lap(3))
+        self.assertEqual([1.0, 2.0, 3.0, 4.0, 5.0], list(store.laptotals()))
+
+    def test_KeepNone(self):
+        store = self.__fill(LapStore(0), 5)
+        self.assertEqual(0, len(store))
+        self.assertEqual(5, store.count)
+        self.assertRaises(IndexError, store.lap, 5)
+        self.assertEqual([], list(store.laptotals()))
+
+    def test_RingBuffer(self):
+        store = self.__fill(LapStore(3), 7)
+        self.assertEqual(3, len(store))
+        self.assertEqual(5, store.firstlap())
+        self.assertRaises(IndexError, store.lap, 4)
+        self.assertEqual((6.0, 60.0), store.lap(6))
+        self.assertEqual([5.0, 6.0, 7.0], list(store.laptotals()))
+        self.assertEqual([50.0, 60.0, 70.0], list(store.lapoffsets()))
+        self.assertEqual([5, 6, 7], [_lapnumber for _lapnumber, _total, _offset in store])
+
+    def test_ExtraColumns(self):
+        store = LapStore(2, ('cpu', 'gc'))
+        store.append(1.0, 0.0, (0.5, 0.1))
+        store.append(2.0, 1.0)
+        store.append(3.0, 2.0, (2.5, 0.2))
+        self.assertEqual({'cpu': 0.0, 'gc': 0.0}, store.lapextra(2))
+        self.assertEqual([0.0, 2.5], list(store.column('cpu')))
+        self.assertRaises(IndexError, store.lapextra, 1)
+
+    def test_InvalidRetention(self):
+        self.assertRaises(ValueError, LapStore, -1)
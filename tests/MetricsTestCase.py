@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Metrics Test Definitions
+"""
+import unittest
+import urllib.request
+from pyStopWatch.StopWatch import StopWatch
+from pyStopWatch.Metrics import MetricsExporter, CONTENT_TYPE
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def stopwatch(self):
+        sw = StopWatch('api', _clocksource=iter(range(0, 10 ** 9, 1000)).__next__)
+        sw.addclock('db', 'Data "base"', _display=False, _histogram=True)
+        for _lap in range(3):
+            sw.start('db')
+            sw.stop('db')
+        sw.start()
+        sw.pause()
+        return sw
+
+    def test_Render(self):
+        text = MetricsExporter(self.stopwatch()).render()
+        lines = text.splitlines()
+        self.assertEqual('# EOF', lines[-1])
+        labels = 'stopwatch="api",clock="db",title="Data \\"base\\"",display="false"'
+        self.assertIn('stopwatch_clock_seconds_total{{{0}}} 3e-06'.format(labels), lines)
+        self.assertIn('stopwatch_clock_laps_total{{{0}}} 3'.format(labels), lines)
+        self.assertIn('stopwatch_clock_paused{stopwatch="api",clock="default",title="default",display="true"} 1',
+                      lines)
+        self.assertIn('stopwatch_clock_running{stopwatch="api",clock="default",title="default",display="true"} 0',
+                      lines)
+        self.assertIn('stopwatch_clock_lap_seconds_bucket{{{0},le="1e-06"}} 3'.format(labels), lines)
+        self.assertIn('stopwatch_clock_lap_seconds_bucket{{{0},le="+Inf"}} 3'.format(labels), lines)
+        self.assertIn('stopwatch_clock_lap_seconds_count{{{0}}} 3'.format(labels), lines)
+        self.assertIn('# TYPE stopwatch_clock_lap_seconds histogram', lines)
+
+    def test_RenderTagged(self):
+        sw = self.stopwatch()
+        sw.tagclock('db', 'storage')
+        lines = MetricsExporter(sw, _tag='storage').render().splitlines()
+        self.assertTrue(any('clock="db"' in _line for _line in lines))
+        self.assertFalse(any('clock="default"' in _line for _line in lines))
+        lines = MetricsExporter(sw, _clockprefix='def').render().splitlines()
+        self.assertFalse(any('clock="db"' in _line for _line in lines))
+
+    def test_Serve(self):
+        exporter = MetricsExporter(self.stopwatch())
+        exporter.start()
+        try:
+            response = urllib.request.urlopen('http://127.0.0.1:{0}/metrics'.format(exporter.port), timeout=5)
+            self.assertEqual(CONTENT_TYPE, response.headers['Content-Type'])
+            self.assertIn('stopwatch_clock_laps_total', response.read().decode('utf-8'))
+        finally:
+            exporter.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Reporter Test Definitions
+"""
+import threading
+import time
+import unittest
+from pyStopWatch.StopWatch import StopWatch, timeit
+from pyStopWatch.StopWatchException import StopWatchException
+from pyStopWatch.Reporter import Reporter, BLOCK
+
+
+class ListLogger(object):
+
+    def __init__(self, _delay=0.0):
+        self.messages = []
+        self.threads = set()
+        self.delay = _delay
+
+    def info(self, _msg):
+        time.sleep(self.delay)
+        self.threads.add(threading.get_ident())
+        self.messages.append(_msg)
+
+
+class ReporterTestCase(unittest.TestCase):
+
+    def test_Submit(self):
+        logger = ListLogger()
+        with Reporter(logger, 'info', _interval=60) as reporter:
+            self.assertTrue(reporter.submit('Parse', 1500000000, 3))
+            reporter.submit('Load', 2000000)
+            reporter.flush()
+            self.assertEqual(['Parse: Duration: 1.500000 seconds in 3 lap(s)', 'Load: Duration: 0.002000 seconds'],
+                             logger.messages)
+        self.assertFalse(reporter.submit('Late', 1))
+        self.assertEqual(1, reporter.dropped)
+
+    def test_BackgroundFlush(self):
+        logger = ListLogger()
+        reporter = Reporter(logger, 'info', _interval=60, _flushsize=5)
+        for _idx in range(5):
+            reporter.submit('Clock', _idx)
+        _deadline = time.time() + 5
+        while len(logger.messages) < 5 and time.time() < _deadline:
+            time.sleep(0.01)
+        self.assertEqual(5, len(logger.messages))
+        self.assertNotIn(threading.get_ident(), logger.threads)
+        reporter.submit('Interval', 0)
+        reporter.interval = 0.01
+        reporter._wake.set()
+        _deadline = time.time() + 5
+        while len(logger.messages) < 6 and time.time() < _deadline:
+            time.sleep(0.01)
+        self.assertEqual(6, len(logger.messages))
+        reporter.close()
+
+    def test_Policies(self):
+        logger = ListLogger(0.01)
+        with Reporter(logger, 'info', _interval=60, _flushsize=1000, _maxsize=10) as reporter:
+            for _idx in range(25):
+                reporter.submit('Clock', _idx)
+            self.assertEqual(15, reporter.dropped)
+        self.assertEqual(10, len(logger.messages))
+        logger = ListLogger(0.001)
+        with Reporter(logger, 'info', _interval=60, _flushsize=1000, _maxsize=10, _policy=BLOCK) as reporter:
+            for _idx in range(25):
+                self.assertTrue(reporter.submit('Clock', _idx))
+            self.assertEqual(0, reporter.dropped)
+        self.assertEqual(25, len(logger.messages))
+        self.assertRaises(StopWatchException, Reporter, _policy='spill')
+
+    def test_SlowLogger(self):
+        logger = ListLogger(0.05)
+        with Reporter(logger, 'info', _interval=60) as reporter:
+
+            @timeit(reporter=reporter)
+            def _noop(value):
+                return value
+
+            _begin = time.time()
+            self.assertEqual([0, 1, 2, 3], [_noop(value) for value in range(4)])
+            self.assertLess(time.time() - _begin, 0.15)
+        self.assertEqual(4, len(logger.messages))
+        self.assertTrue(logger.messages[0].startswith('_noop: Duration: '))
+
+    def test_StopWatchReport(self):
+        logger = ListLogger()
+        sw = StopWatch('report', _clocksource=iter(range(0, 10 ** 9, 250000000)).__next__)
+        sw.addclock('db', 'Database')
+        sw.start('db')
+        sw.stop('db')
+        registry = StopWatch('registry')
+        with Reporter(logger, 'info', _interval=60) as reporter:
+            sw.report(reporter, 'db')
+            sw.report(reporter, 'db', printlaps=False)
+
+            @timeit(persistent=True, registry=registry, reporter=reporter)
+            def _noop():
+                pass
+
+            _noop()
+            _noop.report()
+        self.assertEqual(['Database: Duration: 0.250000 seconds in 1 lap(s)', 'Database: Duration: 0.250000 seconds'],
+                         logger.messages[:2])
+        self.assertTrue(logger.messages[2].endswith('in 1 lap(s)'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Sampler Test Definitions
+"""
+import random
+import unittest
+from pyStopWatch.Sampler import Sampler
+
+
+class SamplerTestCase(unittest.TestCase):
+
+    def test_EveryNth(self):
+        sampler = Sampler(5)
+        timed = [not sampler.skip() for _call in range(20)]
+        self.assertEqual([True, False, False, False, False] * 4, timed)
+        self.assertEqual(20, sampler.calls)
+
+    def test_Probability(self):
+        random.seed(1)
+        sampler = Sampler(0.1)
+        timed = sum(1 for _call in range(100000) if not sampler.skip())
+        self.assertLess(abs(timed - 10000), 500)
+
+    def test_Estimate(self):
+        random.seed(2)
+        laps = [random.randint(1000, 3000) for _call in range(10000)]
+        sampler = Sampler(10)
+        for lap in laps:
+            if not sampler.skip():
+                sampler.observe(lap)
+        estimate = sampler.estimate()
+        self.assertEqual(1000, estimate['sampled'])
+        self.assertEqual(10000, estimate['estimated_laps'])
+        self.assertLess(abs(estimate['estimated_total'] - sum(laps) / 1e9), 2 * estimate['error'])
+        self.assertGreater(estimate['error'], 0.0)
+
+    def test_FullSampleHasNoError(self):
+        sampler = Sampler()
+        for lap in (100, 200, 300):
+            self.assertFalse(sampler.skip())
+            sampler.observe(lap)
+        self.assertEqual(0.0, sampler.estimate()['error'])
+        self.assertAlmostEqual(600e-9, sampler.estimate()['estimated_total'])
+
+    def test_Budget(self):
+        sampler = Sampler(_budget=0.01, _cost=1000)
+        sampler.skip()
+        sampler.observe(10000)
+        # timing costs 1000ns against 10000ns of work, so 1 call in 10 keeps the overhead at 1%
+        self.assertAlmostEqual(0.1, sampler.probability)
+
+    def test_InvalidRate(self):
+        self.assertRaises(ValueError, Sampler, 0)
+        self.assertRaises(ValueError, Sampler, 1.5)
+        self.assertRaises(ValueError, Sampler, 1, 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Cross-process aggregation Test Definitions
+"""
+import multiprocessing
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pyStopWatch.StopWatch import StopWatch
+from pyStopWatch.SharedClocks import SharedClocks, shared_memory
+
+WORKERS = 3
+LAPS = 100
+
+_worker = {}
+
+
+def _timedtask(_laps):
+    _sw = StopWatch(_histogram=True, _clocksource=iter(range(10 ** 9)).__next__)
+    _sw.addclock('work', 'Work')
+    for _lap in range(_laps):
+        _sw.start('work')
+        _sw.stop('work')
+    return _sw.snapshot()
+
+
+def _initshared(_shared):
+    _worker['sw'] = _shared.stopwatch(_clocksource=iter(range(10 ** 9)).__next__)
+
+
+def _sharedtask(_laps):
+    for _lap in range(_laps):
+        _worker['sw'].start('work')
+        _worker['sw'].stop('work')
+    return _laps
+
+
+class SharedClocksTestCase(unittest.TestCase):
+
+    def test_SnapshotMerge(self):
+        parent = StopWatch()
+        with ProcessPoolExecutor(WORKERS) as pool:
+            for snapshot in pool.map(_timedtask, [LAPS] * WORKERS):
+                parent.merge(pickle.loads(pickle.dumps(snapshot)))
+        self.assertEqual(WORKERS * LAPS, parent.clocklapcount('work'))
+        self.assertEqual(WORKERS * LAPS / 1e9, parent.clocktotalsecs('work'))
+        summary = parent.get_summary(json=True)
+        self.assertEqual(WORKERS * LAPS, summary['work']['laps'])
+        self.assertEqual(WORKERS * LAPS, summary['work']['histogram']['count'])
+        self.assertTrue(parent.isstopped('work'))
+
+    @unittest.skipIf(shared_memory is None, 'multiprocessing.shared_memory needs Python 3.8')
+    def test_SharedMemory(self):
+        shared = SharedClocks({'work': 'Work'}, WORKERS)
+        try:
+            with ProcessPoolExecutor(WORKERS, initializer=_initshared, initargs=(shared,)) as pool:
+                self.assertEqual(WORKERS * LAPS, sum(pool.map(_sharedtask, [LAPS] * WORKERS)))
+            parent = StopWatch()
+            parent.merge(shared.snapshot())
+        finally:
+            shared.unlink()
+        self.assertEqual(WORKERS * LAPS, parent.clocklapcount('work'))
+        self.assertEqual(WORKERS * LAPS / 1e9, parent.clocktotalsecs('work'))
+        self.assertIn('Work: Duration', parent.get_summary())
+
+    @unittest.skipIf(shared_memory is None, 'multiprocessing.shared_memory needs Python 3.8')
+    def test_ReplacedWorkers(self):
+        # one row, but every task runs in a fresh worker that claims it and releases it on exit
+        shared = SharedClocks({'work': 'Work'}, 1)
+        try:
+            with multiprocessing.Pool(1, initializer=_initshared, initargs=(shared,), maxtasksperchild=1) as pool:
+                self.assertEqual(5 * LAPS, sum(pool.map(_sharedtask, [LAPS] * 5, chunksize=1)))
+                pool.close()
+                pool.join()
+            parent = StopWatch()
+            parent.merge(shared.snapshot())
+        finally:
+            shared.unlink()
+        self.assertEqual(5 * LAPS, parent.clocklapcount('work'))
+
+    @unittest.skipIf(shared_memory is None, 'multiprocessing.shared_memory needs Python 3.8')
+    def test_Reset(self):
+        shared = SharedClocks({'work': 'Work', 'idle': 'Idle'}, 1)
+        try:
+            sw = shared.stopwatch(_clocksource=iter(range(10 ** 9)).__next__)
+            for _clockname in ('work', 'idle'):
+                sw.start(_clockname)
+                sw.stop(_clockname)
+            sw.reset('work')
+            self.assertEqual([0, 1], [clock[4] for clock in shared.snapshot()['clocks']])
+            sw.resetall()
+            self.assertEqual([0, 0], [clock[4] for clock in shared.snapshot()['clocks']])
+        finally:
+            shared.unlink()
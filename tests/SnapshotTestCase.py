@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Snapshot Test Definitions
+"""
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pyStopWatch.StopWatch import StopWatch
+from pyStopWatch.StopWatchException import StopWatchException
+from pyStopWatch.Snapshot import load, diff, main, stopwatch
+
+
+class SnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, _name):
+        return os.path.join(self.dir, _name)
+
+    def stopwatch(self, _lapns):
+        ticks = iter(range(0, 10 ** 12, _lapns))
+        sw = StopWatch('run', _recordlapdetail=True, _histogram=True, _clocksource=ticks.__next__)
+        sw.addclock('parse', 'Parse')
+        sw.addclock('load', 'Load', _display=False)
+        for _lap in range(10):
+            sw.start('parse')
+            sw.stop('parse')
+        sw.start('load')
+        sw.stop('load')
+        return sw
+
+    def test_RoundTrip(self):
+        sw = self.stopwatch(1000)
+        snapshot = sw.snapshot()
+        for _name in ('run.json', 'run.snap'):
+            sw.save(self.path(_name))
+            self.assertEqual(snapshot, load(self.path(_name)))
+        with open(self.path('run.json')) as _file:
+            self.assertEqual('pyStopWatch-snapshot', json.load(_file)['format'])
+        with open(self.path('run.snap'), 'rb') as _file:
+            self.assertEqual(b'PYSWSNP\x00', _file.read(8))
+        self.assertLess(os.path.getsize(self.path('run.snap')), os.path.getsize(self.path('run.json')))
+        restored = stopwatch(load(self.path('run.snap')))
+        self.assertEqual(10, restored.clocklapcount('parse'))
+        self.assertEqual(list(sw.laptotals('parse')), list(restored.laptotals('parse')))
+        with open(self.path('bad.json'), 'w') as _file:
+            _file.write('{"format": "other"}')
+        self.assertRaises(StopWatchException, load, self.path('bad.json'))
+
+    def test_Diff(self):
+        base, new = self.stopwatch(1000), self.stopwatch(1500)
+        rows = dict((_row['name'], _row) for _row in diff(base, new, 0.1))
+        self.assertTrue(rows['parse']['regression'])
+        self.assertAlmostEqual(0.5, rows['parse']['metrics']['mean']['relative'])
+        self.assertAlmostEqual(0.000005, rows['parse']['metrics']['total']['change'])
+        self.assertEqual(0, rows['parse']['metrics']['laps']['change'])
+        self.assertIn('p99', rows['parse']['metrics'])
+        self.assertFalse(diff(base, new, 0.6)[0]['regression'])
+        new.addclock('extra', 'Extra')
+        self.assertEqual('added', diff(base, new)[-1]['status'])
+
+    def test_Main(self):
+        self.stopwatch(1000).save(self.path('base.json'))
+        self.stopwatch(1050).save(self.path('new.snap'))
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            self.assertEqual(0, main(['diff', self.path('base.json'), self.path('new.snap')]))
+            self.assertEqual(1, main(['diff', '--threshold', '0.01', self.path('base.json'), self.path('new.snap')]))
+            self.assertEqual(2, main(['diff', self.path('base.json'), self.path('missing.json')]))
+        self.assertIn('parse: REGRESSION (mean)', stdout.getvalue())
+        self.assertIn('+5.0%', stdout.getvalue())
+        self.assertIn('regressed by more than 1.0%', stderr.getvalue())
+        _process = subprocess.run([sys.executable, '-m', 'pyStopWatch', 'diff', '--json', '--threshold', '0.01',
+                                   self.path('base.json'), self.path('new.snap')],
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                  cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(1, _process.returncode)
+        rows = json.loads(_process.stdout.decode('utf-8'))
+        self.assertEqual(['parse', 'load'], [_row['name'] for _row in rows if _row['regression']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Statsd Test Definitions
+"""
+import socket
+import unittest
+from pyStopWatch.StopWatch import StopWatch
+from pyStopWatch.Statsd import StatsdSink
+
+
+class StatsdTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.settimeout(5)
+        self.ticks = iter(range(0, 10 ** 12, 1000000))
+        self.sw = StopWatch('run', _clocksource=lambda: next(self.ticks))
+        self.sw.addclock('parse', 'Parse input')
+
+    def tearDown(self):
+        self.server.close()
+
+    def sink(self, **_kwargs):
+        sink = StatsdSink(_port=self.server.getsockname()[1], _interval=3600, _stopwatch=self.sw, **_kwargs)
+        self.sw.addsink(sink)
+        return sink
+
+    def receive(self, _count):
+        return [self.server.recv(65536).decode('utf-8') for _ in range(_count)]
+
+    def test_Laps(self):
+        with self.sink(_tags={'host': 'a'}) as sink:
+            self.sw.start('parse')
+            self.sw.pause('parse')
+            self.sw.unpause('parse')
+            self.sw.stop('parse')
+            sink.flush()
+            self.assertEqual(['stopwatch.parse:2|ms|#title:Parse_input,host:a'], self.receive(1))
+        self.assertEqual(1, sink.sent)
+
+    def test_Packing(self):
+        with self.sink(_mtu=100, _prefix='') as sink:
+            for _lap in range(20):
+                self.sw.start('parse')
+                self.sw.stop('parse')
+            sink.flush()
+            packets = self.receive(sink.sent)
+        self.assertGreater(len(packets), 1)
+        self.assertTrue(all(len(_packet) <= 100 for _packet in packets))
+        lines = '\n'.join(packets).split('\n')
+        self.assertEqual(20, len(lines))
+        self.assertTrue(all(_line == 'parse:1|ms|#title:Parse_input' for _line in lines))
+
+    def test_Aggregate(self):
+        with self.sink(_aggregate=True) as sink:
+            for _lap in range(100):
+                self.sw.start('parse')
+                self.sw.stop('parse')
+            self.sw.start('parse')
+            next(self.ticks)
+            self.sw.stop('parse')
+            sink.flush()
+            self.assertEqual(['stopwatch.parse:1.0099|ms|@0.00990099|#title:Parse_input\n'
+                              'stopwatch.parse.max:2|g|#title:Parse_input'], self.receive(1))
+            sink.flush()
+        self.assertEqual(1, sink.sent)
+
+
+if __name__ == '__main__':
+    unittest.main()
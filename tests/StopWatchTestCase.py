@@ -4,7 +4,8 @@
 StopWatch Test Definitions
 """
 import unittest
-from pyStopWatch.StopWatch import StopWatch
+from datetime import datetime, timedelta
+from pyStopWatch.StopWatch import StopWatch, Clock, Lap, timeit, timeitregistry
 from pyStopWatch.StopWatchException import StopWatchException
 import time
 
@@ -224,4 +225,473 @@ class StopWatchTestCase(unittest.TestCase):
         self.stopwatch = StopWatch()
         self.stopwatch.start()
         self.stopwatch.stop()
-        self.assertRaises(StopWatchException, self.stopwatch.lapdetail, 1)
\ No newline at end of file
+        self.assertRaises(StopWatchException, self.stopwatch.lapdetail, 1)
+
+    def test_ClockSource(self):
+        _ticks = iter([0, 0, 2500000000])
+        stopwatch = StopWatch(_clocksource=lambda: next(_ticks))
+        stopwatch.start()
+        stopwatch.stop()
+        self.assertEqual(2.5, stopwatch.clocktotalsecs(), 'Clock source not used for timing')
+        self.assertIsInstance(stopwatch._clocks['default'].total, int, 'Total not kept as integer nanoseconds')
+
+    def test_UnknownClockSource(self):
+        self.assertRaises(StopWatchException, StopWatch, _clocksource='bogus')
+
+    def test_OverrideTimes(self):
+        stopwatch = StopWatch(_clocksource='monotonic')
+        stopwatch.start(overridestart=1000)
+        stopwatch.stop(overrideend=1000 + 2 * 10 ** 9)
+        self.assertEqual(2.0, stopwatch.clocktotalsecs(), 'Integer overrides not honored')
+
+        stopwatch.reset()
+        stopwatch.start(overridestart=datetime.utcnow() - timedelta(seconds=2))
+        stopwatch.stop()
+        self.assertEqual(2, int(round(stopwatch.clocktotalsecs())), 'datetime override not honored')
+
+    def test_TimeitClockSource(self):
+        @timeit(logger=None, clocksource='process_time')
+        def _noop():
+            return 42
+        self.assertEqual(42, _noop())
+
+    def test_ClockRecord(self):
+        clock = Clock('Record', False)
+        self.assertFalse(hasattr(clock, '__dict__'), 'Clock record should not carry an instance dict')
+        self.assertIsNone(clock.lapdetail, 'Lap storage should only be created when used')
+
+        stopwatch = StopWatch()
+        stopwatch.addclock('hidden', 'Hidden Clock', False)
+        stopwatch.start('hidden')
+        stopwatch.stop('hidden')
+        self.assertIsNone(stopwatch._clocks['hidden'].lapdetail, 'Lap storage created without lap detail enabled')
+        stopwatch.reset('hidden')
+        self.assertFalse(stopwatch._clocks['hidden'].display, 'Reset lost the display flag')
+        self.assertFalse(stopwatch.everused('hidden'), 'Clock shows being used after reset')
+
+    def test_LapRetention(self):
+        _ticks = iter(range(0, 100 * 10 ** 9, 10 ** 9))
+        stopwatch = StopWatch(_recordlapdetail=True, _lapretention=2, _clocksource=lambda: next(_ticks))
+        for _lap in range(4):
+            stopwatch.start()
+            stopwatch.stop()
+        self.assertEqual(4, stopwatch.clocklapcount())
+        self.assertRaises(StopWatchException, stopwatch.lapdetail, 2)
+        self.assertEqual(1.0, stopwatch.lapdetail(4)['total'])
+        self.assertEqual(7.0, stopwatch.lapdetail(4)['start'])
+        self.assertEqual([1.0, 1.0], list(stopwatch.laptotals()))
+
+        stopwatch.start()
+        self.assertTrue(stopwatch.lapdetail(5)['isstarted'], 'Lap in progress not reported')
+        stopwatch.stop()
+        self.assertEqual('default: Duration: 5.000000 seconds\n    Lap 4: 1.0\n    Lap 5: 1.0\n',
+                         stopwatch.get_clock_detail())
+
+    def test_Histogram(self):
+        _ticks = iter(range(0, 100 * 10 ** 9, 10 ** 9))
+        stopwatch = StopWatch(_histogram=True, _clocksource=lambda: next(_ticks))
+        stopwatch.addclock('plain', 'Plain Clock', _histogram=False)
+        for _lap in range(3):
+            stopwatch.start()
+            stopwatch.stop()
+        summary = stopwatch.get_summary(json=True)
+        self.assertEqual(3, summary['default']['histogram']['count'])
+        self.assertEqual(1.0, summary['default']['histogram']['p99'])
+        self.assertNotIn('histogram', summary['plain'])
+        self.assertEqual(1.0, stopwatch.get_clock_summary(json=True)['histogram']['p50'])
+        self.assertIn('p99 1.000000', stopwatch.get_clock_summary())
+        stopwatch.reset()
+        self.assertEqual(0, stopwatch.get_clock_summary(json=True)['histogram']['count'])
+
+    def test_Snapshot(self):
+        _ticks = iter(range(0, 100 * 10 ** 9, 10 ** 9))
+        worker = StopWatch(_recordlapdetail=True, _histogram=True, _clocksource=lambda: next(_ticks))
+        worker.addclock('hidden', 'Hidden Clock', False)
+        for _lap in range(2):
+            worker.start('hidden')
+            worker.stop('hidden')
+        snapshot = worker.snapshot()
+
+        parent = StopWatch(_recordlapdetail=True)
+        parent.merge(snapshot)
+        parent.merge(snapshot)
+        self.assertEqual(4, parent.clocklapcount('hidden'))
+        self.assertEqual(4.0, parent.clocktotalsecs('hidden'))
+        self.assertEqual(4, parent.get_summary(json=True)['Hidden']['laps'])
+        self.assertEqual(1.0, parent.lapdetail(4, 'hidden')['total'])
+        self.assertEqual(4, parent.get_clock_summary(_clockname='hidden', json=True)['histogram']['count'])
+        self.assertRaises(StopWatchException, parent.merge, {'version': 0, 'clocks': []})
+
+    def test_TimeitPersistent(self):
+        messages = []
+
+        class _Logger(object):
+            def info(self, _msg):
+                messages.append(_msg)
+
+        @timeit(_Logger(), 'info', persistent=True)
+        def _double(_value):
+            """doubles"""
+            return _value * 2
+
+        self.assertEqual('_double', _double.__name__)
+        self.assertEqual('doubles', _double.__doc__)
+        self.assertEqual([2, 4, 6], [_double(_value) for _value in (1, 2, 3)])
+        self.assertEqual([], messages, 'Persistent timeit should not report every call')
+        self.assertEqual(3, timeitregistry().clocklapcount(_double.clockname))
+        _double.report()
+        self.assertEqual(1, len(messages))
+        self.assertIn('in 3 lap(s)', messages[0])
+
+        timeitregistry().removeclock(_double.clockname)
+        _double(1)
+        self.assertEqual(1, timeitregistry().clocklapcount(_double.clockname))
+
+    def test_TimeitInterval(self):
+        messages = []
+        registry = StopWatch('registry')
+
+        @timeit(None, persistent=True, interval=0, registry=registry)
+        def _noop():
+            pass
+
+        import builtins
+        _print = builtins.print
+        builtins.print = messages.append
+        try:
+            _noop()
+            _noop()
+        finally:
+            builtins.print = _print
+        self.assertEqual(2, len(messages))
+        self.assertEqual(2, registry.clocklapcount(_noop.clockname))
+
+    def test_SampledClock(self):
+        sw = StopWatch('sampled', _clocksource=iter(range(0, 10 ** 6, 10)).__next__)
+        sw.addclock('sampled', 'Sampled', _sample=3)
+        for _call in range(9):
+            sw.start('sampled')
+            sw.pause('sampled')
+            sw.unpause('sampled')
+            sw.stop('sampled')
+        self.assertEqual(3, sw.clocklapcount('sampled'))
+        sampling = sw.get_clock_summary(_clockname='sampled', json=True)['sampling']
+        self.assertEqual(9, sampling['calls'])
+        self.assertEqual(3, sampling['sampled'])
+        self.assertAlmostEqual(3 * sw.clocktotalsecs('sampled'), sampling['estimated_total'])
+        self.assertIn('sampled 3 of 9 calls', sw.get_clock_summary(_clockname='sampled'))
+        sw.reset('sampled')
+        self.assertEqual(0, sw.get_clock_summary(_clockname='sampled', json=True)['sampling']['calls'])
+
+    def test_SampledClockBlocks(self):
+        sw = StopWatch('sampled', _clocksource=iter(range(0, 10 ** 6, 10)).__next__)
+        sw.addclock('parse', 'Parse', _sample=10)
+        for _call in range(100):
+            with sw.clock('parse'):
+                with sw.clock('tokenize'):
+                    pass
+        self.assertEqual(10, sw.clocklapcount('parse'))
+        self.assertEqual(100, sw.clocklapcount('parse/tokenize'))
+        sampling = sw.get_clock_summary(_clockname='parse', json=True)['sampling']
+        self.assertEqual(100, sampling['calls'])
+        self.assertEqual(10, sampling['sampled'])
+        self.assertAlmostEqual(10 * sw.clocktotalsecs('parse'), sampling['estimated_total'])
+
+    def test_SampledClockStopAll(self):
+        sw = StopWatch('sampled', _clocksource=iter(range(0, 10 ** 6, 10)).__next__)
+        sw.addclock('s', 'Sampled', _sample=2, _tags=['t'])
+        sw.start('s')
+        sw.stop('s')
+        for _stop in (sw.stopall, lambda: sw.stoptagged('t')):
+            sw.start('s')       # skipped
+            _stop()
+            sw.start('s')
+            sw.stop('s')
+            self.assertFalse(sw.isstarted('s'))
+        self.assertEqual(3, sw.clocklapcount('s'))
+        sw.start('s')           # skipped, left open
+        sw.start('s')
+        sw.stop('s')
+        self.assertFalse(sw.isstarted('s'))
+
+    def test_OverheadSubtraction(self):
+        sw = StopWatch('corrected', _recordlapdetail=True, _subtractoverhead=300,
+                       _clocksource=iter(range(0, 10 ** 6, 1000)).__next__)
+        for _lap in range(4):
+            sw.start()
+            sw.stop()
+        sw.start(overridestart=100000)
+        sw.stop(overrideend=100200)
+        self.assertEqual(300, sw.overhead())
+        self.assertAlmostEqual(4200e-9, sw.clocktotalsecs())
+        self.assertAlmostEqual(2800e-9, sw.clockcorrectedsecs())
+        self.assertEqual([700e-9] * 4 + [0.0], list(sw.laptotals()))
+        summary = sw.get_clock_summary(json=True)
+        self.assertAlmostEqual(4200e-9, summary['total'])
+        self.assertAlmostEqual(2800e-9, summary['corrected'])
+        self.assertIn('(corrected ', sw.get_clock_summary())
+
+    def test_Calibrate(self):
+        from pyStopWatch.StopWatch import calibrate
+        overhead = calibrate()
+        self.assertGreater(overhead, 0)
+        self.assertLess(overhead, 10 ** 6)
+        self.assertEqual(overhead, StopWatch(_subtractoverhead=True).overhead())
+        self.assertEqual(0, StopWatch().overhead())
+
+    def test_StateIndexes(self):
+        sw = StopWatch('states')
+        for _idx in range(5):
+            sw.addclock('clock{0}'.format(_idx), 'Clock {0}'.format(_idx))
+        sw.start('clock1')
+        sw.start('clock3')
+        sw.pause('clock3')
+        self.assertEqual(['clock1', 'clock3'], sw.startedclocks())
+        self.assertEqual(['clock3'], sw.pausedclocks())
+        self.assertEqual(['default', 'clock0', 'clock2', 'clock4'], sw.stoppedclocks())
+        sw.unpause('clock3')
+        self.assertEqual([], sw.pausedclocks())
+        sw.stopall()
+        self.assertEqual([], sw.startedclocks())
+        self.assertEqual(['clock1', 'clock3'], sw.usedclocks())
+        sw.reset('clock1')
+        sw.removeclock('clock3')
+        self.assertEqual([], sw.usedclocks())
+        other = StopWatch('other')
+        other.addclock('clock2', 'Clock 2')
+        other.start('clock2')
+        other.stop('clock2')
+        sw.merge(other.snapshot())
+        self.assertEqual(['clock2'], sw.usedclocks())
+        sw.resetall()
+        self.assertEqual([], sw.usedclocks())
+
+    def test_TaggedClocks(self):
+        sw = StopWatch('tagged', _clocksource=iter(range(0, 10 ** 6, 1000)).__next__)
+        sw.addclock('db.read', 'DB read', _tags=['io'])
+        sw.addclock('db.write', 'DB write', _tags=['io', 'write'])
+        sw.addclock('cpu.parse', 'Parse')
+        sw.tagclock('cpu.parse', 'cpu')
+        self.assertEqual(['db.read', 'db.write'], sw.taggedclocks('io'))
+        self.assertEqual(['db.write'], sw.taggedclocks('io', 'db.w'))
+        self.assertEqual(['db.read', 'db.write'], sw.taggedclocks(_prefix='db.'))
+        self.assertEqual(['io', 'write'], sw.clocktags('db.write'))
+        sw.start('db.read')
+        sw.starttagged('io')
+        self.assertEqual(['db.read', 'db.write'], sw.startedclocks())
+        self.assertEqual(1, sw.clocklapcount('db.read'))
+        sw.pausetagged(_prefix='db.')
+        self.assertEqual(['db.read', 'db.write'], sw.pausedclocks())
+        sw.unpausetagged('write')
+        self.assertEqual(['db.read'], sw.pausedclocks())
+        sw.stoptagged('io')
+        self.assertEqual([], sw.startedclocks())
+        summary = sw.get_summary(json=True, tag='io')
+        self.assertIn('db.write', summary)
+        self.assertNotIn('cpu.parse', summary)
+        self.assertNotIn('Parse', sw.get_summary(prefix='db.'))
+        self.assertEqual(['db.write'], [_row[0] for _row in sw.snapshot('write')['clocks']])
+        sw.resettagged(_prefix='db.')
+        self.assertEqual([], sw.usedclocks())
+        sw.addclock('db.flush', 'DB flush')
+        self.assertEqual(['db.read', 'db.write', 'db.flush'], sw.taggedclocks(_prefix='db.'))
+        sw.removeclock('db.write')
+        self.assertEqual(['db.read', 'db.flush'], sw.taggedclocks(_prefix='db.'))
+        self.assertEqual(['db.read'], sw.taggedclocks('io'))
+        self.assertEqual([], sw.taggedclocks('write'))
+        sw.untagclock('cpu.parse', 'cpu')
+        self.assertEqual([], sw.clocktags('cpu.parse'))
+        self.assertRaises(StopWatchException, sw.tagclock, 'missing', 'io')
+
+    def test_CpuTime(self):
+        import gc
+        sw = StopWatch('cpu', _cputime=True, _recordlapdetail=True)
+        sw.addclock('plain', 'Plain', _cputime=False)
+        self.assertIsNone(sw.clockcpusecs('plain'))
+        sw.start()
+        _end = time.thread_time() + 0.05
+        while time.thread_time() < _end:
+            pass
+        sw.pause()
+        time.sleep(0.05)
+        sw.unpause()
+        gc.collect()
+        sw.stop()
+        sw.start()
+        time.sleep(0.05)
+        sw.stop()
+        cpu = sw.clockcpusecs()
+        self.assertGreaterEqual(cpu['cpu'], 0.04)
+        self.assertGreaterEqual(cpu['threadcpu'], 0.04)
+        self.assertGreater(cpu['gc'], 0.0)
+        first, second = sw.lapdetail(1), sw.lapdetail(2)
+        self.assertGreaterEqual(first['threadcpu'], 0.04)
+        self.assertEqual(cpu['gc'], first['gc'] + second['gc'])
+        self.assertGreaterEqual(second['total'], 0.04)
+        self.assertLess(second['threadcpu'], 0.02)
+        self.assertEqual(cpu, dict((_key, sw.get_clock_summary(json=True)[_key]) for _key in cpu))
+        self.assertIn('thread cpu', sw.get_clock_summary())
+        self.assertEqual(cpu['gc'], sw.get_summary(json=True)['default']['gc'])
+        sw.reset()
+        self.assertEqual({'cpu': 0.0, 'threadcpu': 0.0, 'gc': 0.0}, sw.clockcpusecs())
+
+    def test_CpuTimeUnavailable(self):
+        from pyStopWatch import CpuMeter
+        threadtime = CpuMeter._threadtime
+        CpuMeter._threadtime = None
+        try:
+            self.assertRaises(StopWatchException, StopWatch, 'cpu', _cputime=True)
+            sw = StopWatch('plain')
+            self.assertRaises(StopWatchException, sw.addclock, 'cpu', 'CPU', _cputime=True)
+            self.assertIsNone(sw.clockcpusecs())
+        finally:
+            CpuMeter._threadtime = threadtime
+
+    def test_Memory(self):
+        import tracemalloc
+        tracing = tracemalloc.is_tracing()
+        try:
+            sw = StopWatch('memory', _memory=True, _recordlapdetail=True)
+            sw.addclock('rss', 'RSS', _memory='rss')
+            sw.addclock('plain', 'Plain', _memory=False)
+            self.assertIsNone(sw.clockmemory('plain'))
+            self.assertTrue(tracemalloc.is_tracing())
+            sw.start()
+            kept = [bytes(1000) for _idx in range(1000)]
+            sw.stop()
+            sw.start()
+            garbage = [bytes(1000) for _idx in range(2000)]
+            del garbage
+            sw.stop()
+            first, second = sw.lapdetail(1), sw.lapdetail(2)
+            self.assertGreater(first['allocated'], 1000000)
+            self.assertGreaterEqual(first['peak'], first['allocated'])
+            self.assertLess(abs(second['allocated']), 100000)
+            if hasattr(tracemalloc, 'reset_peak'):
+                # before Python 3.9 the peak is only sampled at stop
+                self.assertGreater(second['peak'], 2000000)
+            memory = sw.clockmemory()
+            self.assertEqual(first['allocated'] + second['allocated'], memory['allocated'])
+            self.assertEqual(second['peak'], memory['peak'])
+            self.assertEqual(memory['peak'], sw.get_summary(json=True)['default']['peak'])
+            self.assertIn('allocated', sw.get_clock_summary())
+            sw.start('rss')
+            touched = bytearray(32 * 1024 * 1024)
+            sw.stop('rss')
+            self.assertGreater(sw.clockmemory('rss')['allocated'], 16 * 1024 * 1024)
+            del kept, touched
+            self.assertRaises(StopWatchException, sw.addclock, 'bad', 'Bad', _memory='heap')
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+
+    def test_MemoryNested(self):
+        import tracemalloc
+        if not hasattr(tracemalloc, 'reset_peak'):
+            self.skipTest('tracemalloc.reset_peak needs Python 3.9')
+        tracing = tracemalloc.is_tracing()
+        try:
+            sw = StopWatch('memory', _memory=True)
+            sw.addclock('outer', 'Outer')
+            sw.addclock('inner', 'Inner')
+            sw.start('outer')
+            garbage = bytes(20000000)
+            del garbage
+            sw.start('inner')
+            small = bytes(1000)
+            sw.stop('inner')
+            garbage = bytes(10000000)
+            del garbage
+            sw.pause('outer')
+            sw.start('inner')
+            sw.stop('inner')
+            sw.unpause('outer')
+            sw.stop('outer')
+            self.assertGreater(sw.clockmemory('outer')['peak'], 19000000)
+            self.assertLess(sw.clockmemory('inner')['peak'], 1000000)
+            del small
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+
+    def test_LapOverrides(self):
+        lap = Lap()
+        lap.start(datetime.utcnow() - timedelta(seconds=2))
+        lap.pause()
+        lap.unpause(datetime.utcnow() - timedelta(seconds=1))
+        lap.stop()
+        self.assertTrue(lap.isstopped())
+        self.assertAlmostEqual(3.0, lap.laptotalsecs(), delta=0.5)
+
+    def test_Handle(self):
+        sw = StopWatch('handles', _clocksource=iter(range(0, 10 ** 6, 1000)).__next__)
+        sw.addclock('loop', 'Loop')
+        loop = sw.handle('loop')
+        for _idx in range(3):
+            loop.start()
+            loop.stop()
+        self.assertEqual(3, sw.clocklapcount('loop'))
+        loop.start()
+        loop.pause()
+        self.assertEqual(['loop'], sw.pausedclocks())
+        self.assertRaises(StopWatchException, loop.pause)
+        sw.unpause('loop')
+        self.assertTrue(loop.isstarted())
+        sw.stop('loop')
+        self.assertEqual([], sw.startedclocks())
+        with loop:
+            self.assertEqual(['loop'], sw.startedclocks())
+        self.assertEqual(5, loop.lapcount())
+        loop.reset()
+        loop.start()
+        loop.stop()
+        self.assertEqual(1, sw.clocklapcount('loop'))
+        sw.addclock('loop', 'Loop again')
+        loop.start()
+        loop.stop()
+        self.assertEqual(1, sw.clocklapcount('loop'))
+        self.assertEqual(0.000001, loop.totalsecs())
+        sw.removeclock('loop')
+        self.assertRaises(StopWatchException, loop.start)
+        self.assertRaises(StopWatchException, sw.handle, 'loop')
+        self.assertEqual('default', sw.handle().name)
+
+    def test_SummaryStream(self):
+        import io
+        import json
+        sw = StopWatch('stream', _clocksource=iter(range(0, 10 ** 6, 1000)).__next__)
+        for _idx in range(50):
+            sw.addclock('clock{0}'.format(_idx), 'Clock {0}'.format(_idx), _display=_idx % 5 != 0)
+            sw.start('clock{0}'.format(_idx))
+            sw.stop('clock{0}'.format(_idx))
+        stream = io.StringIO()
+        self.assertIsNone(sw.get_summary(stream=stream))
+        self.assertEqual(sw.get_summary(), stream.getvalue())
+        self.assertIn('10 Hidden Clock(s)', stream.getvalue())
+        stream = io.StringIO()
+        sw.get_summary(json=True, stream=stream)
+        self.assertEqual(sw.get_summary(json=True), json.loads(stream.getvalue()))
+        # default clock and 40 shown clocks, the three totals and the closing brace
+        self.assertEqual(41 + 3 + 1, len(stream.getvalue().splitlines()))
+        with sw.clock('tree'):
+            pass
+        stream = io.StringIO()
+        sw.get_summary(json=True, calltree=True, stream=stream)
+        self.assertEqual(sw.get_summary(json=True, calltree=True), json.loads(stream.getvalue()))
+        stream = io.StringIO()
+        StopWatch('empty').get_summary(json=True, _displayall=False, stream=stream, prefix='none')
+        self.assertEqual(3, len(json.loads(stream.getvalue())))
+
+    def test_TimeitSampled(self):
+        registry = StopWatch('registry')
+        calls = []
+
+        @timeit(None, persistent=True, registry=registry, sample=4)
+        def _noop(value):
+            calls.append(value)
+            return value
+
+        self.assertEqual([0, 1, 2, 3, 4, 5, 6, 7], [_noop(value) for value in range(8)])
+        self.assertEqual(8, len(calls))
+        self.assertEqual(2, registry.clocklapcount(_noop.clockname))
+        self.assertEqual(8, _noop.sampler.calls)
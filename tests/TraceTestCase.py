@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Trace Test Definitions
+"""
+import io
+import json
+import threading
+import unittest
+from pyStopWatch.StopWatch import StopWatch, EVENT_START, EVENT_STOP, EVENT_PAUSE, EVENT_UNPAUSE
+from pyStopWatch.Trace import IntervalRecorder
+
+
+class TraceTestCase(unittest.TestCase):
+
+    def record(self):
+        ticks = iter(range(0, 10 ** 6, 1000))
+        sw = StopWatch('trace', _clocksource=lambda: next(ticks))
+        recorder = IntervalRecorder('run')
+        sw.addsink(recorder)
+        sw.addclock('outer', 'Outer')
+        sw.addclock('inner', 'Inner')
+        sw.start('outer', 1000)
+        sw.start('inner', 2000)
+        sw.stop('inner', 3000)
+        sw.pause('outer', 4000)
+        sw.unpause('outer', 6000)
+        sw.stop('outer', 9000)
+        sw.start('inner', 10000)
+        sw.stop('inner', 12000)
+        return sw, recorder
+
+    def test_Intervals(self):
+        sw, recorder = self.record()
+        thread = threading.get_ident()
+        self.assertEqual([('inner', 1, 2000, 3000, (), thread),
+                          ('outer', 1, 1000, 9000, ((4000, 6000),), thread),
+                          ('inner', 2, 10000, 12000, (), thread)], recorder.intervals)
+        self.assertEqual([('outer', 1000, 4000), ('outer', 6000, 9000)],
+                         [(name, start, end) for name, lap, start, end, tid in recorder.segments() if name == 'outer'])
+        sw.removesink(recorder)
+        sw.start('inner')
+        sw.stop('inner')
+        self.assertEqual(3, len(recorder.intervals))
+
+    def test_RecordedLaps(self):
+        sw = StopWatch('trace', _clocksource=iter(range(0, 10 ** 6, 1000)).__next__)
+        recorder = IntervalRecorder()
+        sw.addsink(recorder)
+        with sw.clock('parse'):
+            with sw.clock('tokenize'):
+                pass
+        self.assertEqual(['parse/tokenize', 'parse'], [interval[0] for interval in recorder.intervals])
+
+    def test_ChromeTrace(self):
+        sw, recorder = self.record()
+        stream = io.StringIO()
+        recorder.chrometrace(stream)
+        trace = json.loads(stream.getvalue())
+        events = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+        self.assertEqual(4, len(events))
+        outer = [event for event in events if event['name'] == 'outer']
+        self.assertEqual([(0.0, 3.0), (5.0, 3.0)], [(event['ts'], event['dur']) for event in outer])
+
+    def test_Speedscope(self):
+        sw, recorder = self.record()
+        stream = io.StringIO()
+        recorder.speedscope(stream)
+        profile = json.loads(stream.getvalue())
+        frames = [frame['name'] for frame in profile['shared']['frames']]
+        events = [(event['type'], frames[event['frame']], event['at'])
+                  for event in profile['profiles'][0]['events']]
+        self.assertEqual([('O', 'outer', 0), ('O', 'inner', 1000), ('C', 'inner', 2000), ('C', 'outer', 3000),
+                          ('O', 'outer', 5000), ('C', 'outer', 8000), ('O', 'inner', 9000), ('C', 'inner', 11000)],
+                         events)
+
+    def test_SpeedscopeThreads(self):
+        # laps finish in a different order than they start, and a paused lap resumes after a later lap
+        recorder = IntervalRecorder()
+        for name, event, at, thread in [('a', EVENT_START, 0, 1), ('b', EVENT_START, 5, 1), ('x', EVENT_START, 6, 2),
+                                        ('b', EVENT_STOP, 8, 1), ('a', EVENT_PAUSE, 10, 1), ('c', EVENT_START, 12, 1),
+                                        ('c', EVENT_STOP, 14, 1), ('a', EVENT_UNPAUSE, 16, 1),
+                                        ('a', EVENT_STOP, 20, 1), ('x', EVENT_STOP, 30, 2)]:
+            recorder.event(name, event, at, thread)
+        stream = io.StringIO()
+        recorder.speedscope(stream)
+        profile = json.loads(stream.getvalue())
+        frames = [frame['name'] for frame in profile['shared']['frames']]
+        self.assertEqual([[('O', 'a', 0), ('O', 'b', 5), ('C', 'b', 8), ('C', 'a', 10), ('O', 'c', 12),
+                           ('C', 'c', 14), ('O', 'a', 16), ('C', 'a', 20)],
+                          [('O', 'x', 6), ('C', 'x', 30)]],
+                         [[(event['type'], frames[event['frame']], event['at']) for event in entry['events']]
+                          for entry in profile['profiles']])
+        self.assertEqual([(0, 20), (6, 30)], [(entry['startValue'], entry['endValue'])
+                                              for entry in profile['profiles']])
+
+
+if __name__ == '__main__':
+    unittest.main()